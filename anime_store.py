@@ -0,0 +1,317 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional, List, Dict, Iterator, Iterable, Tuple, Any
+
+from instrumentation import get_logger
+from yhdm_api import Anime, AnimeShell, StreamLine, Episode
+
+logger = get_logger(__name__)
+
+
+# 筛选结果中的状态文字，如 "更新至24集" / "全12集"
+_STATUS_EPISODE_RE = re.compile(r'(\d+)')
+
+# 按更新时间排序的筛选结果中连续出现多少个未变化的条目后停止翻页
+DEFAULT_STOP_AFTER_UNCHANGED = 30
+
+# SQLite 单条语句的参数个数上限较低，IN 查询分批进行
+_QUERY_CHUNK = 500
+
+
+def episode_from_status(status: str) -> Optional[int]:
+    """从状态文字中取出集数，没有数字时返回 None"""
+    match = _STATUS_EPISODE_RE.search(status or "")
+    return int(match.group(1)) if match else None
+
+
+@dataclass
+class StoredState:
+    """已保存条目的同步状态"""
+    list_status: Optional[str]  # 上次同步时筛选结果中的状态文字
+    latest_episode: int
+    synced_at: float
+
+
+class AnimeStore:
+    """
+    基于 SQLite 文件的 Anime 持久化存储
+
+    anime / stream_lines / episodes 三张表分别保存动漫、播放线路和分集，
+    保存一部动漫时在同一个事务中替换其全部线路和分集。
+    """
+    def __init__(self, path: str = "anime_store.sqlite3"):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS anime ("
+                " id INTEGER PRIMARY KEY,"
+                " name TEXT NOT NULL,"
+                " image_url TEXT,"
+                " status TEXT NOT NULL,"
+                " latest_episode INTEGER NOT NULL,"
+                " tags TEXT NOT NULL,"
+                " type TEXT NOT NULL,"
+                " year TEXT NOT NULL,"
+                " description TEXT NOT NULL,"
+                " last_update REAL NOT NULL,"
+                " list_status TEXT,"
+                " synced_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS stream_lines ("
+                " anime_id INTEGER NOT NULL,"
+                " stream_id INTEGER NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " PRIMARY KEY (anime_id, stream_id))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS episodes ("
+                " anime_id INTEGER NOT NULL,"
+                " stream_id INTEGER NOT NULL,"
+                " episode_id INTEGER NOT NULL,"
+                " title TEXT NOT NULL,"
+                " PRIMARY KEY (anime_id, stream_id, episode_id))"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程使用，每个线程各自持有一个
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def __len__(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM anime").fetchone()[0]
+
+    def __contains__(self, anime_id: int) -> bool:
+        return self._connect().execute("SELECT 1 FROM anime WHERE id = ?", (anime_id,)).fetchone() is not None
+
+    def save(self, anime: Anime, list_status: Optional[str] = None) -> None:
+        """保存一部动漫，list_status 为 None 时保留原有的筛选状态"""
+        self.save_many([(anime, list_status)])
+
+    def save_many(self, items: Iterable[Tuple[Anime, Optional[str]]]) -> None:
+        """在一个事务中保存多部动漫，items 为 (Anime, list_status) 序列"""
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            for anime, list_status in items:
+                conn.execute(
+                    "INSERT INTO anime (id, name, image_url, status, latest_episode, tags, type, year,"
+                    " description, last_update, list_status, synced_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT(id) DO UPDATE SET name = excluded.name, image_url = excluded.image_url,"
+                    " status = excluded.status, latest_episode = excluded.latest_episode, tags = excluded.tags,"
+                    " type = excluded.type, year = excluded.year, description = excluded.description,"
+                    " last_update = excluded.last_update,"
+                    " list_status = COALESCE(excluded.list_status, anime.list_status),"
+                    " synced_at = excluded.synced_at",
+                    (anime.id, anime.name, anime.image_url, anime.status, anime.latest_episode,
+                     json.dumps(anime.tags, ensure_ascii=False), anime.type, anime.year, anime.description,
+                     anime.last_update.timestamp(), list_status, now),
+                )
+                conn.execute("DELETE FROM stream_lines WHERE anime_id = ?", (anime.id,))
+                conn.execute("DELETE FROM episodes WHERE anime_id = ?", (anime.id,))
+                conn.executemany(
+                    "INSERT INTO stream_lines (anime_id, stream_id, position) VALUES (?, ?, ?)",
+                    [(anime.id, line.id, position) for position, line in enumerate(anime.stream_lines)],
+                )
+                conn.executemany(
+                    "INSERT OR REPLACE INTO episodes (anime_id, stream_id, episode_id, title) VALUES (?, ?, ?, ?)",
+                    [(anime.id, line.id, episode.id, episode.title)
+                     for line in anime.stream_lines for episode in line.episodes],
+                )
+
+    def load(self, anime_id: int) -> Optional[Anime]:
+        """读取一部动漫，不存在时返回 None"""
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT id, name, image_url, status, latest_episode, tags, type, year, description, last_update"
+            " FROM anime WHERE id = ?", (anime_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._build(conn, row)
+
+    def iter_anime(self) -> Iterator[Anime]:
+        """按 id 顺序遍历所有已保存的动漫"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT id, name, image_url, status, latest_episode, tags, type, year, description, last_update"
+            " FROM anime ORDER BY id"
+        ).fetchall()
+        for row in rows:
+            yield self._build(conn, row)
+
+    @staticmethod
+    def _build(conn: sqlite3.Connection, row: tuple) -> Anime:
+        anime_id, name, image_url, status, latest_episode, tags, type, year, description, last_update = row
+        episodes: Dict[int, List[Episode]] = {}
+        for stream_id, episode_id, title in conn.execute(
+                "SELECT stream_id, episode_id, title FROM episodes WHERE anime_id = ? ORDER BY stream_id, episode_id",
+                (anime_id,)):
+            episodes.setdefault(stream_id, []).append(Episode(id=episode_id, title=title))
+        stream_lines = [
+            StreamLine(id=stream_id, episodes=episodes.get(stream_id, []))
+            for (stream_id,) in conn.execute(
+                "SELECT stream_id FROM stream_lines WHERE anime_id = ? ORDER BY position", (anime_id,))
+        ]
+        return Anime(
+            id=anime_id,
+            name=name,
+            image_url=image_url,
+            status=status,
+            latest_episode=latest_episode,
+            tags=json.loads(tags),
+            type=type,
+            year=year,
+            description=description,
+            stream_lines=stream_lines,
+            last_update=datetime.fromtimestamp(last_update),
+        )
+
+    def states(self, anime_ids: Iterable[int]) -> Dict[int, StoredState]:
+        """批量读取同步状态，未保存的 id 不在结果中"""
+        conn = self._connect()
+        ids = list(anime_ids)
+        states = {}
+        for start in range(0, len(ids), _QUERY_CHUNK):
+            chunk = ids[start:start + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(chunk))
+            for anime_id, list_status, latest_episode, synced_at in conn.execute(
+                    f"SELECT id, list_status, latest_episode, synced_at FROM anime WHERE id IN ({placeholders})",
+                    chunk):
+                states[anime_id] = StoredState(list_status, latest_episode, synced_at)
+        return states
+
+    def delete(self, anime_id: int) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM anime WHERE id = ?", (anime_id,))
+            conn.execute("DELETE FROM stream_lines WHERE anime_id = ?", (anime_id,))
+            conn.execute("DELETE FROM episodes WHERE anime_id = ?", (anime_id,))
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._connect().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def is_stale(shell: AnimeShell, state: Optional[StoredState]) -> bool:
+    """
+    判断筛选结果中的条目是否需要重新获取详情：
+    未保存过、状态文字变化，或状态中的集数大于已保存的 latest_episode
+    """
+    if state is None:
+        return True
+    if state.list_status != shell.status:
+        return True
+    episode = episode_from_status(shell.status)
+    return episode is not None and episode > state.latest_episode
+
+
+@dataclass
+class RefreshPlan:
+    """
+    stale: 需要重新获取详情的条目（按筛选结果中的顺序）
+    pages: 请求的筛选结果页数
+    scanned: 检查过的条目数
+    """
+    stale: List[AnimeShell] = field(default_factory=list)
+    pages: int = 0
+    scanned: int = 0
+
+    @property
+    def ids(self) -> List[int]:
+        return [shell.id for shell in self.stale]
+
+
+@dataclass
+class SyncResult:
+    plan: RefreshPlan
+    refreshed: List[int] = field(default_factory=list)
+    failed: Dict[int, Optional[BaseException]] = field(default_factory=dict)
+
+
+class RefreshPlanner:
+    """
+    增量同步：按更新时间遍历筛选结果，只重新获取状态有变化的动漫详情
+
+    filter_anime(order_by="time") 中最近更新的条目排在前面，逐页比较每个条目的 status
+    与上次同步时保存的状态，连续 stop_after_unchanged 个条目未变化时认为之后的都未变化，停止翻页。
+    首次同步（存储为空）时会遍历全部分页。
+
+    用法:
+        planner = RefreshPlanner(YhdmApi(), AnimeStore("anime.sqlite3"), types=(1, 2))
+        result = planner.sync()
+    """
+    def __init__(self,
+                 api: Any,
+                 store: AnimeStore,
+                 types: Iterable[int] = (1,),
+                 stop_after_unchanged: int = DEFAULT_STOP_AFTER_UNCHANGED,
+                 max_pages: Optional[int] = None):
+        self.api = api
+        self.store = store
+        self.types = tuple(types)
+        self.stop_after_unchanged = stop_after_unchanged
+        self.max_pages = max_pages
+
+    def plan(self) -> RefreshPlan:
+        plan = RefreshPlan()
+        seen = set()
+        for type_id in self.types:
+            unchanged_run = 0
+            page = 1
+            while self.max_pages is None or page <= self.max_pages:
+                shells = [shell for shell in self.api.filter_anime(type=type_id, order_by="time", page=page)
+                          if shell.id not in seen]
+                plan.pages += 1
+                # 超出最后一页时站点可能返回空列表或重复的最后一页
+                if not shells:
+                    break
+                states = self.store.states(shell.id for shell in shells)
+                for shell in shells:
+                    seen.add(shell.id)
+                    plan.scanned += 1
+                    if is_stale(shell, states.get(shell.id)):
+                        plan.stale.append(shell)
+                        unchanged_run = 0
+                    else:
+                        unchanged_run += 1
+                if unchanged_run >= self.stop_after_unchanged:
+                    break
+                page += 1
+        logger.debug("增量同步计划: 请求 %d 页, 检查 %d 个条目, %d 个需要更新",
+                     plan.pages, plan.scanned, len(plan.stale))
+        return plan
+
+    def sync(self, concurrency: int = 16, processes: Optional[int] = None) -> SyncResult:
+        """
+        按 plan 的结果并发获取详情并写入存储，参数同 YhdmApi.get_anime_details
+        """
+        plan = self.plan()
+        result = SyncResult(plan)
+        shells = {shell.id: shell for shell in plan.stale}
+        if shells:
+            for item in self.api.get_anime_details(list(shells), concurrency=concurrency, processes=processes):
+                if item.anime is None:
+                    result.failed[item.id] = item.error
+                    continue
+                self.store.save(item.anime, list_status=shells[item.id].status)
+                result.refreshed.append(item.id)
+        self.store.set_meta("last_sync", str(time.time()))
+        return result
@@ -0,0 +1,64 @@
+"""
+首页解析基准：比较单次遍历的 YhdmParser.parse_homepage 与四个 parse_* 方法依次扫描的旧方式
+
+用法:
+    python benchmarks/bench_homepage_parser.py --repeat 50
+    python benchmarks/bench_homepage_parser.py --html page.html --backend lxml
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_backend import available_backends, make_soup  # noqa: E402
+from yhdm_home_html_parser import YhdmParser  # noqa: E402
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "homepage.html")
+
+
+def best_of(func, repeat):
+    """执行 repeat 次，返回最短耗时(秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="首页单次遍历解析 vs 四次扫描解析")
+    parser.add_argument("--html", default=FIXTURE, help="首页HTML文件")
+    parser.add_argument("--repeat", type=int, default=30, help="每项重复次数，取最短耗时")
+    parser.add_argument("--backend", nargs="*", help="HTML 解析后端，默认测试所有已安装的后端")
+    args = parser.parse_args(argv)
+
+    with open(args.html, encoding="utf-8") as f:
+        html = f.read()
+    yhdm = YhdmParser()
+
+    print(f"{'backend':<14}{'stage':<12}{'multi ms':>10}{'single ms':>11}{'speedup':>9}")
+    for backend in args.backend or available_backends():
+        soup = make_soup(html, backend)
+        if yhdm.parse_homepage(soup) != yhdm.parse_homepage_multi_pass(soup):
+            raise SystemExit(f"{backend}: 单次遍历与四次扫描的结果不一致")
+
+        # walk: 只计文档树已构建好之后的提取耗时；total: 包含构建文档树
+        stages = {
+            "walk": (lambda: yhdm.parse_homepage_multi_pass(soup),
+                     lambda: yhdm.parse_homepage(soup)),
+            "total": (lambda: yhdm.parse_homepage_multi_pass(make_soup(html, backend)),
+                      lambda: yhdm.parse_homepage(make_soup(html, backend))),
+        }
+        for stage, (multi, single) in stages.items():
+            multi_time = best_of(multi, args.repeat)
+            single_time = best_of(single, args.repeat)
+            print(f"{backend:<14}{stage:<12}{multi_time * 1000:>10.2f}{single_time * 1000:>11.2f}"
+                  f"{multi_time / single_time:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
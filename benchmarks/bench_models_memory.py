@@ -0,0 +1,125 @@
+"""
+模型内存基准：比较紧凑的 Anime / StreamLine / EpisodeList 与原先基于 dataclass 列表的表示
+
+按录制详情页的结构生成大量动漫（每部多条线路、每条线路若干集，标题在各动漫间重复），
+用 tracemalloc 统计两种表示各自占用的内存，并比较 get_episodes 的耗时。
+
+用法:
+    python benchmarks/bench_models_memory.py --anime 20000 --lines 3 --episodes 24
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from yhdm_api import Anime, EpisodeList, StreamLine  # noqa: E402
+
+
+@dataclass
+class ReferenceEpisode:
+    # 原 Episode
+    id: int
+    title: str
+
+
+@dataclass
+class ReferenceStreamLine:
+    # 原 StreamLine
+    id: int
+    episodes: List[ReferenceEpisode]
+
+
+@dataclass
+class ReferenceAnime:
+    # 原 Anime
+    id: int
+    name: str
+    image_url: str
+    status: str
+    latest_episode: int
+    tags: List[str]
+    type: str
+    year: str
+    description: str
+    stream_lines: List[ReferenceStreamLine]
+    last_update: datetime
+
+    def get_episodes(self, stream_id: int) -> Optional[List[ReferenceEpisode]]:
+        for line in self.stream_lines:
+            if line.id == stream_id:
+                return line.episodes
+        return None
+
+
+def titles(count):
+    # 每次生成新的字符串对象，与逐页解析得到的标题一样互不共享
+    return [f"第{n:02d}集" for n in range(1, count + 1)]
+
+
+def build_reference(anime_id, lines, episodes):
+    stream_lines = [ReferenceStreamLine(id=line_id, episodes=[ReferenceEpisode(id=n, title=title)
+                                                              for n, title in enumerate(titles(episodes), 1)])
+                    for line_id in range(1, lines + 1)]
+    return ReferenceAnime(anime_id, f"动漫{anime_id}", f"https://img.example/{anime_id}.jpg", f"更新至{episodes}集",
+                          episodes, ["日本", "奇幻"], "新番", "20" + "24", "", stream_lines, datetime.now())
+
+
+def build_compact(anime_id, lines, episodes):
+    stream_lines = [StreamLine(id=line_id, episodes=EpisodeList.from_titles(titles(episodes)))
+                    for line_id in range(1, lines + 1)]
+    return Anime(anime_id, f"动漫{anime_id}", f"https://img.example/{anime_id}.jpg", f"更新至{episodes}集",
+                 episodes, ["日本", "奇幻"], "新番", "20" + "24", "", stream_lines, datetime.now())
+
+
+def measure(build, args):
+    """返回 (对象列表, 占用字节数)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = [build(anime_id, args.lines, args.episodes) for anime_id in range(args.anime)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return items, used
+
+
+def lookup_ns(items, stream_id, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for anime in items:
+            anime.get_episodes(stream_id)
+        best = min(best, time.perf_counter() - start)
+    return best / len(items) * 1e9
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="紧凑模型与原 dataclass 模型的内存占用")
+    parser.add_argument("--anime", type=int, default=20000, help="动漫数量")
+    parser.add_argument("--lines", type=int, default=3, help="每部动漫的播放线路数")
+    parser.add_argument("--episodes", type=int, default=24, help="每条线路的分集数")
+    parser.add_argument("--repeat", type=int, default=5, help="get_episodes 计时轮数，取最快一轮")
+    args = parser.parse_args(argv)
+
+    reference, reference_bytes = measure(build_reference, args)
+    compact, compact_bytes = measure(build_compact, args)
+    for old, new in zip(reference, compact):
+        for old_line, new_line in zip(old.stream_lines, new.stream_lines):
+            if [(e.id, e.title) for e in old_line.episodes] != [(e.id, e.title) for e in new_line.episodes]:
+                raise SystemExit(f"动漫 {old.id} 线路 {old_line.id} 的分集不一致")
+
+    total_episodes = args.anime * args.lines * args.episodes
+    print(f"anime={args.anime} lines={args.lines} episodes={args.episodes} total_episodes={total_episodes}")
+    print(f"{'model':<12}{'MB':>10}{'B/episode':>12}{'get_episodes ns':>18}")
+    for name, items, used in (("dataclass", reference, reference_bytes), ("compact", compact, compact_bytes)):
+        print(f"{name:<12}{used / 1e6:>10.1f}{used / total_episodes:>12.1f}"
+              f"{lookup_ns(items, args.lines, args.repeat):>18.1f}")
+    print(f"memory ratio: {reference_bytes / compact_bytes:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+排行榜条目微基准：比较 clean_rank_title / extract_heat 与原先 parse_rankings 中嵌套实现的单条耗时
+
+以录制首页中的排行项为样本复制成数千条的排行列表，先校验两种实现在全部样本上的输出一致，再计时。
+
+用法:
+    python benchmarks/bench_rankings.py --items 5000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_backend import available_backends, make_soup  # noqa: E402
+from yhdm_home_html_parser import clean_rank_title, extract_heat  # noqa: E402
+
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "homepage.html")
+
+
+def reference_clean_title(title):
+    # 原 parse_rankings.clean_title
+    title = re.sub(r'^\d+\s+', '', title)
+    title = re.sub(r'\d+\s*', '', title)
+    title = title.strip()
+    title = re.sub(r'\s+', ' ', title)
+    title = title.lstrip()
+    title = title.rstrip()
+    title = title.replace(' ', '')
+    title = re.sub(r'[^\w一-鿿]', '', title)
+    title = title.lstrip()
+    return title
+
+
+def reference_extract_heat(item):
+    # 原 parse_rankings.extract_heat
+    heat = 0
+    heat_elem = item.find('span', class_='text_muted pull_right')
+    if heat_elem:
+        heat_match = re.search(r'(\d+)', heat_elem.text.strip())
+        if heat_match:
+            return int(heat_match.group(1))
+    heat_elem = item.find('span', class_='text_muted pull_right renqi')
+    if heat_elem:
+        heat_match = re.search(r'(\d+)', heat_elem.text.strip())
+        if heat_match:
+            return int(heat_match.group(1))
+    return heat
+
+
+def build_corpus(html, items, backend):
+    """把首页中所有排行项复制成一个含 items 条的排行列表，返回 li 元素列表"""
+    soup = make_soup(html, backend)
+    samples = [str(li) for section in soup.find_all('div', class_='list_info') for li in section.find_all('li')]
+    rows = (samples * (items // len(samples) + 1))[:items]
+    corpus = make_soup('<div class="list_info"><ul class="ranklist">%s</ul></div>' % "".join(rows), backend)
+    return corpus.find_all('li')
+
+
+def per_item_us(func, inputs, repeat):
+    """返回 repeat 轮中最快一轮的单条耗时(微秒)"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for value in inputs:
+            func(value)
+        best = min(best, time.perf_counter() - start)
+    return best / len(inputs) * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="排行榜标题清理和热度提取的单条耗时")
+    parser.add_argument("--html", default=FIXTURE, help="首页HTML文件")
+    parser.add_argument("--items", type=int, default=5000, help="排行列表条数")
+    parser.add_argument("--repeat", type=int, default=5, help="重复轮数，取最快一轮")
+    parser.add_argument("--backend", nargs="*", help="HTML 解析后端，默认测试所有已安装的后端")
+    args = parser.parse_args(argv)
+
+    with open(args.html, encoding="utf-8") as f:
+        html = f.read()
+
+    print(f"items={args.items}")
+    print(f"{'backend':<14}{'function':<18}{'old us':>9}{'new us':>9}{'speedup':>9}")
+    for backend in args.backend or available_backends():
+        items = build_corpus(html, args.items, backend)
+        titles = [li.find('a').text.strip() for li in items]
+        for title in titles:
+            if clean_rank_title(title) != reference_clean_title(title):
+                raise SystemExit(f"clean_rank_title 输出不一致: {title!r}")
+        for li in items:
+            if extract_heat(li) != reference_extract_heat(li):
+                raise SystemExit(f"extract_heat 输出不一致: {li}")
+
+        cases = {
+            "clean_rank_title": (reference_clean_title, clean_rank_title, titles),
+            "extract_heat": (reference_extract_heat, extract_heat, items),
+        }
+        for name, (old, new, inputs) in cases.items():
+            old_us = per_item_us(old, inputs, args.repeat)
+            new_us = per_item_us(new, inputs, args.repeat)
+            print(f"{backend:<14}{name:<18}{old_us:>9.2f}{new_us:>9.2f}{old_us / new_us:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+序列化基准：比较 json.dumps(indent=2)（generate_json 的格式）、紧凑 JSON 和 MessagePack 二进制
+在录制首页、详情页和筛选结果上的编码/解码耗时与数据大小（MessagePack 需要安装 msgpack）
+
+每种格式先校验往返结果与原对象一致，再计时。
+
+用法:
+    python benchmarks/bench_serialization.py --repeat 200
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization  # noqa: E402
+from serialization import dumps_binary, dumps_json, from_primitive, loads_binary, loads_json, to_primitive  # noqa: E402
+from yhdm_api import Anime, AnimeShell, parse_anime_detail, parse_filter_results  # noqa: E402
+from yhdm_home_html_parser import YhdmParser  # noqa: E402
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+
+def build_payloads(details):
+    """返回 {名称: (对象, 还原时使用的类型)}"""
+    anime = parse_anime_detail(read_fixture("detail.html"), 1)
+    return {
+        "homepage": (YhdmParser().generate_data(read_fixture("homepage.html")), None),
+        "detail": (anime, Anime),
+        f"detail x{details}": ([anime] * details, List[Anime]),
+        "filter": (parse_filter_results(read_fixture("filter.html")), List[AnimeShell]),
+    }
+
+
+def indented_json(obj):
+    # 原先的方式: 转为基本结构后 indent=2 输出
+    return json.dumps(to_primitive(obj), ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def load_indented_json(payload, cls):
+    return from_primitive(json.loads(payload), cls)
+
+
+FORMATS = {
+    "json indent=2": (indented_json, load_indented_json),
+    "compact json": (lambda obj: dumps_json(obj).encode("utf-8"), loads_json),
+}
+# MessagePack 需要可选依赖 msgpack
+if serialization.msgpack is not None:
+    FORMATS["msgpack"] = (dumps_binary, loads_binary)
+
+
+def best_us(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="解析结果的序列化耗时与大小")
+    parser.add_argument("--repeat", type=int, default=100, help="每项重复次数，取最短耗时")
+    parser.add_argument("--details", type=int, default=100, help="批量详情中的动漫数量")
+    args = parser.parse_args(argv)
+
+    if serialization.msgpack is None:
+        print("msgpack 未安装，跳过 MessagePack")
+    print(f"{'payload':<16}{'format':<16}{'bytes':>9}{'encode us':>12}{'decode us':>12}")
+    for name, (obj, cls) in build_payloads(args.details).items():
+        for fmt, (encode, decode) in FORMATS.items():
+            payload = encode(obj)
+            if decode(payload, cls) != obj:
+                raise SystemExit(f"{name} / {fmt}: 往返结果不一致")
+            encode_us = best_us(lambda: encode(obj), args.repeat)
+            decode_us = best_us(lambda: decode(payload, cls), args.repeat)
+            print(f"{name:<16}{fmt:<16}{len(payload):>9}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
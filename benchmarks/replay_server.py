@@ -0,0 +1,168 @@
+"""
+本地回放服务器：用 fixtures 目录中录制的页面模拟主站和播放器站点
+
+每个请求按路径前缀返回对应的 fixture，可设置固定的网络延迟；
+响应带 ETag，支持 If-None-Match 条件请求，便于测量 HTTP 缓存的效果。
+设置 max_concurrency 时模拟会限流的源站：同时处理的请求超过该数量时返回 429。
+"""
+import hashlib
+import os
+import sys
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# 路径前缀 -> (fixture 文件名, Content-Type)，按顺序匹配
+ROUTES = [
+    ("/player/ec.php", "ec.html", "text/html; charset=utf-8"),
+    ("/index.php/vod/play/", "play.html", "text/html; charset=utf-8"),
+    ("/index.php/vod/detail/", "detail.html", "text/html; charset=utf-8"),
+    ("/index.php/vod/show/", "filter.html", "text/html; charset=utf-8"),
+    ("/index.php/vod/search/", "search.html", "text/html; charset=utf-8"),
+    ("/index.php/ajax/suggest", "suggest.json", "application/json; charset=utf-8"),
+    ("/", "homepage.html", "text/html; charset=utf-8"),
+]
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 客户端提前断开连接（流式读取播放页）属于正常情况，不打印堆栈
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    fixtures = {}
+    for _, name, _ in ROUTES:
+        with open(os.path.join(fixtures_dir, name), "rb") as f:
+            fixtures[name] = f.read()
+    return fixtures
+
+
+class ReplayServer:
+    """
+    用法:
+        with ReplayServer(latency=0.02) as server:
+            print(server.base_url)
+    """
+    def __init__(self, latency=0.0, fixtures_dir=FIXTURES_DIR, host="127.0.0.1", port=0,
+                 max_concurrency=None, retry_after=None):
+        self.latency = latency
+        self.fixtures = load_fixtures(fixtures_dir)
+        self.max_concurrency = max_concurrency
+        self.retry_after = retry_after  # 429 响应的 Retry-After(秒)，None 表示不发送
+        self.requests = 0
+        self.throttled = 0
+        self.in_flight = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._server = _QuietHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.in_flight += 1
+                    overloaded = server.max_concurrency is not None and server.in_flight > server.max_concurrency
+                try:
+                    if overloaded:
+                        self._throttle()
+                    else:
+                        self._replay()
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _throttle(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    server.throttled += 1
+                self.send_response(429)
+                if server.retry_after is not None:
+                    self.send_header("Retry-After", str(server.retry_after))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def _replay(self):
+                if server.latency:
+                    time.sleep(server.latency)
+                path = urlparse(self.path).path
+                for prefix, name, content_type in ROUTES:
+                    if path.startswith(prefix):
+                        break
+                body = server.fixtures[name]
+                etag = '"%s"' % hashlib.md5(body).hexdigest()
+                with server._lock:
+                    server.requests += 1
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                try:
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # 客户端读到所需内容后主动断开（流式读取播放页）
+                    return
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="启动本地回放服务器")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    replay = ReplayServer(latency=args.latency_ms / 1000, port=args.port)
+    print(f"serving fixtures on {replay.base_url}")
+    try:
+        replay._server.serve_forever()
+    except KeyboardInterrupt:
+        replay.stop()
@@ -0,0 +1,86 @@
+"""
+离线性能基准：通过本地回放服务器重放录制的页面，统计各接口的吞吐量和 p50/p99 延迟
+
+用法:
+    python benchmarks/run_benchmarks.py --concurrency 8 --requests 200 --latency-ms 20
+    python benchmarks/run_benchmarks.py --only get_video_url get_anime_detail
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import ClientConfig  # noqa: E402
+from yhdm_api import YhdmApi  # noqa: E402
+from yhdm_home_html_parser import YhdmParser  # noqa: E402
+from replay_server import ReplayServer  # noqa: E402
+
+
+def build_targets(config):
+    api = YhdmApi(config=config)
+    parser = YhdmParser(config=config)
+    return {
+        "get_video_url": lambda: api.get_video_url(22214, 1, 1),
+        "get_anime_detail": lambda: api.get_anime_detail(22214),
+        "filter_anime": lambda: api.filter_anime(year="2023"),
+        "search_anime": lambda: api.search_anime("异世界"),
+        "generate_json": parser.generate_json,
+    }
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_target(func, requests, concurrency):
+    """并发执行 requests 次，返回 (吞吐量, 各次延迟, 失败次数)"""
+    func()  # 预热连接池
+
+    def timed(_):
+        start = time.perf_counter()
+        try:
+            ok = func() is not None
+        except Exception:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(requests)))
+    wall = time.perf_counter() - start
+    latencies = sorted(latency for latency, _ in results)
+    failures = sum(1 for _, ok in results if not ok)
+    return requests / wall, latencies, failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="YHDM API 离线性能基准")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发线程数")
+    parser.add_argument("--requests", type=int, default=200, help="每个接口的请求次数")
+    parser.add_argument("--latency-ms", type=float, default=0, help="回放服务器注入的网络延迟(毫秒)")
+    parser.add_argument("--only", nargs="*", help="只运行指定的接口")
+    args = parser.parse_args(argv)
+
+    latency = args.latency_ms / 1000
+    with ReplayServer(latency=latency) as api_server, ReplayServer(latency=latency) as player_server:
+        config = ClientConfig(api_base_url=api_server.base_url, player_base_url=player_server.base_url,
+                              timeout=10)
+        targets = build_targets(config)
+        names = args.only or list(targets)
+
+        print(f"concurrency={args.concurrency} requests={args.requests} latency={args.latency_ms}ms")
+        print(f"{'target':<20}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+        for name in names:
+            throughput, latencies, failures = run_target(targets[name], args.requests, args.concurrency)
+            print(f"{name:<20}{throughput:>10.1f}{percentile(latencies, 0.5) * 1000:>10.2f}"
+                  f"{percentile(latencies, 0.99) * 1000:>10.2f}{failures:>8}")
+
+
+if __name__ == "__main__":
+    main()
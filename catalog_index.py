@@ -0,0 +1,270 @@
+import bisect
+import heapq
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Set, Iterable, Any
+
+
+# 本地搜索每页条数
+DEFAULT_PAGE_SIZE = 20
+
+# 归一化时去掉空白和标点，保留字母、数字和中日韩统一表意文字
+_STRIP_RE = re.compile(r'[^\w\u4e00-\u9fff]+')
+
+
+def normalize(text: str) -> str:
+    """检索用的归一化：全角转半角、忽略大小写、去掉空白和标点"""
+    if not text:
+        return ""
+    return _STRIP_RE.sub('', unicodedata.normalize('NFKC', text).casefold())
+
+
+def _grams(text: str) -> Set[str]:
+    """单字和相邻两字，中文标题不分词也能按任意子串检索"""
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+@dataclass
+class CatalogEntry:
+    """
+    目录中的一部动漫，字段来自筛选/搜索结果、详情页和搜索建议接口，按 id 合并
+
+    aliases: 别名，如搜索建议接口返回的拼音 (Suggest.en)
+    """
+    id: int
+    name: str = ""
+    image_url: Optional[str] = None
+    status: str = ""
+    tags: List[str] = field(default_factory=list)
+    year: str = ""
+    type: str = ""
+    latest_episode: Optional[int] = None
+    aliases: List[str] = field(default_factory=list)
+
+
+@dataclass
+class CatalogStats:
+    hits: int = 0  # 本地有结果
+    misses: int = 0  # 本地没有结果
+
+
+class CatalogIndex:
+    """
+    进程内动漫目录索引，用于在本地回答搜索和搜索建议
+
+    完全匹配和前缀匹配通过按名称/别名排序的数组二分查找得到；包含匹配使用单字/两字倒排索引，
+    取各片段对应 id 集合的交集再逐个核对子串，只在前缀匹配不足 limit 条时才计算。
+    结果按 完全匹配 > 前缀匹配 > 包含 排序，同级时名称较短的在前。
+
+    用法:
+        catalog = CatalogIndex()
+        crawl_catalog(api, catalog, max_pages=50)
+        api = YhdmApi(catalog=catalog)
+    """
+    def __init__(self):
+        self._entries: Dict[int, CatalogEntry] = {}
+        self._keys: Dict[int, List[str]] = {}  # id -> 归一化后的名称和别名
+        self._grams: Dict[str, Set[int]] = {}
+        self._tags: Dict[str, Set[int]] = {}
+        self._sorted_keys: List[tuple] = []  # (归一化名称, id)，按名称排序，用于前缀查找
+        self._sorted_dirty = False
+        self._lock = threading.RLock()
+        self.stats = CatalogStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, anime_id: int) -> bool:
+        return anime_id in self._entries
+
+    def get(self, anime_id: int) -> Optional[CatalogEntry]:
+        return self._entries.get(anime_id)
+
+    def add(self,
+            anime_id: int,
+            name: str = "",
+            image_url: Optional[str] = None,
+            status: str = "",
+            tags: Optional[Iterable[str]] = None,
+            year: str = "",
+            type: str = "",
+            latest_episode: Optional[int] = None,
+            aliases: Optional[Iterable[str]] = None) -> CatalogEntry:
+        """添加或合并一个条目，空值不会覆盖已有字段"""
+        with self._lock:
+            entry = self._entries.get(anime_id)
+            if entry is None:
+                entry = self._entries[anime_id] = CatalogEntry(id=anime_id)
+            entry.name = name or entry.name
+            entry.image_url = image_url or entry.image_url
+            entry.status = status or entry.status
+            entry.year = year or entry.year
+            entry.type = type or entry.type
+            if latest_episode is not None:
+                entry.latest_episode = latest_episode
+            for alias in aliases or ():
+                if alias and alias not in entry.aliases and alias != entry.name:
+                    entry.aliases.append(alias)
+            if tags:
+                for tag in entry.tags:
+                    self._tags.get(normalize(tag), set()).discard(anime_id)
+                entry.tags = [tag for tag in tags if tag]
+                for tag in entry.tags:
+                    self._tags.setdefault(normalize(tag), set()).add(anime_id)
+            self._reindex(entry)
+            return entry
+
+    def add_shell(self, shell: Any) -> CatalogEntry:
+        """添加筛选/搜索结果中的 AnimeShell"""
+        return self.add(shell.id, name=shell.name, image_url=shell.image_url, status=shell.status)
+
+    def add_anime(self, anime: Any) -> CatalogEntry:
+        """添加 get_anime_detail 返回的 Anime"""
+        return self.add(anime.id, name=anime.name, image_url=anime.image_url, status=anime.status,
+                        tags=anime.tags, year=anime.year, type=anime.type,
+                        latest_episode=anime.latest_episode)
+
+    def add_suggest(self, item: Any) -> CatalogEntry:
+        """添加搜索建议接口返回的一项（Suggest 或原始 dict），en 字段作为别名"""
+        if isinstance(item, dict):
+            return self.add(int(item['id']), name=item.get('name', ''), image_url=item.get('pic'),
+                            aliases=[item.get('en', '')])
+        return self.add(item.id, name=item.name, image_url=item.pic, aliases=[item.en])
+
+    def _reindex(self, entry: CatalogEntry):
+        old_keys = self._keys.get(entry.id, [])
+        keys = []
+        for text in [entry.name] + entry.aliases:
+            key = normalize(text)
+            if key and key not in keys:
+                keys.append(key)
+        if keys == old_keys:
+            return
+        for gram in set().union(*map(_grams, old_keys)) if old_keys else ():
+            ids = self._grams.get(gram)
+            if ids is not None:
+                ids.discard(entry.id)
+        for key in keys:
+            for gram in _grams(key):
+                self._grams.setdefault(gram, set()).add(entry.id)
+        self._keys[entry.id] = keys
+        self._sorted_dirty = True
+
+    def _prefix_ranks(self, query: str) -> Dict[int, int]:
+        """二分查找名称或别名以 query 开头的条目，返回 id -> 0(完全匹配) / 1(前缀匹配)"""
+        if self._sorted_dirty:
+            self._sorted_keys = sorted((key, anime_id) for anime_id, keys in self._keys.items() for key in keys)
+            self._sorted_dirty = False
+        keys = self._sorted_keys
+        ranks = {}
+        i = bisect.bisect_left(keys, (query,))
+        while i < len(keys) and keys[i][0].startswith(query):
+            key, anime_id = keys[i]
+            rank = 0 if key == query else 1
+            if ranks.get(anime_id, 2) > rank:
+                ranks[anime_id] = rank
+            i += 1
+        return ranks
+
+    def _candidates(self, query: str) -> Set[int]:
+        grams = [query] if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        sets = sorted((self._grams.get(gram, set()) for gram in set(grams)), key=len)
+        if not sets or not sets[0]:
+            return set()
+        return set.intersection(*sets)
+
+    def lookup(self, keyword: str, tag: str = "", limit: Optional[int] = None) -> List[CatalogEntry]:
+        """
+        返回名称或别名包含 keyword 的条目（按相关度排序），limit 为 None 时返回全部；
+        tag 非空时只保留带有该类型标签的条目，keyword 为空时返回该标签下的全部条目
+        """
+        query = normalize(keyword)
+        tag_key = normalize(tag)
+        with self._lock:
+            tagged = self._tags.get(tag_key, set()) if tag_key else None
+            if query:
+                ranks = self._prefix_ranks(query)
+                if tagged is not None:
+                    ranks = {anime_id: rank for anime_id, rank in ranks.items() if anime_id in tagged}
+                if limit is None or len(ranks) < limit:
+                    candidates = self._candidates(query)
+                    if tagged is not None:
+                        candidates &= tagged
+                    for anime_id in candidates:
+                        if anime_id in ranks:
+                            continue
+                        for key in self._keys[anime_id]:
+                            if query in key:
+                                ranks[anime_id] = 2
+                                break
+            elif tagged is not None:
+                ranks = dict.fromkeys(tagged, 0)
+            else:
+                ranks = {}
+
+            entries = self._entries
+            order = [(rank, len(entries[anime_id].name), -anime_id) for anime_id, rank in ranks.items()]
+            if limit is None:
+                order.sort()
+            else:
+                order = heapq.nsmallest(limit, order)
+            results = [entries[-item[2]] for item in order]
+
+            if results:
+                self.stats.hits += 1
+            else:
+                self.stats.misses += 1
+            return results
+
+    def search(self, keyword: str, tag: str = "", page: int = 1,
+               page_size: int = DEFAULT_PAGE_SIZE) -> List[CatalogEntry]:
+        """按页返回 lookup 的结果，page 从 1 开始"""
+        start = (max(page, 1) - 1) * page_size
+        return self.lookup(keyword, tag, start + page_size)[start:]
+
+    def suggest(self, keyword: str, limit: int = 10) -> List[str]:
+        """返回最相关的 limit 个名称（去重），与搜索建议接口的结果格式相同"""
+        names = []
+        for entry in self.lookup(keyword, limit=limit * 2):
+            if entry.name not in names:
+                names.append(entry.name)
+                if len(names) == limit:
+                    break
+        return names
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys.clear()
+            self._grams.clear()
+            self._tags.clear()
+            self._sorted_keys = []
+            self._sorted_dirty = False
+
+
+def crawl_catalog(api: Any,
+                  catalog: Optional[CatalogIndex] = None,
+                  types: Iterable[int] = (1,),
+                  max_pages: Optional[int] = None,
+                  details: bool = False,
+                  max_workers: int = 8) -> CatalogIndex:
+    """
+    通过 YhdmApi.iter_filter_anime 遍历各分类的筛选结果建立目录
+
+    details 为 True 时再通过 get_anime_details 获取详情，补充类型标签、年份和最新集数
+    """
+    catalog = catalog if catalog is not None else CatalogIndex()
+    ids = []
+    for type_id in types:
+        for shell in api.iter_filter_anime(type=type_id, max_workers=max_workers, max_pages=max_pages):
+            catalog.add_shell(shell)
+            ids.append(shell.id)
+    if details and ids:
+        for result in api.get_anime_details(ids, concurrency=max_workers):
+            if result.anime is not None:
+                catalog.add_anime(result.anime)
+    return catalog
@@ -1,3 +1,53 @@
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Tuple, Union, Any
+
 YHDM_API_BASE_URL = "https://yhdm6.top"
 YHDM_PLAYER_BASE_URL = "https://danmu3.yhdm6go.top"
-USER_AGENT = "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.122 Mobile Safari/537.36"
\ No newline at end of file
+USER_AGENT = "Mozilla/5.0 (Linux; Android 10; K) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/132.0.6834.122 Mobile Safari/537.36"
+
+DEFAULT_POOL_CONNECTIONS = 4
+DEFAULT_POOL_MAXSIZE = 32
+
+
+@dataclass
+class ClientConfig:
+    """
+    客户端配置，可传给 YhdmApi / AsyncYhdmApi / YhdmParser 以及 get_video_url_common 中的函数，
+    用于指向本地回放服务器或在同一进程中运行多个不同参数的客户端
+
+    api_base_url: 主站地址
+    player_base_url: 播放器（ec.php）站点地址
+    user_agent: 请求使用的 User-Agent
+    headers: 附加到每个请求的请求头
+    timeout: 请求超时(秒)，可为 (连接超时, 读取超时)，None 表示不限制
+    pool_connections: 缓存的连接池数量（按主机区分）
+    pool_maxsize: 每个主机连接池保留的最大连接数
+    keep_alive: 是否复用连接
+    max_retries: 连接错误及 retry_statuses 中状态码的最大重试次数，0 表示不重试
+    retry_backoff: 重试退避系数(秒)，第 n 次重试前等待 retry_backoff * 2 ** (n - 1)
+    retry_statuses: 需要重试的响应状态码
+    scheduler: 共享的 request_scheduler.RequestScheduler，设置后所有请求按主机限速并自适应调整并发，
+               重试改由调度器执行（带随机抖动的指数退避，429/503 也会重试）；None 表示不调度
+    deadline: 设置 scheduler 时每次请求的总时限(秒)，包括排队、重试和退避等待，None 表示不限制；
+              也可以用 request_scheduler.deadline() 为一段代码设置时限
+    play_page_drain_limit: 流式读取播放页找到播放器脚本后如何处理剩余内容：None 表示读完丢弃，连接回到连接池复用；
+                           为整数时响应体超过该字节数或长度未知（chunked）的连接直接关闭，省下剩余内容的传输，
+                           代价是下一个请求需要重新建立连接（HTTPS 下还包括 TLS 握手），0 表示总是关闭
+    """
+    api_base_url: str = YHDM_API_BASE_URL
+    player_base_url: str = YHDM_PLAYER_BASE_URL
+    user_agent: str = USER_AGENT
+    headers: Dict[str, str] = field(default_factory=dict)
+    timeout: Optional[Union[float, Tuple[float, float]]] = None
+    pool_connections: int = DEFAULT_POOL_CONNECTIONS
+    pool_maxsize: int = DEFAULT_POOL_MAXSIZE
+    keep_alive: bool = True
+    max_retries: int = 0
+    retry_backoff: float = 0.0
+    retry_statuses: Tuple[int, ...] = (500, 502, 503, 504)
+    scheduler: Optional[Any] = None
+    deadline: Optional[float] = None
+    play_page_drain_limit: Optional[int] = None
+
+
+DEFAULT_CONFIG = ClientConfig()
@@ -1,186 +1,539 @@
-import requests
 import re
 import json
 import base64
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
-from bs4 import BeautifulSoup
 import urllib.parse
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from config import USER_AGENT, YHDM_API_BASE_URL, YHDM_PLAYER_BASE_URL
+from config import DEFAULT_CONFIG
+from http_session import get_default_session
+from html_backend import make_soup
+from instrumentation import get_logger, start_metrics, hooks_enabled, emit
+from video_url_cache import ttl_from_url, decrypt_cache_key, video_cache_key
 
+logger = get_logger(__name__)
 
-def get_play_page(anime_id, episode, stream_id):
+
+PLAYER_CONFIG_PATH = "/player/ec.php?code=qw&if=1"
+
+# 流式读取播放页时的块大小
+PLAY_PAGE_CHUNK_SIZE = 8192
+
+# 并发解密下一集时使用的共享线程池大小
+DECRYPT_MAX_WORKERS = 8
+_decrypt_executor = None
+_decrypt_executor_lock = threading.Lock()
+
+
+def play_page_path(anime_id, episode, stream_id):
+    return f"/index.php/vod/play/id/{anime_id}/sid/{stream_id}/nid/{episode}/"
+
+
+def get_play_page(anime_id, episode, stream_id, session=None, stream=False, config=None):
     """
     模拟调用 getPlayPage 接口，获取播放页内容
+    session: 可选的 requests.Session，默认使用 config 对应的共享连接池
+    stream: 为 True 时不立即下载响应体，配合 read_play_page 只读取播放器脚本之前的部分
+    config: 可选的 config.ClientConfig，提供站点地址、请求头和超时
     """
-    url = f"{YHDM_API_BASE_URL}/index.php/vod/play/id/{anime_id}/sid/{stream_id}/nid/{episode}/"
+    config = config or DEFAULT_CONFIG
+    session = session or get_default_session(config)
+    url = f"{config.api_base_url}{play_page_path(anime_id, episode, stream_id)}"
     headers = {
-        "User-Agent": USER_AGENT,
-        "Referer": YHDM_API_BASE_URL
+        "User-Agent": config.user_agent,
+        "Referer": config.api_base_url
     }
-    response = requests.get(url, headers=headers)
+    response = session.get(url, headers=headers, stream=stream, timeout=config.timeout)
     return response
 
-def get_player_page(encrypted_url, referrer):
+def get_player_page(encrypted_url, referrer, session=None, config=None):
     """
     模拟调用 getPlayerPage 接口，获取加密配置信息
+    session: 可选的 requests.Session，默认使用 config 对应的共享连接池
+    config: 可选的 config.ClientConfig，提供站点地址、请求头和超时
     """
-    url = f"{YHDM_PLAYER_BASE_URL}/player/ec.php?code=qw&if=1"
+    config = config or DEFAULT_CONFIG
+    session = session or get_default_session(config)
+    url = f"{config.player_base_url}{PLAYER_CONFIG_PATH}"
     headers = {
-        "User-Agent": USER_AGENT,
+        "User-Agent": config.user_agent,
         "Referer": referrer
     }
     params = {"url": encrypted_url}
-    response = requests.get(url, headers=headers, params=params)
+    response = session.get(url, headers=headers, params=params, timeout=config.timeout)
     return response
 
-def parse_encrypted_video_url(html_content):
+# 播放页中匹配 url / url_next 的正则
+_ENCRYPTED_URLS_RE = re.compile(r'url"\s*:\s*"([^"]*)".*?"url_next"\s*:\s*"([^"]*)"', re.DOTALL)
+# 快速路径：定位 class 含 player_video 的元素，以及其后的第一个 script
+_PLAYER_VIDEO_RE = re.compile(r'class\s*=\s*["\'](?:[^"\']*\s)?player_video(?:\s[^"\']*)?["\']')
+_SCRIPT_RE = re.compile(r'<script\b[^>]*>(.*?)</script\s*>', re.DOTALL | re.IGNORECASE)
+
+_PLAYER_VIDEO_BYTES_RE = re.compile(_PLAYER_VIDEO_RE.pattern.encode("ascii"))
+
+PARSE_PATH_FAST = "fast"
+PARSE_PATH_FULL = "full"
+
+
+def _decode_encrypted_urls(url_encoded, next_url_encoded):
     """
-    从HTML中解析出加密的视频URL和下一集URL
-    
-    直接翻译自原始Kotlin代码：
-    fun parseEncryptedVideoUrl(document: Document): Pair<String, String?>? =
-        document.selectFirst(".player_video script")!!.html()
-            .let { code ->
-                Regex(\"\"\"url"\\s*:\\s*"([^"]*)".*"url_next"\\s*:\\s*"([^"]*)"\"\"\")
-                    .find(code)?.groupValues
-                    ?.map { URLDecoder.decode(it, "UTF-8") }
-                    ?.let { urls ->
-                        if (urls[1].isEmpty()) null
-                        else urls[1] to (urls[2].takeIf { it.isNotEmpty() })
-                    }
-            }
-    
-    Returns:
-        成功时返回(url, next_url)元组，其中next_url可能为None
-        失败时返回None
+    URL解码，url为空时返回None，next_url为空时设为None
+    """
+    url = urllib.parse.unquote(url_encoded)
+    next_url = urllib.parse.unquote(next_url_encoded)
+    if url == "":
+        return None
+    return (url, next_url or None)
+
+def _parse_encrypted_video_url_fast(html_content):
+    """
+    不构建DOM，直接在原始HTML中定位播放器脚本并匹配，失败时返回None
+    """
+    marker = _PLAYER_VIDEO_RE.search(html_content)
+    if not marker:
+        return None
+    script = _SCRIPT_RE.search(html_content, marker.end())
+    if not script:
+        return None
+    match = _ENCRYPTED_URLS_RE.search(script.group(1))
+    if not match:
+        return None
+    return _decode_encrypted_urls(match.group(1), match.group(2))
+
+def _parse_encrypted_video_url_full(html_content, backend=None):
+    """
+    使用完整的DOM解析定位 .player_video script
     """
     try:
-        # 使用BeautifulSoup解析HTML
-        soup = BeautifulSoup(html_content, 'html.parser')
+        # 使用BeautifulSoup解析HTML（后端见 html_backend）
+        soup = make_soup(html_content, backend)
         
         # 查找.player_video下的script标签
         script_tag = soup.select_one(".player_video script")
         if script_tag is None:
-            print("无法找到.player_video script标签")
+            logger.warning("无法找到.player_video script标签")
             return None
         
         # 获取script标签的内容
         code = script_tag.string
         if not code:
-            print("script标签内容为空")
+            logger.warning("script标签内容为空")
             return None
         
         # 使用正则表达式查找url和url_next
-        match = re.search(r'url"\s*:\s*"([^"]*)".*?"url_next"\s*:\s*"([^"]*)"', code, re.DOTALL)
+        match = _ENCRYPTED_URLS_RE.search(code)
         if not match:
-            print("无法匹配url和url_next")
+            logger.warning("无法匹配url和url_next")
             return None
         
-        # 获取匹配组
-        url_encoded = match.group(1)
-        next_url_encoded = match.group(2)
-        
-        # URL解码
-        url = urllib.parse.unquote(url_encoded)
-        next_url = urllib.parse.unquote(next_url_encoded)
-        
-        # 检查url是否为空
-        if url == "":
-            print("解析到的url为空")
-            return None
-        
-        # 如果next_url为空，则设为None
-        if next_url == "":
-            next_url = None
-        
-        return (url, next_url)
+        result = _decode_encrypted_urls(match.group(1), match.group(2))
+        if result is None:
+            logger.warning("解析到的url为空")
+        return result
     except Exception as e:
-        print(f"解析加密视频URL时出错: {e}")
+        logger.warning("解析加密视频URL时出错: %s", e)
         return None
 
-def decrypt_url(encrypted_url):
+def extract_encrypted_video_url(html_content, backend=None):
     """
-    解密视频 URL
+    解析加密的视频URL和下一集URL，并返回所使用的解析路径
+
+    先尝试不构建DOM的快速路径，失败时回退到完整解析
+    Returns:
+        (result, path) 元组，result 同 parse_encrypted_video_url 的返回值，
+        path 为 PARSE_PATH_FAST 或 PARSE_PATH_FULL
+    """
+    result = _parse_encrypted_video_url_fast(html_content)
+    if result is not None:
+        return result, PARSE_PATH_FAST
+    return _parse_encrypted_video_url_full(html_content, backend), PARSE_PATH_FULL
+
+def parse_encrypted_video_url(html_content, backend=None):
+    """
+    从HTML中解析出加密的视频URL和下一集URL
+    
+    直接翻译自原始Kotlin代码：
+    fun parseEncryptedVideoUrl(document: Document): Pair<String, String?>? =
+        document.selectFirst(".player_video script")!!.html()
+            .let { code ->
+                Regex(\"\"\"url"\\s*:\\s*"([^"]*)".*"url_next"\\s*:\\s*"([^"]*)"\"\"\")
+                    .find(code)?.groupValues
+                    ?.map { URLDecoder.decode(it, "UTF-8") }
+                    ?.let { urls ->
+                        if (urls[1].isEmpty()) null
+                        else urls[1] to (urls[2].takeIf { it.isNotEmpty() })
+                    }
+            }
+    
+    Returns:
+        成功时返回(url, next_url)元组，其中next_url可能为None
+        失败时返回None
     """
+    return extract_encrypted_video_url(html_content, backend)[0]
+
+class PlayerScriptScanner:
+    """
+    增量扫描播放页内容，判断是否已经收到完整的 .player_video 脚本
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+        self._marker_end = None
+        self._scanned = 0
+
+    def feed(self, chunk):
+        """
+        追加一块内容，播放器脚本已完整时返回 True
+        """
+        self.buffer += chunk
+        if self._marker_end is None:
+            # 从上次扫描位置稍往前开始，避免标记被切分在两个块之间
+            marker = _PLAYER_VIDEO_BYTES_RE.search(self.buffer, max(0, self._scanned - 256))
+            self._scanned = len(self.buffer)
+            if marker is None:
+                return False
+            self._marker_end = marker.end()
+        return self.buffer.find(b"</script", self._marker_end) != -1
+
+    def text(self, encoding=None):
+        return bytes(self.buffer).decode(encoding or "utf-8", errors="replace")
+
+def read_play_page(response, partial=True, chunk_size=PLAY_PAGE_CHUNK_SIZE, drain_limit=None):
+    """
+    读取播放页响应内容
+
+    partial 为 True 时（响应需以 stream=True 请求）逐块读取，收到完整的 .player_video 脚本后立即停止解码和扫描，
+    返回已读取的部分内容。剩余部分默认仍会读完并丢弃，使连接回到连接池复用；
+    指定 drain_limit 时，响应体超过 drain_limit 字节或长度未知（chunked）的连接改为直接关闭，
+    省下剩余内容的传输，代价是下一个请求需要重新建立连接（HTTPS 下还包括 TLS 握手）。
+    get_video_url 等函数使用 ClientConfig.play_page_drain_limit。
+    找不到播放器脚本时会读完整个响应。
+    """
+    if not partial:
+        return response.text
+    scanner = PlayerScriptScanner()
     try:
-        # 构造请求的 Referer
-        referrer = f"{YHDM_PLAYER_BASE_URL}/player/index.php?code=qw&if=1&url={encrypted_url}"
-        response = get_player_page(encrypted_url, referrer)
-        html_text = response.text
+        for chunk in response.iter_content(chunk_size):
+            if scanner.feed(chunk):
+                content_length = response.headers.get("Content-Length", "")
+                if drain_limit is None or (content_length.isdigit() and int(content_length) <= drain_limit):
+                    response.raw.drain_conn()
+                break
+    finally:
+        response.close()
+    return scanner.text(response.encoding)
 
-        # 提取加密配置信息中的 url 字段
-        match_url = re.search(r'"url"\s*:\s*("([^"]*)")', html_text)
-        if not match_url:
-            return None
-        # 利用 json.loads 将双引号包裹的字符串解析为普通字符串
-        config_url = json.loads(match_url.group(1))
+def build_player_referrer(encrypted_url, config=None):
+    """
+    构造请求 ec.php 时使用的 Referer
+    """
+    config = config or DEFAULT_CONFIG
+    return f"{config.player_base_url}/player/index.php?code=qw&if=1&url={encrypted_url}"
 
-        # 提取 uid 字段
-        match_uid = re.search(r'"uid"\s*:\s*("([^"]*)")', html_text)
-        if not match_uid:
-            return None
-        config_uid = json.loads(match_uid.group(1))
+class YhdmDecrypter:
+    """
+    ec.php 加密配置解密器
+
+    正则预编译、一次扫描同时提取 url 和 uid；实例不保存状态，可在多个线程间共享
+    """
+    # 同时匹配 "url" 和 "uid" 字段，值为双引号包裹的字符串
+    _FIELD_RE = re.compile(r'"(url|uid)"\s*:\s*("[^"]*")')
+    IV = "2F131BE91247866E".encode("utf-8")
 
-        # 根据原始逻辑构造 key 和 iv
-        key_str = f"2890{config_uid}tB959C"
-        key = key_str.encode("utf-8")
-        iv = "2F131BE91247866E".encode("utf-8")
+    @classmethod
+    def extract_config(cls, html_text):
+        """
+        一次扫描提取 (url, uid)，任一字段缺失时返回 None
+        """
+        fields = {}
+        for match in cls._FIELD_RE.finditer(html_text):
+            name = match.group(1)
+            if name not in fields:
+                value = match.group(2)
+                # 不含转义字符时直接去掉引号，否则利用 json.loads 解析
+                fields[name] = value[1:-1] if "\\" not in value else json.loads(value)
+                if len(fields) == 2:
+                    return fields["url"], fields["uid"]
+        return None
 
-        # 使用 AES/CBC/PKCS5Padding 解密
-        cipher = AES.new(key, AES.MODE_CBC, iv)
+    def _decrypt(self, config_url, config_uid):
+        # 根据原始逻辑构造 key，使用 AES/CBC/PKCS5Padding 解密；CBC 对象有状态，每次解密新建
         encrypted_data = base64.b64decode(config_url)
-        decrypted_data = unpad(cipher.decrypt(encrypted_data), AES.block_size)
-        return decrypted_data.decode("utf-8")
+        cipher = AES.new(f"2890{config_uid}tB959C".encode("utf-8"), AES.MODE_CBC, self.IV)
+        return unpad(cipher.decrypt(encrypted_data), AES.block_size).decode("utf-8")
+
+    def decrypt(self, html_text):
+        """
+        从 ec.php 返回内容中提取加密配置并解密出视频 URL，失败时返回 None
+        """
+        try:
+            config = self.extract_config(html_text)
+            if config is None:
+                return None
+            return self._decrypt(*config)
+        except Exception as e:
+            logger.warning("解密失败: %s", e)
+            return None
+
+    def decrypt_many(self, payloads):
+        """
+        批量解密多个 ec.php 返回内容，返回与输入顺序一致的结果列表，失败项为 None
+        """
+        return [self.decrypt(html_text) for html_text in payloads]
+
+
+_default_decrypter = YhdmDecrypter()
+
+
+def decrypt_player_config(html_text):
+    """
+    从 ec.php 返回内容中提取加密配置并解密出视频 URL
+    """
+    return _default_decrypter.decrypt(html_text)
+
+def decrypt_url(encrypted_url, session=None, cache=None, config=None):
+    """
+    解密视频 URL
+    cache: 可选的 video_url_cache.VideoUrlCache，命中时不发起任何网络请求
+    config: 可选的 config.ClientConfig
+    """
+    metrics = start_metrics("decrypt_url")
+    result = None
+    try:
+        result = _decrypt_url(encrypted_url, session, cache, config, metrics)
+        return result
+    finally:
+        if hooks_enabled():
+            metrics.ok = result is not None
+            emit(metrics)
+
+def _decrypt_url(encrypted_url, session, cache, config, metrics):
+    if cache is not None:
+        cached = cache.get(decrypt_cache_key(encrypted_url))
+        metrics.cache = "miss" if cached is None else "hit"
+        if cached is not None:
+            return cached
+    try:
+        # 构造请求的 Referer
+        referrer = build_player_referrer(encrypted_url, config)
+        with metrics.measure("fetch"):
+            response = get_player_page(encrypted_url, referrer, session=session, config=config)
+            html_text = response.text
+        metrics.bytes = len(response.content)
+        with metrics.measure("decrypt"):
+            decrypted = decrypt_player_config(html_text)
     except Exception as e:
-        print(f"解密失败: {e}")
+        logger.warning("解密失败: %s", e)
         return None
+    if cache is not None and decrypted:
+        cache.set(decrypt_cache_key(encrypted_url), decrypted, ttl_from_url(decrypted, cache.default_ttl))
+    return decrypted
 
-def get_video_url(anime_id = 24103, episode = 1, stream_id = 3):
+def _get_decrypt_executor():
+    """
+    获取用于并发解密的共享线程池
+    """
+    global _decrypt_executor
+    if _decrypt_executor is None:
+        with _decrypt_executor_lock:
+            if _decrypt_executor is None:
+                _decrypt_executor = ThreadPoolExecutor(max_workers=DECRYPT_MAX_WORKERS,
+                                                       thread_name_prefix="yhdm-decrypt")
+    return _decrypt_executor
+
+def get_video_url(anime_id = 24103, episode = 1, stream_id = 3, session = None,
+                  resolve_next = True, concurrent = False, cache = None, partial = True, config = None):
     """
     根据动漫对象和集数等信息获取视频 URL
     参数:
         anime_id: 动画id
         episode: 集数（nid）
         stream_id: 播放流标识（sid）
+        session: 可选的 requests.Session，整季解析时传入同一个 session 可复用连接
+        resolve_next: 是否同时解密下一集 URL，为 False 时不请求下一集的 ec.php
+        concurrent: 是否在共享线程池中并发解密当前集和下一集
+        cache: 可选的 video_url_cache.VideoUrlCache，同时缓存整体结果和单个加密地址的解密结果
+        partial: 是否流式读取播放页，收到播放器脚本后即停止解析；剩余内容是否下载由 config.play_page_drain_limit 决定
+        config: 可选的 config.ClientConfig，提供站点地址、请求头和超时
     返回:
         成功时返回 (decrypted_url, decrypted_next_url) 元组，
         若解密失败则返回 None
     """
-    response = get_play_page(anime_id, episode, stream_id)
-    if response.status_code != 200:
-        print(f"获取播放页失败，状态码: {response.status_code}")
-        return None
+    metrics = start_metrics("get_video_url")
+    result = None
+    try:
+        result = _get_video_url(anime_id, episode, stream_id, session, resolve_next, concurrent, cache, partial, config,
+                                metrics)
+        return result
+    finally:
+        if hooks_enabled():
+            metrics.ok = result is not None
+            emit(metrics)
+
+def _get_video_url(anime_id, episode, stream_id, session, resolve_next, concurrent, cache, partial, config, metrics):
+    if cache is not None:
+        cached = cache.get(video_cache_key(anime_id, episode, stream_id, resolve_next))
+        metrics.cache = "miss" if cached is None else "hit"
+        if cached is not None:
+            return cached
+
+    with metrics.measure("fetch"):
+        response = get_play_page(anime_id, episode, stream_id, session=session, stream=partial, config=config)
+        if response.status_code != 200:
+            logger.warning("获取播放页失败，状态码: %s", response.status_code)
+            response.close()
+            return None
+        html_content = read_play_page(response, partial,
+                                      drain_limit=(config or DEFAULT_CONFIG).play_page_drain_limit)
+    metrics.bytes = len(html_content)
 
     # 解析播放页获取加密 URL（返回一个元组: (url, next_url)）
-    encrypted_urls = parse_encrypted_video_url(response.text)
+    with metrics.measure("parse"):
+        encrypted_urls, metrics.extra["parse_path"] = extract_encrypted_video_url(html_content)
     if not encrypted_urls:
-        print("解析加密URL失败")
+        logger.warning("解析加密URL失败")
         return None
     
     url, next_url = encrypted_urls
-    print(f"获取到加密URL: {url}")
-    if next_url:
-        print(f"获取到下一集加密URL: {next_url}")
-    else:
-        print("没有下一集URL")
+    logger.debug("获取到加密URL: %s, 下一集加密URL: %s", url, next_url)
+    if not resolve_next:
+        next_url = None
+
+    # 并发模式下下一集在线程池中解密，当前集在调用线程中解密
+    # 在调用方的 contextvars 上下文中执行，request_scheduler.deadline() 设置的时限对其同样有效
+    next_future = None
+    if next_url and concurrent:
+        next_future = _get_decrypt_executor().submit(contextvars.copy_context().run,
+                                                     decrypt_url, next_url, session, cache, config)
 
-    decrypted_url = decrypt_url(url)
+    with metrics.measure("decrypt"):
+        decrypted_url = decrypt_url(url, session=session, cache=cache, config=config)
     if not decrypted_url:
-        print("解密当前URL失败")
+        logger.warning("解密当前URL失败")
+        if next_future:
+            next_future.cancel()
         return None
     
     decrypted_next_url = None
     if next_url:
-        decrypted_next_url = decrypt_url(next_url)
-        if "http" not in decrypted_next_url:
+        with metrics.measure("decrypt"):
+            if next_future:
+                decrypted_next_url = next_future.result()
+            else:
+                decrypted_next_url = decrypt_url(next_url, session=session, cache=cache, config=config)
+        if decrypted_next_url and "http" not in decrypted_next_url:
             decrypted_next_url = None
         if not decrypted_next_url:
-            print("=========>>>>没有下一集")
+            logger.debug("没有下一集")
+
+    if cache is not None:
+        ttl = ttl_from_url(decrypted_url, cache.default_ttl)
+        if decrypted_next_url:
+            ttl = min(ttl, ttl_from_url(decrypted_next_url, cache.default_ttl))
+        cache.set(video_cache_key(anime_id, episode, stream_id, resolve_next), (decrypted_url, decrypted_next_url), ttl)
     
     return decrypted_url, decrypted_next_url
 
+def fetch_encrypted_urls(anime_id, episode, stream_id, session=None, partial=True, config=None):
+    """
+    获取并解析播放页，返回 (url, next_url) 加密地址元组，失败时返回 None
+    """
+    try:
+        response = get_play_page(anime_id, episode, stream_id, session=session, stream=partial, config=config)
+        if response.status_code != 200:
+            logger.warning("获取播放页失败，状态码: %s", response.status_code)
+            response.close()
+            return None
+        html_content = read_play_page(response, partial,
+                                      drain_limit=(config or DEFAULT_CONFIG).play_page_drain_limit)
+    except Exception as e:
+        logger.warning("获取播放页失败: %s", e)
+        return None
+    return parse_encrypted_video_url(html_content)
+
+def resolve_episodes(anime_id, stream_id, episode_ids, session=None, max_workers=8, cache=None, config=None):
+    """
+    批量解析同一播放线路下多集的视频 URL
+
+    每个播放页都会同时给出当前集和下一集的加密地址，因此只需请求隔集的播放页，
+    下一集的加密地址直接从 url_next 获得；若 url_next 缺失则单独补请求该集播放页。
+    相同的加密地址只解密一次。
+    参数:
+        anime_id: 动画id
+        stream_id: 播放流标识（sid）
+        episode_ids: 需要解析的集数（nid）列表，按连续集数排列
+        session: 可选的 requests.Session，默认使用共享连接池
+        max_workers: 最大并发请求数
+        cache: 可选的 video_url_cache.VideoUrlCache，已缓存的加密地址不会再请求 ec.php
+        config: 可选的 config.ClientConfig
+    返回:
+        生成器，按完成顺序产出 (episode_id, decrypted_url)，解析失败的集 decrypted_url 为 None
+    """
+    episode_ids = sorted(set(episode_ids))
+    # 每一集的下一集（仅限本次请求的集数）
+    next_of = {ep: episode_ids[i + 1] for i, ep in enumerate(episode_ids[:-1])}
+    known = set()  # 已经确定加密地址（或已发起播放页请求）的集数
+    waiting = {}  # 加密地址 -> 等待该地址解密结果的集数列表
+    resolved = {}  # 加密地址 -> 已完成的解密结果，之后才得知同一地址的集数直接使用
+    ready = []  # 已有解密结果、尚未产出的 (集数, 地址)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yhdm-resolve") as executor:
+        pending = {}  # future -> (任务类型, 集数 或 加密地址)
+
+        def submit_play_page(ep):
+            known.add(ep)
+            future = executor.submit(contextvars.copy_context().run,
+                                     fetch_encrypted_urls, anime_id, ep, stream_id, session, True, config)
+            pending[future] = ("play", ep)
+
+        def learn(ep, encrypted_url):
+            # 记录某集的加密地址，同一地址只提交一次解密
+            known.add(ep)
+            if encrypted_url in resolved:
+                ready.append((ep, resolved[encrypted_url]))
+                return
+            if encrypted_url in waiting:
+                waiting[encrypted_url].append(ep)
+                return
+            waiting[encrypted_url] = [ep]
+            future = executor.submit(contextvars.copy_context().run,
+                                     decrypt_url, encrypted_url, session, cache, config)
+            pending[future] = ("decrypt", encrypted_url)
+
+        for ep in episode_ids[::2]:
+            submit_play_page(ep)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                kind, key = pending.pop(future)
+                if kind == "decrypt":
+                    decrypted = resolved[key] = future.result()
+                    for ep in waiting.pop(key):
+                        yield ep, decrypted
+                    continue
+
+                ep = key
+                next_ep = next_of.get(ep)
+                encrypted_urls = future.result()
+                if not encrypted_urls:
+                    yield ep, None
+                    if next_ep is not None and next_ep not in known:
+                        submit_play_page(next_ep)
+                    continue
+
+                url, next_url = encrypted_urls
+                learn(ep, url)
+                if next_ep is not None and next_ep not in known:
+                    if next_url and next_ep == ep + 1:
+                        learn(next_ep, next_url)
+                    else:
+                        submit_play_page(next_ep)
+                yield from ready
+                ready.clear()
+
 
 if __name__ == "__main__":
     
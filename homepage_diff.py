@@ -0,0 +1,145 @@
+import hashlib
+import json
+import threading
+from typing import Optional, Dict, Any, List
+
+
+def content_hash(data: Dict[str, Any]) -> str:
+    """首页数据的内容哈希，与字典键顺序和 JSON 缩进无关"""
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _item_key(item: Dict[str, Any]):
+    # 没有 id 的条目以标题区分
+    return item.get("id") or item.get("title")
+
+
+def _index_items(items: List[Dict[str, Any]]) -> Dict[Any, Dict[str, Any]]:
+    """按 id 建立索引，同一列表中重复出现的 id 以 (id, 序号) 区分"""
+    index = {}
+    for item in items:
+        key = _item_key(item)
+        n = 1
+        unique = key
+        while unique in index:
+            n += 1
+            unique = (key, n)
+        index[unique] = item
+    return index
+
+
+def diff_items(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    按 id 比较两个条目列表，只返回有变化的部分
+
+    added: 新增的条目
+    removed: 被移除条目的 id
+    changed: [{"id", "fields": {字段: [旧值, 新值]}}]，如 status、update_info 变化
+    moved: [{"id", "from", "to"}]，排行榜中的排名变化
+    """
+    old_index = _index_items(old)
+    new_index = _index_items(new)
+    delta = {}
+
+    added = [item for key, item in new_index.items() if key not in old_index]
+    removed = [_item_key(item) for key, item in old_index.items() if key not in new_index]
+    changed = []
+    moved = []
+    for key, item in new_index.items():
+        before = old_index.get(key)
+        if before is None or before == item:
+            continue
+        fields = {name: [before.get(name), value] for name, value in item.items()
+                  if name != "rank" and before.get(name) != value}
+        fields.update({name: [value, None] for name, value in before.items()
+                       if name != "rank" and name not in item})
+        if fields:
+            changed.append({"id": _item_key(item), "fields": fields})
+        if before.get("rank") != item.get("rank"):
+            moved.append({"id": _item_key(item), "from": before.get("rank"), "to": item.get("rank")})
+
+    if added:
+        delta["added"] = added
+    if removed:
+        delta["removed"] = removed
+    if changed:
+        delta["changed"] = changed
+    if moved:
+        delta["moved"] = moved
+    return delta
+
+
+def _section_lists(data: Dict[str, Any]) -> Dict[str, Dict[str, List[Dict[str, Any]]]]:
+    """
+    把首页数据整理成 {区块类型: {区块名: 条目列表}}
+
+    weekly_schedule 以 day（这一天在番剧表中的序号，字符串）作为区块名，没有动漫的天不在列表中，
+    但不影响其他天的序号；缺少 day 的旧数据按列表位置（从 1 开始）编号
+    """
+    return {
+        "weekly_schedule": {str(entry.get("day", position)): entry.get("anime_list", [])
+                            for position, entry in enumerate(data.get("weekly_schedule", []), 1)},
+        "categories": {entry["name"]: entry.get("anime_list", []) for entry in data.get("categories", [])},
+        "recent_updates": {"": data.get("recent_updates", [])},
+        "rankings": {entry["name"]: entry.get("items", []) for entry in data.get("rankings", [])},
+    }
+
+
+def diff_homepage(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    计算两次首页解析结果的结构化差异
+
+    返回 {区块类型: {区块名: diff_items 的结果}}，只包含有变化的区块；
+    recent_updates 没有区块名，直接为 diff_items 的结果。old 为 None 时所有条目均视为新增
+    """
+    old_sections = _section_lists(old or {})
+    new_sections = _section_lists(new)
+    changes = {}
+    for kind, new_lists in new_sections.items():
+        old_lists = old_sections[kind]
+        kind_changes = {}
+        for name in list(new_lists) + [name for name in old_lists if name not in new_lists]:
+            delta = diff_items(old_lists.get(name, []), new_lists.get(name, []))
+            if delta:
+                kind_changes[name] = delta
+        if kind_changes:
+            changes[kind] = kind_changes[""] if kind == "recent_updates" else kind_changes
+    return changes
+
+
+class HomepageDiffer:
+    """
+    保存上一次的首页解析结果，每次只返回与上一次相比的变化
+
+    用法:
+        differ = HomepageDiffer()
+        delta = differ.update(parser.generate_data())
+        if delta["changes"]:
+            publish(delta)
+    """
+    def __init__(self):
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.hash: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def update(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        用新的解析结果替换快照，返回
+            {"hash": 新内容哈希, "previous_hash": 上一次的哈希(首次为None), "changes": diff_homepage 的结果}
+        内容哈希未变化时不做结构比较，changes 为空字典
+        """
+        new_hash = content_hash(data)
+        with self._lock:
+            old, old_hash = self.snapshot, self.hash
+            self.snapshot, self.hash = data, new_hash
+        if new_hash == old_hash:
+            changes = {}
+        else:
+            changes = diff_homepage(old, data)
+        return {"hash": new_hash, "previous_hash": old_hash, "changes": changes}
+
+    def reset(self):
+        with self._lock:
+            self.snapshot = None
+            self.hash = None
@@ -0,0 +1,53 @@
+from bs4 import BeautifulSoup, FeatureNotFound
+
+
+# 按速度从快到慢排列，lxml 为可选依赖
+PARSER_BACKENDS = ("lxml", "html.parser")
+
+_backend = None
+
+
+def available_backends():
+    """
+    返回当前环境可用的解析后端
+    """
+    available = []
+    for name in PARSER_BACKENDS:
+        try:
+            BeautifulSoup("", name)
+        except FeatureNotFound:
+            continue
+        available.append(name)
+    return available
+
+
+def set_parser_backend(name=None):
+    """
+    设置全局 HTML 解析后端
+
+    参数:
+        name: "lxml" / "html.parser"，为 None 时自动选择可用的最快后端
+    """
+    global _backend
+    if name is None:
+        name = available_backends()[0]
+    elif name not in available_backends():
+        raise ValueError(f"解析后端不可用: {name}，可选: {available_backends()}")
+    _backend = name
+    return name
+
+
+def get_parser_backend():
+    """
+    返回当前使用的解析后端
+    """
+    if _backend is None:
+        return set_parser_backend()
+    return _backend
+
+
+def make_soup(markup, backend=None):
+    """
+    使用指定（默认为全局设置的）后端解析 HTML
+    """
+    return BeautifulSoup(markup, backend or get_parser_backend())
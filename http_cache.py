@@ -0,0 +1,179 @@
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Dict, Any
+from urllib.parse import urlparse
+
+from requests.models import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from request_scheduler import SchedulingHTTPAdapter
+
+
+@dataclass
+class CachePolicy:
+    """
+    单个接口的缓存策略
+
+    ttl: 源站返回 ETag/Last-Modified 时，在此时长(秒)内直接使用缓存，过期后发送条件请求重新验证
+    fallback_ttl: 源站没有返回任何校验字段时的缓存时长(秒)，过期后重新完整请求
+    """
+    ttl: float = 60
+    fallback_ttl: float = 300
+
+
+# 按请求路径匹配的默认策略表（正则 -> 策略），详情页只在新剧集更新时变化，缓存时间最长
+DEFAULT_POLICIES: Dict[str, CachePolicy] = {
+    r"^/?$": CachePolicy(ttl=30, fallback_ttl=60),  # 首页
+    r"^/index\.php/vod/detail/": CachePolicy(ttl=300, fallback_ttl=600),
+    r"^/index\.php/vod/show/": CachePolicy(ttl=60, fallback_ttl=300),
+    r"^/index\.php/vod/search/": CachePolicy(ttl=60, fallback_ttl=300),
+}
+
+
+@dataclass
+class HttpCacheStats:
+    hits: int = 0  # 未过期，直接返回缓存
+    revalidated: int = 0  # 条件请求返回304
+    misses: int = 0  # 完整下载
+    evictions: int = 0
+
+
+@dataclass
+class _CacheEntry:
+    status_code: int
+    reason: str
+    headers: Dict[str, str]
+    content: bytes
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+    parsed: Dict[str, Any] = field(default_factory=dict)  # 解析结果，内容未变化时无需重新解析
+
+
+class HttpCache:
+    """
+    HTTP 响应缓存，配合 CachingHTTPAdapter 挂载到 requests.Session 上使用
+
+    policies 为 {路径正则: CachePolicy}，未匹配任何策略的请求不会被缓存
+    """
+    def __init__(self, policies: Optional[Dict[str, CachePolicy]] = None, max_entries: int = 2000):
+        self.policies = [(re.compile(pattern), policy)
+                         for pattern, policy in (DEFAULT_POLICIES if policies is None else policies).items()]
+        self.max_entries = max_entries
+        self.stats = HttpCacheStats()
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def policy_for(self, url: str) -> Optional[CachePolicy]:
+        path = urlparse(url).path
+        for pattern, policy in self.policies:
+            if pattern.search(path):
+                return policy
+        return None
+
+    def get(self, key: str) -> Optional[_CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: _CacheEntry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def record(self, field: str):
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + 1)
+
+
+class CachingHTTPAdapter(SchedulingHTTPAdapter):
+    """
+    带缓存的 HTTPAdapter，对匹配缓存策略的 GET 请求使用 If-None-Match / If-Modified-Since 条件请求；
+    缓存命中不经过请求调度器
+    """
+    def __init__(self, cache: HttpCache, **kwargs):
+        self.cache = cache
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        policy = self.cache.policy_for(request.url) if request.method == "GET" else None
+        if policy is None:
+            return super().send(request, **kwargs)
+
+        key = request.url
+        entry = self.cache.get(key)
+        now = time.time()
+        if entry is not None and now < entry.expires_at:
+            self.cache.record("hits")
+            return self._build_response(request, entry)
+
+        if entry is not None:
+            if entry.etag:
+                request.headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                request.headers["If-Modified-Since"] = entry.last_modified
+
+        response = super().send(request, **kwargs)
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            entry.expires_at = now + policy.ttl
+            self.cache.record("revalidated")
+            return self._build_response(request, entry)
+
+        self.cache.record("misses")
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            ttl = policy.ttl if (etag or last_modified) else policy.fallback_ttl
+            entry = _CacheEntry(
+                status_code=response.status_code,
+                reason=response.reason,
+                headers=dict(response.headers),
+                content=response.content,
+                etag=etag,
+                last_modified=last_modified,
+                expires_at=now + ttl,
+            )
+            self.cache.put(key, entry)
+            response.cache_entry = entry
+        return response
+
+    @staticmethod
+    def _build_response(request, entry: _CacheEntry) -> Response:
+        response = Response()
+        response.status_code = entry.status_code
+        response.reason = entry.reason
+        response.headers = CaseInsensitiveDict(entry.headers)
+        response._content = entry.content
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response.from_cache = True
+        response.cache_entry = entry
+        return response
+
+
+def parse_with_cache(response, name: str, parser, *args):
+    """
+    解析响应内容；响应来自 HttpCache 时，同一份内容只解析一次，之后返回解析结果的副本
+    """
+    entry = getattr(response, "cache_entry", None)
+    if entry is None:
+        return parser(*args)
+    if name not in entry.parsed:
+        entry.parsed[name] = parser(*args)
+    return copy.deepcopy(entry.parsed[name])
@@ -0,0 +1,104 @@
+import threading
+from collections import OrderedDict
+from dataclasses import fields, replace
+
+import requests
+from urllib3.util.retry import Retry
+
+from config import DEFAULT_CONFIG, DEFAULT_POOL_CONNECTIONS, DEFAULT_POOL_MAXSIZE  # noqa: F401
+from request_scheduler import SchedulingHTTPAdapter
+
+
+def build_retry(config):
+    """
+    根据配置构造 urllib3 的重试策略，只对 GET 请求重试；
+    配置了 scheduler 时重试由 SchedulingHTTPAdapter 执行，这里不再重试
+    """
+    if config.scheduler is not None:
+        return Retry(total=0, read=False, raise_on_status=False)
+    return Retry(
+        total=config.max_retries,
+        backoff_factor=config.retry_backoff,
+        status_forcelist=config.retry_statuses,
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+
+
+def create_adapter(config=None, adapter_class=SchedulingHTTPAdapter, **kwargs):
+    """
+    按配置的连接池大小、重试策略和请求调度器创建 HTTPAdapter，adapter_class 应为 SchedulingHTTPAdapter 的子类
+    """
+    config = config or DEFAULT_CONFIG
+    return adapter_class(pool_connections=config.pool_connections,
+                         pool_maxsize=config.pool_maxsize,
+                         max_retries=build_retry(config),
+                         scheduler=config.scheduler,
+                         config=config,
+                         **kwargs)
+
+
+def create_session(config=None):
+    """
+    按 ClientConfig 创建带连接池的 requests.Session
+
+    连接池大小、keep-alive、重试策略和请求头均来自配置；
+    pool_connections 按主机区分（播放页和 ec.php 分属两个主机），
+    pool_maxsize 在多线程并发时应不小于线程数
+    """
+    config = config or DEFAULT_CONFIG
+    session = requests.Session()
+    adapter = create_adapter(config)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update({
+        "User-Agent": config.user_agent,
+        "Connection": "keep-alive" if config.keep_alive else "close"
+    })
+    session.headers.update(config.headers)
+    return session
+
+
+# 按配置的值缓存的默认 Session 数量上限，超出时关闭并丢弃最久未使用的；
+# 关闭只释放空闲连接，进行中的请求不受影响，仍持有它的调用之后会按需重新建立连接
+DEFAULT_SESSION_CACHE_SIZE = 16
+
+_default_sessions = OrderedDict()  # _config_key(config) -> session
+_default_session_lock = threading.Lock()
+
+
+def _freeze(value):
+    # dict / list 等不可哈希的字段值转换为等价的元组
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(item) for item in value)
+    return value
+
+
+def _config_key(config):
+    """ClientConfig 不可哈希（headers 为 dict，retry_statuses 可以是 list），按字段的值生成缓存键"""
+    return tuple(_freeze(getattr(config, f.name)) for f in fields(config))
+
+
+def get_default_session(config=None):
+    """
+    获取进程内共享的默认 Session，未传入 session 的调用都会复用它
+
+    按 ClientConfig 的值（而不是对象）区分：每次调用新建的相同配置共用同一个 Session，
+    不同的值各自对应一个 Session，最多缓存 DEFAULT_SESSION_CACHE_SIZE 个，超出时关闭最久未使用的
+    """
+    config = config or DEFAULT_CONFIG
+    key = _config_key(config)
+    with _default_session_lock:
+        session = _default_sessions.get(key)
+        if session is not None:
+            _default_sessions.move_to_end(key)
+            return session
+        # 保存配置的副本，之后修改原对象不会影响已创建的 Session
+        session = _default_sessions[key] = create_session(replace(config, headers=dict(config.headers)))
+        while len(_default_sessions) > DEFAULT_SESSION_CACHE_SIZE:
+            _default_sessions.popitem(last=False)[1].close()
+        return session
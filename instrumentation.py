@@ -0,0 +1,85 @@
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Optional, Callable, List, Dict, Any
+
+
+# 所有模块的日志都挂在 "yhdm" 之下，默认不输出；需要时由调用方配置 handler，例如:
+#   logging.getLogger("yhdm").addHandler(logging.StreamHandler())
+logging.getLogger("yhdm").addHandler(logging.NullHandler())
+
+
+def get_logger(module_name: str) -> logging.Logger:
+    return logging.getLogger(f"yhdm.{module_name}")
+
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CallMetrics:
+    """
+    单次调用的耗时统计，调用结束后传给所有已注册的 hook
+
+    name: 调用名称，如 "get_video_url"、"decrypt_url"、"get_anime_detail"
+    fetch_time / parse_time / decrypt_time: 各阶段耗时(秒)
+    bytes: 下载的响应体字节数
+    cache: 缓存结果 "hit" / "miss"，未使用缓存时为 None
+    """
+    name: str
+    fetch_time: float = 0.0
+    parse_time: float = 0.0
+    decrypt_time: float = 0.0
+    bytes: int = 0
+    cache: Optional[str] = None
+    ok: bool = True
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @contextmanager
+    def measure(self, stage: str):
+        """累加 with 块的耗时到 {stage}_time"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            attr = f"{stage}_time"
+            setattr(self, attr, getattr(self, attr) + time.perf_counter() - start)
+
+
+_hooks: List[Callable[[CallMetrics], None]] = []
+
+
+def add_hook(callback: Callable[[CallMetrics], None]):
+    """注册统计回调，每次调用结束后以 CallMetrics 调用"""
+    if callback not in _hooks:
+        _hooks.append(callback)
+
+
+def remove_hook(callback: Callable[[CallMetrics], None]):
+    if callback in _hooks:
+        _hooks.remove(callback)
+
+
+def hooks_enabled() -> bool:
+    return bool(_hooks)
+
+
+class _UnmeasuredMetrics(CallMetrics):
+    """没有注册 hook 时使用，measure 不计时"""
+    def measure(self, stage: str):
+        return nullcontext()
+
+
+def start_metrics(name: str) -> CallMetrics:
+    """开始统计一次调用；没有注册 hook 时返回不计时的 CallMetrics"""
+    return CallMetrics(name) if _hooks else _UnmeasuredMetrics(name)
+
+
+def emit(metrics: CallMetrics):
+    """把统计结果分发给所有 hook，hook 抛出的异常只记录日志"""
+    for callback in list(_hooks):
+        try:
+            callback(metrics)
+        except Exception:
+            logger.exception("metrics hook 执行失败")
@@ -0,0 +1,376 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+
+from instrumentation import get_logger
+
+logger = get_logger(__name__)
+
+
+# 表示源站过载的状态码：减小并发窗口，并且不论 ClientConfig.retry_statuses 如何都会重试（次数仍受 max_retries 限制）
+OVERLOAD_STATUSES = (429, 503)
+
+# 当前调用的截止时间（time.monotonic() 值），由 deadline() 设置
+_deadline: contextvars.ContextVar = contextvars.ContextVar("yhdm_deadline", default=None)
+
+
+class DeadlineExceeded(Timeout):
+    """请求在截止时间前未能完成（包括排队、重试等待）"""
+
+
+@contextmanager
+def deadline(seconds: float):
+    """
+    为代码块内发起的所有请求设置总时限，包括排队、重试和退避等待；嵌套时取较早的截止时间
+
+    用法:
+        with deadline(5):
+            api.get_video_url(22214, 1, 1)
+
+    注意：截止时间保存在 contextvars 中，代码块内新建线程池的工作线程不会继承
+    """
+    until = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(until if current is None else min(current, until))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline(default_seconds: Optional[float] = None) -> Optional[float]:
+    """返回当前调用的截止时间，default_seconds 为每次调用默认的时限(ClientConfig.deadline)"""
+    until = _deadline.get()
+    if default_seconds is not None:
+        default_until = time.monotonic() + default_seconds
+        until = default_until if until is None else min(until, default_until)
+    return until
+
+
+def deadline_passed(until: Optional[float]) -> bool:
+    """截止时间是否已到；请求在此之后失败（如被截短的超时）说明是调用方的时限不够，而不是主机过载"""
+    return until is not None and time.monotonic() >= until
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数或 HTTP 日期），返回等待秒数"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class HostStats:
+    """单个主机的调度状态，由 RequestScheduler.stats() 返回"""
+    limit: float  # 当前并发窗口
+    in_flight: int
+    requests: int = 0
+    overloaded: int = 0  # 429/503 次数
+    errors: int = 0  # 5xx、连接错误和超时次数（含 overloaded）
+    latency: Optional[float] = None  # 延迟的指数移动平均(秒)
+
+
+class _HostState:
+    def __init__(self, scheduler: "RequestScheduler"):
+        self.limit = float(scheduler.initial_concurrency)
+        self.in_flight = 0
+        self.tokens = float(scheduler.burst)
+        self.refilled_at = time.monotonic()
+        self.paused_until = 0.0  # Retry-After 指定的暂停结束时间
+        self.decreased_at = 0.0
+        self.latency: Optional[float] = None
+        self.requests = 0
+        self.overloaded = 0
+        self.errors = 0
+
+
+class RequestScheduler:
+    """
+    按主机调度请求的共享调度器，通过 ClientConfig(scheduler=...) 作用于同一配置下的所有请求
+    （YhdmApi、AsyncYhdmApi、YhdmParser 和 get_video_url_common 中的函数）
+
+    - 令牌桶：每个主机每秒最多 rate 个请求，允许 burst 个突发，rate 为 None 时不限速
+    - AIMD 并发窗口：每个请求成功且延迟不超过 target_latency 时窗口增加 1/窗口（约每轮增加 1），
+      遇到 429/5xx、连接错误、超时或延迟超过 target_latency 时乘以 decrease_factor，每个平均延迟周期最多减小一次
+    - 429/503 带 Retry-After 时暂停该主机直到指定时间
+    - 重试次数、退避系数和可重试状态码来自 ClientConfig，退避时间为 [0, min(backoff_cap, retry_backoff * 2 ** n)] 内的随机值
+
+    用法:
+        scheduler = RequestScheduler(rate=20, max_concurrency=32, target_latency=1.0)
+        config = ClientConfig(scheduler=scheduler, max_retries=3, retry_backoff=0.2, deadline=10)
+        api = YhdmApi(config=config)
+    """
+    def __init__(self,
+                 rate: Optional[float] = None,
+                 burst: Optional[int] = None,
+                 initial_concurrency: int = 8,
+                 min_concurrency: int = 1,
+                 max_concurrency: int = 64,
+                 target_latency: Optional[float] = None,
+                 decrease_factor: float = 0.5,
+                 backoff_cap: float = 10.0):
+        if not 0 < decrease_factor < 1:
+            raise ValueError("decrease_factor 必须在 (0, 1) 之间")
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1, int(rate or 1))
+        self.min_concurrency = max(1, min_concurrency)
+        self.max_concurrency = max(self.min_concurrency, max_concurrency)
+        self.initial_concurrency = min(max(initial_concurrency, self.min_concurrency), self.max_concurrency)
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self.backoff_cap = backoff_cap
+        self._hosts: Dict[str, _HostState] = {}
+        self._cond = threading.Condition()
+        # 等待并发名额的协程: 主机 -> [(事件循环, Future)]，由 release 唤醒
+        self._async_waiters: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+    def _host(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = _HostState(self)
+        return state
+
+    def _try_acquire(self, host: str) -> Optional[float]:
+        """
+        尝试占用一个名额，成功返回 0；否则返回需要等待的秒数，
+        需要等待其他请求结束时返回 None（调用方持有 _cond）
+        """
+        state = self._host(host)
+        now = time.monotonic()
+        if state.paused_until > now:
+            return state.paused_until - now
+        if state.in_flight >= int(state.limit):
+            return None
+        if self.rate is not None:
+            state.tokens = min(self.burst, state.tokens + (now - state.refilled_at) * self.rate)
+            state.refilled_at = now
+            if state.tokens < 1:
+                return (1 - state.tokens) / self.rate
+            state.tokens -= 1
+        state.in_flight += 1
+        state.requests += 1
+        return 0
+
+    def acquire(self, host: str, until: Optional[float] = None) -> float:
+        """阻塞直到可以向 host 发起请求，返回开始时间；超过截止时间 until 时抛出 DeadlineExceeded"""
+        with self._cond:
+            while True:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    return time.monotonic()
+                if until is not None:
+                    remaining = until - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceeded(f"等待 {host} 的请求名额超时")
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+    async def acquire_async(self, host: str, until: Optional[float] = None) -> float:
+        """
+        acquire 的协程版本：需要等待其他请求结束时挂起在当前事件循环的 Future 上，
+        由 release（可以在任意线程中调用）通过 call_soon_threadsafe 唤醒，不会阻塞事件循环
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            waiter = None
+            with self._cond:
+                wait = self._try_acquire(host)
+                if wait == 0:
+                    return time.monotonic()
+                if wait is None:
+                    waiter = loop.create_future()
+                    self._async_waiters.setdefault(host, []).append((loop, waiter))
+            try:
+                if until is not None:
+                    remaining = until - time.monotonic()
+                    if remaining <= 0:
+                        raise DeadlineExceeded(f"等待 {host} 的请求名额超时")
+                    wait = remaining if wait is None else min(wait, remaining)
+                if waiter is None:
+                    await asyncio.sleep(wait)
+                else:
+                    await asyncio.wait((waiter,), timeout=wait)
+            finally:
+                if waiter is not None and not waiter.done():
+                    # 超时或被取消，release 尚未取走时从等待列表中移除
+                    with self._cond:
+                        waiters = self._async_waiters.get(host)
+                        if waiters and (loop, waiter) in waiters:
+                            waiters.remove((loop, waiter))
+                            if not waiters:
+                                del self._async_waiters[host]
+
+    def release(self,
+                host: str,
+                started: float,
+                status: Optional[int] = None,
+                error: Optional[BaseException] = None,
+                retry_after: Optional[float] = None,
+                neutral: bool = False):
+        """
+        请求结束后归还名额，并根据状态码/异常和延迟调整并发窗口
+
+        neutral 为 True 时只归还名额，不更新延迟和并发窗口，用于与主机状态无关的结束：
+        调用方截止时间导致的超时、被中断或取消的请求等
+        """
+        now = time.monotonic()
+        latency = now - started
+        with self._cond:
+            state = self._host(host)
+            state.in_flight -= 1
+            if not neutral:
+                self._update_window(state, host, now, latency, status, error, retry_after)
+            self._cond.notify_all()
+            waiters = self._async_waiters.pop(host, None)
+        for loop, waiter in waiters or ():
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    def _update_window(self,
+                       state: _HostState,
+                       host: str,
+                       now: float,
+                       latency: float,
+                       status: Optional[int],
+                       error: Optional[BaseException],
+                       retry_after: Optional[float]):
+        # 调用时需持有 self._cond
+        state.latency = latency if state.latency is None else 0.8 * state.latency + 0.2 * latency
+        overloaded = status in OVERLOAD_STATUSES
+        failed = error is not None or (status is not None and status >= 500)
+        if overloaded:
+            state.overloaded += 1
+            if retry_after:
+                state.paused_until = max(state.paused_until, now + retry_after)
+        if overloaded or failed:
+            state.errors += 1
+        slow = self.target_latency is not None and latency > self.target_latency
+        if overloaded or failed or slow:
+            # 同一轮中的多个失败只算一次拥塞
+            if now - state.decreased_at >= (state.latency or 0):
+                state.limit = max(self.min_concurrency, state.limit * self.decrease_factor)
+                state.decreased_at = now
+                logger.debug("%s 并发窗口减小到 %.1f (状态码: %s, 异常: %s, 延迟: %.3fs)",
+                             host, state.limit, status, error, latency)
+        else:
+            state.limit = min(self.max_concurrency, state.limit + 1 / state.limit)
+
+    def retry_delay(self,
+                    config: Any,
+                    attempt: int,
+                    until: Optional[float] = None,
+                    status: Optional[int] = None,
+                    retry_after: Optional[float] = None) -> Optional[float]:
+        """
+        第 attempt 次（从 0 开始）请求失败后，返回重试前应等待的秒数；不应重试时返回 None
+
+        status 为 None 表示连接错误或超时。重试次数、退避系数和可重试状态码取自 config，
+        等待后会超过截止时间 until 时不再重试
+        """
+        if attempt >= config.max_retries:
+            return None
+        if status is not None and status not in config.retry_statuses and status not in OVERLOAD_STATUSES:
+            return None
+        delay = random.uniform(0, min(self.backoff_cap, config.retry_backoff * 2 ** attempt))
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.backoff_cap))
+        if until is not None and time.monotonic() + delay >= until:
+            return None
+        return delay
+
+    def stats(self) -> Dict[str, HostStats]:
+        with self._cond:
+            return {host: HostStats(limit=state.limit, in_flight=state.in_flight, requests=state.requests,
+                                    overloaded=state.overloaded, errors=state.errors, latency=state.latency)
+                    for host, state in self._hosts.items()}
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+def _limit_timeout(timeout, until: Optional[float]):
+    """把单次请求的超时限制在截止时间之内"""
+    if until is None:
+        return timeout
+    remaining = until - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceeded("请求已超过截止时间")
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if t is None else min(t, remaining) for t in timeout)
+    return min(timeout, remaining)
+
+
+class SchedulingHTTPAdapter(HTTPAdapter):
+    """
+    经过 RequestScheduler 调度的 HTTPAdapter，scheduler 为 None 时与 HTTPAdapter 相同
+
+    有调度器时由本类负责重试（urllib3 的重试应关闭，见 http_session.create_adapter），
+    只对 GET 请求重试，与 build_retry 一致
+    """
+    def __init__(self, scheduler: Optional[RequestScheduler] = None, config: Any = None, **kwargs):
+        super().__init__(**kwargs)
+        self.scheduler = scheduler
+        # HTTPAdapter 自身已有 config 属性
+        self.client_config = config
+
+    def send(self, request, **kwargs):
+        scheduler = self.scheduler
+        if scheduler is None:
+            return super().send(request, **kwargs)
+
+        host = urlsplit(request.url).netloc
+        config = self.client_config
+        until = current_deadline(config.deadline)
+        timeout = kwargs.pop("timeout", None)
+        retryable = request.method == "GET"
+        attempt = 0
+        while True:
+            started = scheduler.acquire(host, until)
+            try:
+                response = super().send(request, timeout=_limit_timeout(timeout, until), **kwargs)
+            except (ConnectionError, Timeout) as e:
+                # 截止时间导致的失败不反映主机状态，不缩小其他调用方共享的并发窗口
+                scheduler.release(host, started, error=e, neutral=deadline_passed(until))
+                delay = scheduler.retry_delay(config, attempt, until) if retryable else None
+                if delay is None:
+                    raise
+            except BaseException:
+                # 被中断或其他与网络无关的异常，既不算成功也不算失败
+                scheduler.release(host, started, neutral=True)
+                raise
+            else:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                scheduler.release(host, started, status=response.status_code, retry_after=retry_after)
+                delay = None
+                if retryable:
+                    delay = scheduler.retry_delay(config, attempt, until, response.status_code, retry_after)
+                if delay is None:
+                    return response
+                response.close()
+            logger.debug("%s %s 第 %d 次重试，等待 %.2fs", request.method, request.url, attempt + 1, delay)
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,110 @@
+import json
+from dataclasses import fields, is_dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Tuple, Union, get_type_hints
+
+try:
+    import msgpack
+except ImportError:  # msgpack 为可选依赖，仅 dumps_binary/loads_binary 需要
+    msgpack = None
+
+from yhdm_api import EpisodeList
+
+
+def to_primitive(obj: Any) -> Any:
+    """
+    把解析结果（Anime、AnimeShell 等 dataclass 或首页数据字典）转换为只含
+    dict/list/str/int/float/bool/None 的基本结构:
+      - dataclass 转为以字段名为键的字典
+      - datetime 转为 ISO 8601 字符串
+      - EpisodeList 转为 {"start": 起始id, "titles": [...]}，id 不连续时为 {"ids": [...], "titles": [...]}
+      - 异常（AnimeDetailResult.error）转为 {"type": 类名, "message": 文本}
+    """
+    if obj is None or isinstance(obj, (str, int, float, bool)):
+        return obj
+    if isinstance(obj, EpisodeList):
+        start, titles, ids = obj.compact()
+        if ids is not None:
+            return {"ids": ids, "titles": titles}
+        return {"start": start, "titles": titles}
+    if is_dataclass(obj) and not isinstance(obj, type):
+        return {name: to_primitive(getattr(obj, name)) for name in _field_names(type(obj))}
+    if isinstance(obj, dict):
+        return {key: to_primitive(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_primitive(value) for value in obj]
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    if isinstance(obj, BaseException):
+        return {"type": type(obj).__name__, "message": str(obj)}
+    raise TypeError(f"无法序列化的类型: {type(obj).__name__}")
+
+
+def from_primitive(data: Any, cls: Any = None) -> Any:
+    """
+    按类型 cls 还原 to_primitive 的结果，cls 可以是 dataclass、List[...]、Optional[...] 等类型注解；
+    为 None 时原样返回（如首页数据字典）。异常还原为以 "类名: 文本" 为内容的 Exception
+    """
+    if data is None or cls is None or cls is Any:
+        return data
+    origin = getattr(cls, "__origin__", None)
+    if origin is Union:
+        args = [arg for arg in cls.__args__ if arg is not type(None)]
+        return from_primitive(data, args[0] if len(args) == 1 else None)
+    if origin in (list, List):
+        item_cls = cls.__args__[0] if getattr(cls, "__args__", None) else None
+        return [from_primitive(value, item_cls) for value in data]
+    if origin in (dict, Dict):
+        value_cls = cls.__args__[1] if getattr(cls, "__args__", None) else None
+        return {key: from_primitive(value, value_cls) for key, value in data.items()}
+    if cls is EpisodeList:
+        return EpisodeList.from_titles(data["titles"], data.get("start", 1), data.get("ids"))
+    if cls is datetime:
+        return datetime.fromisoformat(data)
+    if isinstance(cls, type) and issubclass(cls, BaseException):
+        return Exception(f"{data['type']}: {data['message']}")
+    if is_dataclass(cls):
+        return cls(**{name: from_primitive(data[name], hint)
+                      for name, hint in _field_hints(cls) if name in data})
+    return data
+
+
+_FIELD_NAMES: Dict[type, Tuple[str, ...]] = {}
+_FIELD_HINTS: Dict[type, List[Tuple[str, Any]]] = {}
+
+
+def _field_names(cls: type) -> Tuple[str, ...]:
+    names = _FIELD_NAMES.get(cls)
+    if names is None:
+        names = _FIELD_NAMES[cls] = tuple(f.name for f in fields(cls))
+    return names
+
+
+def _field_hints(cls: type) -> List[Tuple[str, Any]]:
+    hints = _FIELD_HINTS.get(cls)
+    if hints is None:
+        annotations = get_type_hints(cls)
+        hints = _FIELD_HINTS[cls] = [(f.name, annotations.get(f.name)) for f in fields(cls)]
+    return hints
+
+
+def dumps_json(obj: Any) -> str:
+    """紧凑 JSON：无缩进和多余空格，中文不转义"""
+    return json.dumps(to_primitive(obj), ensure_ascii=False, separators=(",", ":"))
+
+
+def loads_json(text: Union[str, bytes], cls: Any = None) -> Any:
+    return from_primitive(json.loads(text), cls)
+
+
+def dumps_binary(obj: Any) -> bytes:
+    """MessagePack 二进制编码，需要安装 msgpack"""
+    if msgpack is None:
+        raise ImportError("dumps_binary 需要安装 msgpack: pip install msgpack")
+    return msgpack.packb(to_primitive(obj), use_bin_type=True)
+
+
+def loads_binary(payload: bytes, cls: Any = None) -> Any:
+    if msgpack is None:
+        raise ImportError("loads_binary 需要安装 msgpack: pip install msgpack")
+    return from_primitive(msgpack.unpackb(payload, raw=False, strict_map_key=False), cls)
@@ -0,0 +1,64 @@
+"""
+YhdmApi.get_anime_details 的批量结果：失败原因写入 error，小批量不启动进程池；
+详情页字段按标签完全匹配优先、再按包含关系查找
+"""
+import os
+import sys
+
+import pytest
+
+import yhdm_api
+from config import ClientConfig
+from html_backend import make_soup
+from yhdm_api import YhdmApi, detail_field, index_detail_fields, parse_anime_detail, parse_anime_detail_or_raise
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def api():
+    with ReplayServer() as server:
+        yield YhdmApi(config=ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url))
+
+
+def test_parse_failure_is_reported():
+    html = "<html><body>不是详情页</body></html>"
+    assert parse_anime_detail(html, 1) is None
+    with pytest.raises(ValueError):
+        parse_anime_detail_or_raise(html, 1)
+
+
+def test_small_batch_parses_in_process(api, monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("小批量不应启动进程池")
+
+    monkeypatch.setattr(yhdm_api, "ProcessPoolExecutor", no_pool)
+    results = list(api.get_anime_details([1, 2, 3]))
+    assert sorted(result.id for result in results) == [1, 2, 3]
+    assert all(result.anime is not None and result.error is None for result in results)
+
+
+def test_unparsable_page_has_error(api, monkeypatch):
+    class Page:
+        text = "<html><body>不是详情页</body></html>"
+
+    monkeypatch.setattr(api, "_get_detail_page", lambda anime_id: Page())
+    results = list(api.get_anime_details([1, 2], processes=0))
+    assert all(result.anime is None and isinstance(result.error, ValueError) for result in results)
+
+
+def test_detail_field_lookup():
+    html = ('<div class="content_detail"><ul>'
+            '<li class="data"><span>上映年份：</span><a>2023</a><span>年份：</span><a>2024</a></li>'
+            '<li class="data"><span>类型:</span><a>奇幻</a><span> 类型：</span><a>重复</a></li>'
+            '<li class="data"><span>首播地区：</span>日本</li>'
+            '</ul></div>')
+    fields = index_detail_fields(make_soup(html).select(".content_detail li.data"))
+    assert list(fields) == ["上映年份", "年份", "类型", "首播地区"]
+    # 完全匹配优先于先出现的包含匹配，同名标签取第一次出现的
+    assert detail_field(fields, "年份").next_sibling.text == "2024"
+    assert detail_field(fields, "类型").next_sibling.text == "奇幻"
+    # 没有完全匹配时按包含关系查找
+    assert detail_field(fields, "地区").next_sibling.strip() == "日本"
+    assert detail_field(fields, "状态") is None
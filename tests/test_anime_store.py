@@ -0,0 +1,149 @@
+"""
+AnimeStore 的保存/读取，以及 RefreshPlanner 判断需要更新的条目和停止翻页的规则
+"""
+from datetime import datetime
+
+import pytest
+
+from anime_store import AnimeStore, RefreshPlanner, StoredState, is_stale
+from yhdm_api import Anime, AnimeDetailResult, AnimeShell, Episode, StreamLine
+
+
+def make_anime(anime_id, latest_episode=2, status="更新至2集", stream_lines=None):
+    if stream_lines is None:
+        stream_lines = [
+            StreamLine(id=2, episodes=[Episode(id=1, title="第01集"), Episode(id=2, title="第02集")]),
+            StreamLine(id=1, episodes=[Episode(id=1, title="第01集")]),
+        ]
+    return Anime(id=anime_id, name=f"动漫{anime_id}", image_url=f"https://img.example/{anime_id}.jpg",
+                 status=status, latest_episode=latest_episode, tags=["热血", "奇幻"], type="日本动漫",
+                 year="2026", description="简介", stream_lines=stream_lines,
+                 last_update=datetime(2026, 10, 1, 12, 30))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnimeStore(str(tmp_path / "anime.sqlite3"))
+
+
+def test_save_load_round_trip(store):
+    anime = make_anime(1)
+    store.save(anime, list_status="更新至2集")
+    store.save(make_anime(2, stream_lines=[]))
+    assert store.load(1) == anime
+    assert [line.id for line in store.load(1).stream_lines] == [2, 1]
+    assert store.load(3) is None
+    assert len(store) == 2 and 1 in store and 3 not in store
+    assert [a.id for a in store.iter_anime()] == [1, 2]
+
+    # 再次保存时替换全部线路和分集，list_status 为 None 时保留原有的筛选状态
+    updated = make_anime(1, latest_episode=3, stream_lines=[
+        StreamLine(id=1, episodes=[Episode(id=1, title="第01集"), Episode(id=3, title="第03集")])])
+    store.save(updated)
+    assert store.load(1) == updated
+    state = store.states([1, 2, 3])
+    assert set(state) == {1, 2}
+    assert (state[1].list_status, state[1].latest_episode) == ("更新至2集", 3)
+    assert state[2].list_status is None
+
+    store.delete(1)
+    assert store.load(1) is None and len(store) == 1
+    store.set_meta("last_sync", "1")
+    assert store.get_meta("last_sync") == "1" and store.get_meta("missing", "-") == "-"
+
+
+def test_is_stale():
+    shell = AnimeShell(id=1, name="动漫1", image_url=None, status="更新至12集")
+    assert is_stale(shell, None)
+    assert is_stale(shell, StoredState("更新至11集", 11, 0))
+    # 状态文字相同但保存的集数较少（上次详情页尚未更新）
+    assert is_stale(shell, StoredState("更新至12集", 11, 0))
+    assert not is_stale(shell, StoredState("更新至12集", 12, 0))
+    assert not is_stale(AnimeShell(id=1, name="动漫1", image_url=None, status="完结"), StoredState("完结", 12, 0))
+
+
+class FakeApi:
+    """按 (类型, 页码) 返回固定筛选结果的 API，超出的页返回 last_page 或空列表"""
+    def __init__(self, pages, last_page=None, failed=()):
+        self.pages = pages
+        self.last_page = last_page
+        self.failed = set(failed)
+        self.requested = []
+
+    def filter_anime(self, type=1, order_by="time", page=1):
+        assert order_by == "time"
+        self.requested.append((type, page))
+        return list(self.pages.get((type, page), self.last_page or []))
+
+    def get_anime_details(self, anime_ids, concurrency=16, processes=None):
+        for anime_id in anime_ids:
+            if anime_id in self.failed:
+                yield AnimeDetailResult(id=anime_id, anime=None, error=ValueError(anime_id))
+            else:
+                yield AnimeDetailResult(id=anime_id, anime=make_anime(anime_id, latest_episode=anime_id % 10))
+
+
+def shell(anime_id, status=None):
+    return AnimeShell(id=anime_id, name=f"动漫{anime_id}", image_url=None,
+                      status=status or f"更新至{anime_id % 10}集")
+
+
+def _save_all(store, shells):
+    store.save_many((make_anime(s.id, latest_episode=s.id % 10), s.status) for s in shells)
+
+
+def test_first_sync_reads_all_pages(store):
+    pages = {(1, page): [shell(page * 10 + i) for i in range(1, 4)] for page in range(1, 4)}
+    api = FakeApi(pages)
+    plan = RefreshPlanner(api, store, stop_after_unchanged=2).plan()
+    assert plan.ids == [11, 12, 13, 21, 22, 23, 31, 32, 33]
+    # 第 4 页为空时停止
+    assert (plan.pages, plan.scanned) == (4, 9)
+
+
+def test_stops_after_unchanged_run(store):
+    old = [shell(20 + i) for i in range(6)]
+    _save_all(store, old)
+    pages = {
+        # 新条目、状态文字变化、集数更高
+        (1, 1): [shell(10), shell(21, "完结"), old[0]],
+        (1, 2): [shell(22, "更新至1集"), old[3], old[4]],
+        (1, 3): [old[5]],
+        (1, 4): [shell(30)],
+    }
+    store.save(make_anime(22, latest_episode=0), list_status="更新至1集")
+    api = FakeApi(pages)
+    plan = RefreshPlanner(api, store, stop_after_unchanged=3).plan()
+    assert plan.ids == [10, 21, 22]
+    # 第 2 页末尾连续 2 个未变化，第 3 页后满 3 个，不再请求第 4 页
+    assert api.requested == [(1, 1), (1, 2), (1, 3)]
+    assert (plan.pages, plan.scanned) == (3, 7)
+
+
+def test_stops_on_repeated_last_page(store):
+    pages = {(1, 1): [shell(11), shell(12)], (2, 1): [shell(13)]}
+    api = FakeApi(pages, last_page=[shell(11), shell(12)])
+    plan = RefreshPlanner(api, store, types=(1, 2), stop_after_unchanged=10).plan()
+    # 超出最后一页时站点重复返回最后一页，去掉已见过的条目后为空即停止；其他类型中已见过的条目同样跳过
+    assert plan.ids == [11, 12, 13]
+    assert api.requested == [(1, 1), (1, 2), (2, 1), (2, 2)]
+
+
+def test_max_pages(store):
+    pages = {(1, page): [shell(page * 10 + 1)] for page in range(1, 10)}
+    api = FakeApi(pages)
+    plan = RefreshPlanner(api, store, stop_after_unchanged=1, max_pages=2).plan()
+    assert plan.ids == [11, 21] and plan.pages == 2
+
+
+def test_sync(store):
+    pages = {(1, 1): [shell(11), shell(12), shell(13)]}
+    api = FakeApi(pages, failed=[12])
+    result = RefreshPlanner(api, store).sync()
+    assert result.refreshed == [11, 13]
+    assert list(result.failed) == [12] and isinstance(result.failed[12], ValueError)
+    assert store.states([11])[11].list_status == "更新至1集"
+    assert store.get_meta("last_sync") is not None
+
+    # 再次同步时只剩下失败的条目
+    assert RefreshPlanner(FakeApi(pages), store).plan().ids == [12]
@@ -0,0 +1,44 @@
+"""
+AsyncYhdmApi：页面解析在线程池中执行，不阻塞事件循环
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+import yhdm_api_async
+from config import ClientConfig
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+pytest.importorskip("aiohttp")
+
+PARSERS = ["parse_homepage", "parse_search_results", "parse_anime_detail", "parse_filter_results",
+           "parse_encrypted_video_url"]
+
+
+def test_parsing_runs_off_event_loop(monkeypatch):
+    threads = {}
+    for name in PARSERS:
+        def recording_parser(*args, _name=name, _parser=getattr(yhdm_api_async, name), **kwargs):
+            threads[_name] = threading.current_thread()
+            return _parser(*args, **kwargs)
+
+        monkeypatch.setattr(yhdm_api_async, name, recording_parser)
+
+    async def main():
+        async with yhdm_api_async.AsyncYhdmApi(config=config) as api:
+            loop_thread = threading.current_thread()
+            results = await asyncio.gather(api.get_homepage(), api.search_anime("异世界"), api.get_anime_detail(1),
+                                           api.filter_anime(), api.get_video_url(1, 1, 1))
+            return loop_thread, results
+
+    with ReplayServer() as server:
+        config = ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url)
+        loop_thread, results = asyncio.run(main())
+    assert all(results)
+    assert set(threads) == set(PARSERS)
+    assert all(thread is not loop_thread for thread in threads.values())
@@ -0,0 +1,119 @@
+"""
+本地目录索引：归一化、完全/前缀/包含匹配的排序、按 id 合并条目，以及 YhdmApi 先查本地目录再请求线上接口
+"""
+import os
+import sys
+
+import pytest
+
+from catalog_index import CatalogIndex, CatalogStats, normalize
+from config import ClientConfig
+from yhdm_api import AnimeShell, YhdmApi
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+
+def test_normalize():
+    assert normalize("ＳＰＹ×FAMILY 间谍 过家家！") == "spyfamily间谍过家家"
+    assert normalize("Re:从零开始") == "re从零开始"
+    assert normalize("") == normalize(None) == ""
+
+
+def _ids(entries):
+    return [entry.id for entry in entries]
+
+
+def test_ranking():
+    catalog = CatalogIndex()
+    catalog.add(1, "进击的巨人")
+    catalog.add(2, "进击的巨人 最终季")
+    catalog.add(3, "巨人")
+    catalog.add(4, "我的巨人")
+    catalog.add(5, "你的巨人")
+    catalog.add(6, "间谍过家家")
+
+    # 完全匹配 > 前缀匹配 > 包含，同级时名称较短的在前，再按 id 从大到小
+    assert _ids(catalog.lookup("进击的巨人")) == [1, 2]
+    assert _ids(catalog.lookup("巨人")) == [3, 5, 4, 1, 2]
+    assert _ids(catalog.lookup("巨人", limit=2)) == [3, 5]
+    assert _ids(catalog.search("巨人", page=2, page_size=2)) == [4, 1]
+    assert _ids(catalog.lookup("进击 的巨人!")) == [1, 2]
+    assert catalog.lookup("巨大") == [] and catalog.lookup("") == []
+    assert catalog.suggest("巨人", limit=3) == ["巨人", "你的巨人", "我的巨人"]
+    assert catalog.stats == CatalogStats(hits=6, misses=2)
+
+
+def test_merge_by_id():
+    catalog = CatalogIndex()
+    catalog.add_shell(AnimeShell(id=7, name="葬送的芙莉莲", image_url="https://img/7.jpg", status="更新至1集"))
+    catalog.add(7, tags=["奇幻", "冒险"], year="2023", latest_episode=1)
+    catalog.add_suggest({"id": "7", "name": "葬送的芙莉莲", "en": "zangsongdefulilian", "pic": None})
+    catalog.add(7, status="更新至2集", tags=["奇幻"], latest_episode=2)
+
+    assert len(catalog) == 1 and 7 in catalog
+    entry = catalog.get(7)
+    assert (entry.name, entry.image_url, entry.status, entry.year) == ("葬送的芙莉莲", "https://img/7.jpg", "更新至2集", "2023")
+    assert (entry.tags, entry.latest_episode, entry.aliases) == (["奇幻"], 2, ["zangsongdefulilian"])
+    # 别名参与检索，替换后的标签更新标签索引
+    assert _ids(catalog.lookup("zangsong")) == [7]
+    assert _ids(catalog.lookup("", tag="奇幻")) == [7]
+    assert catalog.lookup("", tag="冒险") == []
+
+    # 改名后旧名称不再命中
+    catalog.add(7, "芙莉莲")
+    assert catalog.lookup("葬送") == []
+    assert _ids(catalog.lookup("芙莉莲")) == [7]
+
+
+@pytest.fixture(scope="module")
+def server():
+    with ReplayServer() as server:
+        yield server
+
+
+def _api(server, catalog, fallback=True):
+    return YhdmApi(config=ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url),
+                   catalog=catalog, catalog_fallback=fallback)
+
+
+def test_search_catalog_first(server):
+    catalog = CatalogIndex()
+    catalog.add(1, "葬送的芙莉莲 第二季", status="更新至3集")
+    api = _api(server, catalog)
+
+    requests_before = server.requests
+    assert api.search_anime("葬送") == [AnimeShell(id=1, name="葬送的芙莉莲 第二季", image_url=None, status="更新至3集")]
+    assert server.requests == requests_before
+
+    # 本地没有结果时请求线上接口，结果补充进目录
+    online = api.search_anime("间谍")
+    assert online and server.requests == requests_before + 1
+    assert len(catalog) == 1 + len(online)
+    assert _ids(catalog.lookup("咒术回战")) == [20002]
+
+    # 按演员搜索总是请求线上接口
+    api.search_anime("葬送", actor="种崎敦美")
+    assert server.requests == requests_before + 2
+
+    assert _api(server, CatalogIndex(), fallback=False).search_anime("间谍") == []
+    assert server.requests == requests_before + 2
+
+
+def test_suggestions_catalog_first(server):
+    catalog = CatalogIndex()
+    catalog.add(1, "异世界舅舅")
+    api = _api(server, catalog)
+
+    requests_before = server.requests
+    assert api.get_search_suggestions("异世界") == ["异世界舅舅"]
+    assert server.requests == requests_before
+
+    # 线上建议的拼音作为别名补充进目录，之后按拼音也能在本地回答
+    assert api.get_search_suggestions("农家") == ["异世界迷宫黑心企业", "异世界悠闲农家", "异世界舅舅"]
+    assert server.requests == requests_before + 1
+    assert api.get_search_suggestions("yishijieyouxian") == ["异世界悠闲农家"]
+    assert server.requests == requests_before + 1
+
+    assert _api(server, CatalogIndex(), fallback=False).get_search_suggestions("农家") == []
+    assert server.requests == requests_before + 1
@@ -0,0 +1,69 @@
+"""
+YhdmDecrypter：在生成的 ec.php 内容上，decrypt_many 和 decrypt_player_config 与原始实现的结果一致
+"""
+import base64
+import json
+import random
+import re
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad, unpad
+
+from conftest import read_fixture
+from get_video_url_common import YhdmDecrypter, decrypt_player_config
+
+IV = b"2F131BE91247866E"
+
+
+def original_decrypt_player_config(html_text):
+    """改写前的实现，作为对照"""
+    try:
+        match_url = re.search(r'"url"\s*:\s*("([^"]*)")', html_text)
+        if not match_url:
+            return None
+        config_url = json.loads(match_url.group(1))
+        match_uid = re.search(r'"uid"\s*:\s*("([^"]*)")', html_text)
+        if not match_uid:
+            return None
+        config_uid = json.loads(match_uid.group(1))
+        cipher = AES.new(f"2890{config_uid}tB959C".encode("utf-8"), AES.MODE_CBC, IV)
+        return unpad(cipher.decrypt(base64.b64decode(config_url)), AES.block_size).decode("utf-8")
+    except Exception:
+        return None
+
+
+def _payload(rng, index):
+    uid = str(rng.randrange(100000, 1000000))
+    video_url = f"https://cdn{index % 7}.example.com/{index}/index.m3u8?t={rng.randrange(10 ** 9, 10 ** 10)}&剧集={index}"
+    cipher = AES.new(f"2890{uid}tB959C".encode("utf-8"), AES.MODE_CBC, IV)
+    encrypted = base64.b64encode(cipher.encrypt(pad(video_url.encode("utf-8"), AES.block_size))).decode("ascii")
+    config = {"id": f"qw_{index}", "url": encrypted, "vkey": "0" * 32, "uid": uid, "next": "", "type": "hls"}
+    kind = index % 5
+    if kind == 1:
+        # json 转义的斜杠
+        text = json.dumps(config).replace("/", "\\/")
+    elif kind == 2:
+        # uid 在 url 之前
+        config = {"uid": uid, **config}
+        text = json.dumps(config, ensure_ascii=False, separators=(",", ":"))
+    elif kind == 3:
+        # 缺少 uid
+        del config["uid"]
+        text = json.dumps(config, separators=(",", ":"))
+    elif kind == 4:
+        # 密文损坏
+        config["url"] = encrypted[:-8]
+        text = json.dumps(config, separators=(",", ":"))
+    else:
+        text = json.dumps(config, ensure_ascii=False, separators=(",", ":"))
+    return f"<html><body><script>var config = {text}</script></body></html>"
+
+
+def test_matches_original_implementation():
+    rng = random.Random(20260101)
+    payloads = [_payload(rng, i) for i in range(200)] + [read_fixture("ec.html"), "", "<html></html>"]
+    expected = [original_decrypt_player_config(text) for text in payloads]
+    assert sum(result is not None for result in expected) > 100
+    assert sum(result is None for result in expected) > 50
+    assert YhdmDecrypter().decrypt_many(payloads) == expected
+    assert [decrypt_player_config(text) for text in payloads] == expected
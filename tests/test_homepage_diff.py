@@ -0,0 +1,39 @@
+"""
+首页增量比较：以录制首页为基准，修改后检查 diff_homepage 只报告实际变化的部分
+"""
+import json
+import re
+
+from conftest import read_fixture
+from homepage_diff import diff_homepage
+from yhdm_home_html_parser import YhdmParser
+
+
+def _schedule_lists(html):
+    start = html.index("番剧表")
+    end = html.index('<div class="pannel', start)
+    return start, end, list(re.finditer(r'(<ul class="vodlist[^"]*">)(.*?)(</ul>)', html[start:end], re.S))
+
+
+def test_empty_schedule_day_keeps_other_days():
+    html = read_fixture("homepage.html")
+    start, _, lists = _schedule_lists(html)
+    day = lists[1]  # 第 2 天
+    emptied = html[:start + day.start(2)] + html[start + day.end(2):]
+
+    parser = YhdmParser()
+    old = parser.generate_data(html)
+    new = parser.generate_data(emptied)
+    assert [entry["day"] for entry in new["weekly_schedule"]] == [1, 3, 4, 5, 6, 7]
+
+    changes = diff_homepage(old, new)
+    removed = [anime["id"] for anime in old["weekly_schedule"][1]["anime_list"]]
+    assert changes["weekly_schedule"] == {"2": {"removed": removed}}
+
+
+def test_generate_json_omits_day():
+    parser = YhdmParser()
+    html = read_fixture("homepage.html")
+    data = json.loads(parser.generate_json(html))
+    assert data["weekly_schedule"] and all(set(entry) == {"anime_list"} for entry in data["weekly_schedule"])
+    assert json.loads(parser.generate_json(html, compact=True)) == data
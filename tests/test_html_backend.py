@@ -0,0 +1,68 @@
+"""
+不同 HTML 解析后端（html_backend.available_backends()）对录制页面的解析结果必须完全一致
+"""
+from dataclasses import replace
+from datetime import datetime
+
+import pytest
+
+from conftest import read_fixture
+from get_video_url_common import parse_encrypted_video_url, _parse_encrypted_video_url_full
+from html_backend import available_backends
+from yhdm_api import parse_anime_detail, parse_filter_results, parse_search_results, parse_homepage
+from yhdm_home_html_parser import YhdmParser
+
+
+BACKENDS = available_backends()
+
+
+def _detail(html, backend):
+    anime = parse_anime_detail(html, 22214, backend)
+    # last_update 为解析时刻，不参与比较
+    return replace(anime, last_update=datetime(2000, 1, 1))
+
+
+EXTRACTORS = {
+    "parse_anime_detail": ("detail.html", _detail),
+    "parse_filter_results": ("filter.html", parse_filter_results),
+    "parse_search_results": ("search.html", parse_search_results),
+    "parse_homepage": ("homepage.html", parse_homepage),
+    "parse_encrypted_video_url": ("play.html", parse_encrypted_video_url),
+    "parse_encrypted_video_url_full": ("play.html", _parse_encrypted_video_url_full),
+    "YhdmParser.generate_data": ("homepage.html",
+                                 lambda html, backend: YhdmParser(parser_backend=backend).generate_data(html)),
+    "YhdmParser.generate_data_multi_pass": (
+        "homepage.html",
+        lambda html, backend: YhdmParser(parser_backend=backend).generate_data(html, single_pass=False)),
+}
+
+
+@pytest.mark.parametrize("name", list(EXTRACTORS))
+def test_backends_agree(name):
+    if len(BACKENDS) < 2:
+        pytest.skip("只有一个可用的解析后端")
+    fixture, extract = EXTRACTORS[name]
+    html = read_fixture(fixture)
+    results = {backend: extract(html, backend) for backend in BACKENDS}
+    expected = results[BACKENDS[-1]]
+    assert expected, f"{name} 在 {BACKENDS[-1]} 下没有解析出内容"
+    for backend, result in results.items():
+        assert result == expected, f"{name}: {backend} 与 {BACKENDS[-1]} 的结果不一致"
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_single_pass_matches_multi_pass(backend):
+    html = read_fixture("homepage.html")
+    parser = YhdmParser(parser_backend=backend)
+    assert parser.generate_data(html) == parser.generate_data(html, single_pass=False)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_deeply_nested_homepage(backend):
+    # 单遍解析不应受递归深度限制
+    html = read_fixture("homepage.html")
+    body_start = html.index(">", html.index("<body")) + 1
+    body_end = html.rindex("</body>")
+    nested = html[:body_start] + "<div>" * 1200 + html[body_start:body_end] + "</div>" * 1200 + html[body_end:]
+    parser = YhdmParser(parser_backend=backend)
+    assert parser.generate_data(nested) == parser.generate_data(html)
@@ -0,0 +1,122 @@
+"""
+HttpCache / CachingHTTPAdapter：未过期直接命中，过期后用 ETag 或 Last-Modified 条件请求重新验证，
+没有校验字段时使用 fallback_ttl；304 时复用 parse_with_cache 的解析结果
+"""
+import os
+import sys
+import time
+
+import pytest
+import requests
+
+from http_cache import CachePolicy, CachingHTTPAdapter, HttpCache, HttpCacheStats, parse_with_cache
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+LAST_MODIFIED = "Sat, 17 Oct 2026 00:00:00 GMT"
+
+
+class ValidatorServer(ReplayServer):
+    """只返回 Last-Modified（validator="last-modified"）或不返回任何校验字段（validator=None）的回放服务器"""
+    def __init__(self, validator):
+        self.validator = validator
+        self.conditional = []  # 每个请求是否带有条件请求头
+        super().__init__()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(super()._make_handler()):
+            def do_GET(self):
+                since = self.headers.get("If-Modified-Since")
+                with server._lock:
+                    server.requests += 1
+                    server.conditional.append(bool(since or self.headers.get("If-None-Match")))
+                if server.validator == "last-modified" and since == LAST_MODIFIED:
+                    self.send_response(304)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                body = server.fixtures["homepage.html"]
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if server.validator == "last-modified":
+                    self.send_header("Last-Modified", LAST_MODIFIED)
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def _session(server, ttl, fallback_ttl=300):
+    cache = HttpCache({r"^/$": CachePolicy(ttl=ttl, fallback_ttl=fallback_ttl)})
+    session = requests.Session()
+    session.mount(server.base_url, CachingHTTPAdapter(cache))
+    return session, cache
+
+
+def test_fresh_hit():
+    with ReplayServer() as server:
+        session, cache = _session(server, ttl=60)
+        first = session.get(server.base_url + "/")
+        second = session.get(server.base_url + "/")
+        # 未匹配策略的路径不缓存
+        session.get(server.base_url + "/index.php/vod/detail/id/1.html")
+        session.get(server.base_url + "/index.php/vod/detail/id/1.html")
+    assert not getattr(first, "from_cache", False) and second.from_cache
+    assert second.text == first.text
+    assert server.requests == 3
+    assert cache.stats == HttpCacheStats(hits=1, revalidated=0, misses=1)
+
+
+@pytest.mark.parametrize("validator", ["etag", "last-modified"])
+def test_revalidation(validator):
+    server = ReplayServer() if validator == "etag" else ValidatorServer(validator)
+    with server:
+        session, cache = _session(server, ttl=0)
+        first = session.get(server.base_url + "/")
+        second = session.get(server.base_url + "/")
+    assert second.status_code == 200 and second.from_cache
+    assert second.content == first.content
+    assert server.requests == 2
+    assert cache.stats == HttpCacheStats(hits=0, revalidated=1, misses=1)
+
+
+def test_fallback_ttl():
+    with ValidatorServer(None) as server:
+        session, cache = _session(server, ttl=0, fallback_ttl=60)
+        started = time.time()
+        session.get(server.base_url + "/")
+        assert session.get(server.base_url + "/").from_cache
+        entry = cache.get(server.base_url + "/")
+        assert entry.expires_at == pytest.approx(started + 60, abs=5)
+
+        # fallback_ttl 过期后重新完整请求，不发送条件请求
+        session, cache = _session(server, ttl=60, fallback_ttl=0)
+        session.get(server.base_url + "/")
+        session.get(server.base_url + "/")
+    assert server.conditional == [False, False, False]
+    assert cache.stats == HttpCacheStats(hits=0, revalidated=0, misses=2)
+
+
+def test_parse_result_reused_on_304():
+    calls = []
+
+    def parser(text):
+        calls.append(text)
+        return {"length": len(text), "items": [1, 2, 3]}
+
+    with ReplayServer() as server:
+        session, cache = _session(server, ttl=0)
+        results = []
+        for _ in range(3):
+            response = session.get(server.base_url + "/")
+            results.append(parse_with_cache(response, "homepage", parser, response.text))
+    assert len(calls) == 1
+    assert results[0] == results[1] == results[2]
+    # 返回副本，调用方修改结果不影响缓存
+    results[1]["items"].append(4)
+    assert results[2]["items"] == [1, 2, 3]
+    assert cache.stats.revalidated == 2
@@ -0,0 +1,44 @@
+"""
+默认 Session：相同配置值共用一个 Session（包括 list/dict 字段），超出缓存上限时关闭最久未使用的
+"""
+from collections import OrderedDict
+
+import pytest
+
+import http_session
+from config import ClientConfig
+from http_session import get_default_session
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    monkeypatch.setattr(http_session, "_default_sessions", OrderedDict())
+    monkeypatch.setattr(http_session, "DEFAULT_SESSION_CACHE_SIZE", 2)
+    return http_session._default_sessions
+
+
+def test_equal_configs_share_session(sessions):
+    def config(**kwargs):
+        return ClientConfig(headers={"X-Test": "1"}, retry_statuses=[502, 503], **kwargs)
+
+    session = get_default_session(config())
+    assert get_default_session(config()) is session
+    assert get_default_session(config(timeout=5)) is not session
+    assert get_default_session(ClientConfig(headers={"X-Test": "2"}, retry_statuses=[502, 503])) is not session
+    assert session.headers["X-Test"] == "1"
+
+
+def test_evicted_session_is_closed(sessions, monkeypatch):
+    closed = []
+    first = get_default_session(ClientConfig(timeout=1))
+    second = get_default_session(ClientConfig(timeout=2))
+    for session in (first, second):
+        monkeypatch.setattr(session, "close", lambda session=session: closed.append(session))
+
+    # 最近使用过的 first 保留，淘汰 second
+    assert get_default_session(ClientConfig(timeout=1)) is first
+    get_default_session(ClientConfig(timeout=3))
+    assert closed == [second]
+    assert len(sessions) == 2
+    assert get_default_session(ClientConfig(timeout=2)) is not second
+    assert closed == [second, first]
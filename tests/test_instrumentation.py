@@ -0,0 +1,83 @@
+"""
+统计 hook：注册后每次调用上报获取/解析/解密耗时和缓存结果，没有注册 hook 时不计时
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+import instrumentation
+from config import ClientConfig
+from http_cache import HttpCache
+from instrumentation import add_hook, remove_hook
+from video_url_cache import MemoryVideoUrlCache
+from yhdm_api import YhdmApi
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def server():
+    with ReplayServer() as server:
+        yield server
+
+
+@pytest.fixture
+def api(server, monkeypatch):
+    monkeypatch.setattr(instrumentation, "_hooks", [])
+    return YhdmApi(config=ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url),
+                   video_cache=MemoryVideoUrlCache(), http_cache=HttpCache())
+
+
+@pytest.fixture
+def recorded():
+    metrics = []
+    add_hook(metrics.append)
+    yield metrics
+    remove_hook(metrics.append)
+
+
+def test_video_url_metrics(api, recorded):
+    assert api.get_video_url(1, 1, 1) is not None
+    calls = {m.name: m for m in recorded}
+    assert [m.name for m in recorded].count("decrypt_url") == 2
+    video = calls["get_video_url"]
+    assert video.ok and video.cache == "miss" and video.bytes > 0
+    assert video.fetch_time > 0 and video.parse_time > 0 and video.decrypt_time > 0
+    assert video.extra["parse_path"]
+    decrypt = calls["decrypt_url"]
+    assert decrypt.ok and decrypt.cache == "miss" and decrypt.fetch_time > 0 and decrypt.decrypt_time > 0
+
+    recorded.clear()
+    assert api.get_video_url(1, 1, 1) is not None
+    [video] = recorded
+    assert video.cache == "hit" and video.fetch_time == 0 and video.decrypt_time == 0
+
+
+def test_page_metrics(api, recorded):
+    assert api.get_anime_detail(1) is not None
+    assert api.get_anime_detail(1) is not None
+    first, second = recorded
+    assert first.name == second.name == "get_anime_detail"
+    assert (first.cache, second.cache) == ("miss", "hit")
+    assert first.fetch_time > 0 and first.parse_time > 0 and first.bytes > 0
+
+
+def test_failing_hook_does_not_break_call(api, recorded):
+    def broken(metrics):
+        raise RuntimeError("hook")
+
+    add_hook(broken)
+    assert api.get_anime_detail(2) is not None
+    assert [m.name for m in recorded] == ["get_anime_detail"]
+
+
+def test_nothing_measured_without_hooks(api, monkeypatch):
+    def no_timer():
+        raise AssertionError("没有 hook 时不应计时")
+
+    monkeypatch.setattr(instrumentation, "time", SimpleNamespace(perf_counter=no_timer))
+    assert api.get_video_url(1, 2, 1) is not None
+    assert api.get_anime_detail(3) is not None
@@ -0,0 +1,69 @@
+"""
+紧凑模型（EpisodeList / StreamLine / Anime）与原先基于列表的用法保持兼容
+"""
+import json
+import pickle
+from dataclasses import asdict
+from datetime import datetime
+
+from yhdm_api import Anime, Episode, EpisodeList, StreamLine
+
+
+def _anime(stream_lines):
+    return Anime(1, "动漫", "", "连载", 2, [], "新番", "2024", "", stream_lines, datetime(2024, 1, 1))
+
+
+def test_episode_list_behaves_like_list():
+    episodes = [Episode(1, "第01集"), Episode(2, "第02集")]
+    compact = EpisodeList.from_episodes(episodes)
+    for change in (lambda lst: lst.append(Episode(3, "第03集")),
+                   lambda lst: lst.append(Episode(7, "特别篇")),
+                   lambda lst: lst.insert(0, Episode(0, "预告")),
+                   lambda lst: lst.__setitem__(1, Episode(5, "总集篇")),
+                   lambda lst: lst.__delitem__(slice(0, 2))):
+        change(episodes)
+        change(compact)
+        assert compact == episodes
+        assert list(compact) == episodes
+    assert pickle.loads(pickle.dumps(compact)) == episodes
+
+
+def test_episodes_are_stored_objects():
+    line = StreamLine(1, EpisodeList.from_titles(["第01集", "第02集"]))
+    line.episodes[0].title = "序章"
+    assert line.episodes[0] == Episode(1, "序章")
+    assert line.episodes.get(2) is line.episodes[1]
+    assert line.episodes.get(3) is None
+
+
+def test_asdict_is_json_serializable():
+    anime = _anime([StreamLine(1, EpisodeList.from_titles(["第01集"]))])
+    data = json.loads(json.dumps(asdict(anime), default=str))
+    assert data["stream_lines"] == [{"id": 1, "episodes": [{"id": 1, "title": "第01集"}]}]
+
+
+def test_pickle_keeps_ids():
+    episodes = EpisodeList.from_titles(["第01集", "第02集", "特别篇"], ids=[1, 2, 7])
+    restored = pickle.loads(pickle.dumps(episodes))
+    assert type(restored) is EpisodeList
+    assert restored == episodes
+    assert pickle.loads(pickle.dumps(EpisodeList.from_titles(["第01集"], start=5))) == [Episode(5, "第01集")]
+
+
+def test_stream_line_converts_assigned_lists():
+    line = StreamLine(1, [Episode(1, "第01集")])
+    assert isinstance(line.episodes, EpisodeList)
+    line.episodes = [Episode(1, "第01集"), Episode(2, "第02集")]
+    assert isinstance(line.episodes, EpisodeList)
+    line.episodes.append(Episode(3, "第03集"))
+    assert [episode.id for episode in line.episodes] == [1, 2, 3]
+
+
+def test_get_episodes_sees_replaced_lines():
+    anime = _anime([StreamLine(1, [Episode(1, "第01集")]), StreamLine(2, [])])
+    assert anime.get_episodes(1) == [Episode(1, "第01集")]
+    anime.stream_lines[0] = StreamLine(1, [Episode(1, "第01集"), Episode(2, "第02集")])
+    assert len(anime.get_episodes(1)) == 2
+    anime.stream_lines.append(StreamLine(3, [Episode(1, "第01集")]))
+    assert anime.get_episodes(3) == [Episode(1, "第01集")]
+    assert anime.get_episodes(4) is None
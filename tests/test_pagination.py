@@ -0,0 +1,92 @@
+"""
+分页：从分页链接解析总页数，iter_filter_anime / iter_search 并发请求其余页并按页码顺序产出去重后的结果
+"""
+import os
+import re
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from config import ClientConfig
+from conftest import read_fixture
+from yhdm_api import YhdmApi, parse_filter_results, parse_page_count, parse_search_results
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+
+def test_parse_page_count():
+    assert parse_page_count(read_fixture("filter.html")) == 12
+    assert parse_page_count(read_fixture("search.html")) == 12
+    assert parse_page_count(read_fixture("detail.html")) == 1
+    assert parse_page_count("<a href='/index.php/vod/show/?id=1&page=7'>7</a>") == 7
+    assert parse_page_count('<a href="/search?wd=x&amp;page=9">尾页</a><a href="/search?wd=x&amp;page=2">2</a>') == 9
+    assert parse_page_count('<a href="/index.php/vod/show/page/0/">0</a>') == 1
+
+
+class PagedServer(ReplayServer):
+    """
+    筛选/搜索结果按页码返回不同条目的回放服务器：第 n 页的动漫 id 为录制页面中的 id 加 (n - 1) * 1000，
+    repeat 中的页返回上一页的内容（翻页期间列表发生变化），delays 为 页码 -> 额外延迟(秒)
+    """
+    def __init__(self, repeat=(), delays=None):
+        self.repeat = set(repeat)
+        self.delays = delays or {}
+        self.pages = []
+        super().__init__()
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(super()._make_handler()):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if not url.path.startswith(("/index.php/vod/show/", "/index.php/vod/search/")):
+                    return super().do_GET()
+                page = int(parse_qs(url.query).get("page", ["1"])[0])
+                with server._lock:
+                    server.pages.append(page)
+                time.sleep(server.delays.get(page, 0))
+                shown = page - 1 if page in server.repeat else page
+                name = "filter.html" if url.path.startswith("/index.php/vod/show/") else "search.html"
+                body = re.sub(rb"/detail/id/(\d+)/",
+                              lambda m: b"/detail/id/%d/" % (int(m.group(1)) + (shown - 1) * 1000),
+                              server.fixtures[name])
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def _api(server):
+    return YhdmApi(config=ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url))
+
+
+def _page_ids(name, pages):
+    """PagedServer 在给定页码上返回的动漫 id，按页码顺序"""
+    parse = parse_filter_results if name == "filter.html" else parse_search_results
+    ids = [shell.id for shell in parse(read_fixture(name))]
+    return [anime_id + (page - 1) * 1000 for page in pages for anime_id in ids]
+
+
+@pytest.mark.parametrize("method, args, fixture", [("iter_filter_anime", (), "filter.html"),
+                                                   ("iter_search", ("异世界",), "search.html")])
+def test_iter_pages_in_order(method, args, fixture):
+    # 较早的页更慢，结果仍按页码顺序产出
+    with PagedServer(delays={2: 0.2, 3: 0.1}) as server:
+        shells = list(getattr(_api(server), method)(*args, max_workers=4, max_pages=5))
+    assert sorted(server.pages) == [1, 2, 3, 4, 5]
+    assert [shell.id for shell in shells] == _page_ids(fixture, range(1, 6))
+
+
+def test_iter_pages_dedupes_and_reads_all_pages():
+    with PagedServer(repeat={3}) as server:
+        shells = list(_api(server).iter_filter_anime(max_workers=4))
+    # 没有 max_pages 时请求分页链接中的全部 12 页；第 3 页重复第 2 页的条目，只产出一次
+    assert sorted(server.pages) == list(range(1, 13))
+    assert [shell.id for shell in shells] == _page_ids("filter.html", [1, 2] + list(range(4, 13)))
@@ -0,0 +1,98 @@
+"""
+流式读取播放页：默认读完剩余内容以复用连接，ClientConfig.play_page_drain_limit 设置后不再下载剩余内容
+"""
+import asyncio
+import os
+import socket
+import sys
+from dataclasses import replace
+
+import pytest
+
+import get_video_url_common
+from config import ClientConfig
+from get_video_url_common import get_play_page, parse_encrypted_video_url, read_play_page
+from http_session import create_session
+from yhdm_api import YhdmApi
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import FIXTURES_DIR, ReplayServer  # noqa: E402
+
+
+@pytest.fixture(scope="module")
+def config(tmp_path_factory):
+    # 播放器脚本之后追加 4MB 内容，大于客户端的读缓冲区，提前关闭连接时剩余内容不会被下载
+    fixtures_dir = tmp_path_factory.mktemp("fixtures")
+    for name in os.listdir(FIXTURES_DIR):
+        with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+            content = f.read()
+        if name == "play.html":
+            content = content.replace(b"</body>", b"<!--" + b"x" * (4 << 20) + b"--></body>")
+        (fixtures_dir / name).write_bytes(content)
+    with ReplayServer(fixtures_dir=str(fixtures_dir)) as server:
+        yield ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url)
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    """统计新建的 TCP 连接数"""
+    count = [0]
+    connect = socket.socket.connect
+
+    def counting_connect(self, *args):
+        count[0] += 1
+        return connect(self, *args)
+
+    monkeypatch.setattr(socket.socket, "connect", counting_connect)
+    return count
+
+
+@pytest.mark.parametrize("drain_limit", [None, 0])
+def test_read_play_page(config, drain_limit):
+    response = get_play_page(1, 1, 1, session=create_session(config), stream=True, config=config)
+    length = int(response.headers["Content-Length"])
+    html = read_play_page(response, drain_limit=drain_limit)
+    assert parse_encrypted_video_url(html) is not None
+    assert len(html.encode("utf-8")) < length
+    if drain_limit is None:
+        assert response.raw.tell() == length
+    else:
+        assert response.raw.tell() < length
+
+
+@pytest.mark.parametrize("drain_limit, expected", [(None, 1), (0, 3)])
+def test_connection_reuse(config, connections, drain_limit, expected):
+    session = create_session(config)
+    config = replace(config, play_page_drain_limit=drain_limit)
+    for _ in range(3):
+        assert get_video_url_common.fetch_encrypted_urls(1, 1, 1, session=session, config=config) is not None
+    assert connections[0] == expected
+
+
+def test_drain_limit_passed_through(config, monkeypatch):
+    seen = []
+
+    def recording_read_play_page(response, partial=True, **kwargs):
+        seen.append(kwargs.get("drain_limit"))
+        return read_play_page(response, partial, **kwargs)
+
+    monkeypatch.setattr(get_video_url_common, "read_play_page", recording_read_play_page)
+    api = YhdmApi(config=replace(config, play_page_drain_limit=1024))
+    assert api.get_video_url(1, 1, 1) is not None
+    assert list(api.resolve_stream_line(1, 1))
+    assert seen and set(seen) == {1024}
+
+
+@pytest.mark.parametrize("drain_limit, expected", [(None, 1), (0, 3)])
+def test_async_connection_reuse(config, connections, drain_limit, expected):
+    pytest.importorskip("aiohttp")
+    from yhdm_api_async import AsyncYhdmApi
+
+    async def main():
+        async with AsyncYhdmApi(config=replace(config, play_page_drain_limit=drain_limit)) as api:
+            for _ in range(3):
+                status, text = await api._get_play_page_text(1, 1, 1)
+                assert status == 200 and parse_encrypted_video_url(text) is not None
+
+    asyncio.run(main())
+    assert connections[0] == expected
@@ -0,0 +1,137 @@
+"""
+RequestScheduler 的异步等待：名额由 release 唤醒（包括其他线程中的 release），截止时间到达时抛出 DeadlineExceeded；\ndeadline() 的时限对批量详情和分页遍历的工作线程同样有效；截止时间导致的失败和被中断的请求不影响并发窗口
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+
+import pytest
+from requests.adapters import HTTPAdapter
+from requests.exceptions import Timeout
+
+import request_scheduler
+from config import ClientConfig
+from http_session import create_session
+from request_scheduler import DeadlineExceeded, RequestScheduler, deadline
+from yhdm_api import YhdmApi
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+
+def _full_scheduler():
+    scheduler = RequestScheduler(initial_concurrency=1, max_concurrency=1)
+    return scheduler, scheduler.acquire("host")
+
+
+def test_acquire_async_woken_by_release_in_other_thread():
+    scheduler, started = _full_scheduler()
+
+    async def main():
+        threading.Timer(0.05, scheduler.release, ("host", started), {"status": 200}).start()
+        return await asyncio.wait_for(scheduler.acquire_async("host"), 5)
+
+    scheduler.release("host", asyncio.run(main()), status=200)
+    assert scheduler.stats()["host"].in_flight == 0
+    assert not scheduler._async_waiters
+
+
+def test_acquire_async_limits_concurrency():
+    scheduler = RequestScheduler(initial_concurrency=2, max_concurrency=2)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        started = await scheduler.acquire_async("host")
+        peak = max(peak, scheduler.stats()["host"].in_flight)
+        await asyncio.sleep(0.005)
+        scheduler.release("host", started, status=200)
+
+    async def main():
+        await asyncio.wait_for(asyncio.gather(*(job() for _ in range(20))), 5)
+
+    asyncio.run(main())
+    assert peak == 2
+    assert scheduler.stats()["host"].requests == 20
+
+
+def test_acquire_async_deadline():
+    scheduler, _ = _full_scheduler()
+
+    async def main():
+        await scheduler.acquire_async("host", until=time.monotonic() + 0.05)
+
+    with pytest.raises(DeadlineExceeded):
+        asyncio.run(main())
+    assert not scheduler._async_waiters
+
+
+@pytest.fixture(scope="module")
+def api():
+    with ReplayServer() as server:
+        yield YhdmApi(config=ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url))
+
+
+def test_deadline_reaches_detail_workers(api, monkeypatch):
+    seen = []
+    get_detail_page = api._get_detail_page
+
+    def recording_get_detail_page(anime_id):
+        seen.append(request_scheduler.current_deadline())
+        return get_detail_page(anime_id)
+
+    monkeypatch.setattr(api, "_get_detail_page", recording_get_detail_page)
+    with deadline(30):
+        results = list(api.get_anime_details([1, 2, 3], concurrency=2, processes=0))
+    assert all(result.anime is not None for result in results)
+    assert len(seen) == 3 and None not in seen
+
+
+def test_deadline_reaches_page_workers(api):
+    seen = []
+
+    def get_page(page):
+        seen.append(request_scheduler.current_deadline())
+        return api._get_filter_page(1, "time", "", "", "", page)
+
+    with deadline(30):
+        assert list(api._iter_pages(get_page, api._parse_filter_page, max_workers=4, max_pages=5))
+    assert len(seen) == 5 and None not in seen
+
+
+def test_release_neutral_keeps_window():
+    scheduler = RequestScheduler(initial_concurrency=4, max_concurrency=8)
+    started = scheduler.acquire("host")
+    scheduler.release("host", started, error=TimeoutError(), neutral=True)
+    stats = scheduler.stats()["host"]
+    assert (stats.limit, stats.in_flight, stats.errors, stats.latency) == (4, 0, 0, None)
+
+
+def _scheduled_session(server):
+    scheduler = RequestScheduler(initial_concurrency=4, max_concurrency=8)
+    config = ClientConfig(api_base_url=server.base_url, timeout=5, scheduler=scheduler, max_retries=3)
+    return create_session(config), scheduler, server.base_url.split("://", 1)[1]
+
+
+def test_deadline_timeout_keeps_window():
+    with ReplayServer(latency=0.5) as server:
+        session, scheduler, host = _scheduled_session(server)
+        with pytest.raises(Timeout), deadline(0.1):
+            session.get(server.base_url + "/")
+    stats = scheduler.stats()[host]
+    assert (stats.limit, stats.in_flight, stats.errors) == (4, 0, 0)
+
+
+def test_interrupted_request_is_not_success(monkeypatch):
+    def interrupted_send(self, request, **kwargs):
+        raise KeyboardInterrupt
+
+    with ReplayServer() as server:
+        session, scheduler, host = _scheduled_session(server)
+        monkeypatch.setattr(HTTPAdapter, "send", interrupted_send)
+        with pytest.raises(KeyboardInterrupt):
+            session.get(server.base_url + "/")
+    stats = scheduler.stats()[host]
+    assert (stats.limit, stats.in_flight, stats.latency) == (4, 0, None)
@@ -0,0 +1,123 @@
+"""
+resolve_episodes：相同加密地址只解密一次且每集都会产出，url_next 缺失或播放页请求失败时单独补请求下一集
+"""
+import os
+import re
+import sys
+import time
+
+from config import ClientConfig
+from get_video_url_common import resolve_episodes
+from http_session import create_session
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+from replay_server import ReplayServer  # noqa: E402
+
+PLAYER_URLS = '"url":"qw_22214_1_1%3D%3D","url_next":"qw_22214_1_2%3D%3D"'
+
+
+class EpisodeServer(ReplayServer):
+    """
+    按集数返回不同播放页的回放服务器
+
+    pages: 集数 -> (url, url_next)，为 None 或不在其中时返回 404
+    delays: 集数 -> 播放页的额外延迟(秒)
+    """
+    def __init__(self, pages, delays=None):
+        self.pages = pages
+        self.delays = delays or {}
+        self.play_requests = []
+        self.decrypt_requests = 0
+        super().__init__()
+
+    def _play_page(self, episode):
+        urls = self.pages.get(episode)
+        if urls is None:
+            return None
+        url, url_next = urls
+        html = self.fixtures["play.html"].decode("utf-8")
+        assert PLAYER_URLS in html
+        return html.replace(PLAYER_URLS, f'"url":"{url}","url_next":"{url_next}"').encode("utf-8")
+
+    def _make_handler(self):
+        server = self
+        base = super()._make_handler()
+
+        class Handler(base):
+            def do_GET(self):
+                match = re.search(r"/vod/play/.*/nid/(\d+)/", self.path)
+                if match is None:
+                    if self.path.startswith("/player/ec.php"):
+                        with server._lock:
+                            server.decrypt_requests += 1
+                    return super().do_GET()
+                episode = int(match.group(1))
+                with server._lock:
+                    server.play_requests.append(episode)
+                time.sleep(server.delays.get(episode, 0))
+                body = server._play_page(episode)
+                self.send_response(404 if body is None else 200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+        return Handler
+
+
+def _pages(count, overrides=None):
+    """每集的播放页给出本集和下一集各自的加密地址，overrides 覆盖指定集"""
+    pages = {ep: (f"qw_22214_1_{ep}", f"qw_22214_1_{ep + 1}" if ep < count else "") for ep in range(1, count + 1)}
+    pages.update(overrides or {})
+    return pages
+
+
+def _resolve(server, episode_ids, max_workers=4):
+    config = ClientConfig(api_base_url=server.base_url, player_base_url=server.base_url)
+    results = list(resolve_episodes(22214, 1, episode_ids, session=create_session(config),
+                                    max_workers=max_workers, config=config))
+    assert len(results) == len(set(episode_ids))
+    return dict(results)
+
+
+def test_each_page_covers_next_episode():
+    with EpisodeServer(_pages(6)) as server:
+        results = _resolve(server, range(1, 7))
+    assert None not in results.values()
+    assert sorted(server.play_requests) == [1, 3, 5]
+    assert server.decrypt_requests == 6
+
+
+def test_duplicate_encrypted_urls():
+    # 所有集共用同一加密地址；第5集的播放页较慢，到达时该地址已经解密完成
+    pages = {ep: ("qw_22214_1_1", "qw_22214_1_1") for ep in range(1, 7)}
+    with EpisodeServer(pages, delays={5: 0.3}) as server:
+        results = _resolve(server, range(1, 7))
+    assert sorted(results) == [1, 2, 3, 4, 5, 6]
+    assert None not in results.values()
+    assert server.decrypt_requests == 1
+
+
+def test_missing_url_next():
+    with EpisodeServer(_pages(4, {1: ("qw_22214_1_1", ""), 3: ("qw_22214_1_3", "")})) as server:
+        results = _resolve(server, range(1, 5))
+    assert None not in results.values()
+    assert sorted(server.play_requests) == [1, 2, 3, 4]
+
+
+def test_failed_play_page():
+    # 第1集的播放页请求失败，第2集单独请求
+    with EpisodeServer(_pages(4, {1: None})) as server:
+        results = _resolve(server, range(1, 5))
+    assert results[1] is None
+    assert None not in (results[2], results[3], results[4])
+    assert sorted(server.play_requests) == [1, 2, 3]
+
+
+def test_failed_next_episode_lookup():
+    # 第1集没有 url_next，补请求的第2集播放页失败，不影响其他集
+    with EpisodeServer(_pages(4, {1: ("qw_22214_1_1", ""), 2: None})) as server:
+        results = _resolve(server, range(1, 5))
+    assert results[2] is None
+    assert None not in (results[1], results[3], results[4])
+    assert sorted(server.play_requests) == [1, 2, 3]
@@ -0,0 +1,66 @@
+"""
+serialization 的往返：录制页面的解析结果经 JSON / MessagePack 编码后按类型还原，应与原对象相等
+"""
+from typing import List
+
+import pytest
+
+from conftest import read_fixture
+from serialization import dumps_binary, dumps_json, loads_binary, loads_json
+from yhdm_api import (Anime, AnimeDetailResult, AnimeShell, Episode, StreamLine, parse_anime_detail,
+                      parse_filter_results)
+from yhdm_home_html_parser import YhdmParser
+
+
+def _anime():
+    anime = parse_anime_detail(read_fixture("detail.html"), 22214)
+    # id 不连续的线路保存为 {"ids", "titles"}
+    anime.stream_lines.append(StreamLine(99, [Episode(1, "第01集"), Episode(3, "第03集")]))
+    return anime
+
+
+PAYLOADS = {
+    "anime": lambda: (_anime(), Anime),
+    "anime_shells": lambda: (parse_filter_results(read_fixture("filter.html")), List[AnimeShell]),
+    "detail_results": lambda: ([AnimeDetailResult(22214, _anime()), AnimeDetailResult(1, None)],
+                               List[AnimeDetailResult]),
+    "homepage": lambda: (YhdmParser().generate_data(read_fixture("homepage.html")), None),
+}
+
+
+def _binary_codec():
+    pytest.importorskip("msgpack")
+    return dumps_binary, loads_binary
+
+
+CODECS = {
+    "json": lambda: (dumps_json, loads_json),
+    "msgpack": _binary_codec,
+}
+
+
+@pytest.mark.parametrize("codec", list(CODECS))
+@pytest.mark.parametrize("payload", list(PAYLOADS))
+def test_round_trip(payload, codec):
+    dumps, loads = CODECS[codec]()
+    obj, cls = PAYLOADS[payload]()
+    assert obj
+    restored = loads(dumps(obj), cls)
+    assert restored == obj
+    assert type(restored) is type(obj)
+
+
+def test_detail_result_error_round_trip():
+    result = AnimeDetailResult(1, None, ValueError("详情页缺少标题或封面"))
+    restored = loads_json(dumps_json(result), AnimeDetailResult)
+    assert restored.anime is None
+    assert str(restored.error) == "ValueError: 详情页缺少标题或封面"
+
+
+def test_binary_requires_msgpack(monkeypatch):
+    import serialization
+    monkeypatch.setattr(serialization, "msgpack", None)
+    with pytest.raises(ImportError):
+        dumps_binary({"id": 1})
+    with pytest.raises(ImportError):
+        loads_binary(b"\x80")
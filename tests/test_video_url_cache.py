@@ -0,0 +1,96 @@
+"""
+视频地址缓存：内存 LRU 与过期、SQLite 按 evict_interval 淘汰、命中/未命中/淘汰计数，以及 ttl_from_url
+"""
+import sqlite3
+import time
+
+import pytest
+
+from video_url_cache import CacheStats, MemoryVideoUrlCache, SqliteVideoUrlCache, VideoUrlCache, ttl_from_url
+
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        VideoUrlCache()
+
+    class GetOnlyCache(VideoUrlCache):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        GetOnlyCache()
+
+
+def test_memory_lru():
+    cache = MemoryVideoUrlCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c"), len(cache)) == (1, 3, 2)
+    assert cache.stats == CacheStats(hits=3, misses=1, evictions=1)
+
+
+def test_memory_ttl():
+    cache = MemoryVideoUrlCache(default_ttl=0.05)
+    cache.set("default", 1)
+    cache.set("long", 2, ttl=60)
+    cache.set("disabled", 3, ttl=0)
+    assert len(cache) == 2
+    time.sleep(0.1)
+    assert cache.get("default") is None
+    assert cache.get("long") == 2
+    assert cache.stats == CacheStats(hits=1, misses=1, evictions=1)
+    cache.clear()
+    assert len(cache) == 0
+
+
+def _keys(path):
+    with sqlite3.connect(path) as conn:
+        return {key for key, in conn.execute("SELECT key FROM video_url_cache")}
+
+
+def test_sqlite_evict_interval(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SqliteVideoUrlCache(path, max_entries=2, evict_interval=3)
+    for i in range(3):
+        cache.set(f"k{i}", i)
+    # 条目数在下一次检查前可以暂时超出 max_entries
+    assert _keys(path) == {"k0", "k1", "k2"}
+    assert cache.get("k0") == 0
+    cache.set("k3", 3)
+    assert _keys(path) == {"k0", "k3"}
+    cache.set("k4", 4)
+    assert _keys(path) == {"k0", "k3", "k4"}
+    assert cache.stats == CacheStats(hits=1, misses=0, evictions=2)
+
+
+def test_sqlite_ttl_and_values(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = SqliteVideoUrlCache(path, default_ttl=0.05)
+    cache.set("pair", ("https://a/1.m3u8", None), ttl=60)
+    cache.set("short", "https://a/2.m3u8")
+    cache.set("disabled", "https://a/3.m3u8", ttl=0)
+    time.sleep(0.1)
+    # 其他进程打开同一文件也能读到
+    other = SqliteVideoUrlCache(path)
+    assert other.get("pair") == ("https://a/1.m3u8", None)
+    assert other.get("short") is None
+    assert other.get("disabled") is None
+    assert other.stats == CacheStats(hits=1, misses=2, evictions=1)
+    cache.clear()
+    assert _keys(path) == set()
+
+
+def test_ttl_from_url():
+    now = int(time.time())
+    assert ttl_from_url("https://cdn/v.m3u8", 600) == 600
+    assert ttl_from_url(f"https://cdn/v.m3u8?expires={now + 300}", 600) == pytest.approx(270, abs=2)
+    assert ttl_from_url(f"https://cdn/v.m3u8?t={now + 300}", 600, margin=0) == pytest.approx(300, abs=2)
+    # 不超过 default_ttl
+    assert ttl_from_url(f"https://cdn/v.m3u8?e={now + 3600}", 600) == 600
+    # 即将过期时为 0，已过期或不是 10 位时间戳的参数被忽略
+    assert ttl_from_url(f"https://cdn/v.m3u8?expire={now + 10}", 600) == 0
+    assert ttl_from_url(f"https://cdn/v.m3u8?deadline={now - 10}", 600) == 600
+    assert ttl_from_url("https://cdn/v.m3u8?expires=12345", 600) == 600
@@ -0,0 +1,219 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Any
+from urllib.parse import urlparse, parse_qsl
+
+
+# 签名链接中常见的过期时间参数
+_EXPIRES_PARAMS = ("expires", "expire", "expiry", "deadline", "e", "t")
+_UNIX_TS_RE = re.compile(r"^\d{10}$")
+
+
+def ttl_from_url(url: str, default_ttl: float, margin: float = 30) -> float:
+    """
+    根据签名链接中的过期时间参数推算缓存时长
+
+    链接中没有可识别的过期时间时返回 default_ttl；
+    margin 为提前失效的秒数，避免返回即将过期的链接
+    """
+    try:
+        query = dict(parse_qsl(urlparse(url).query))
+    except ValueError:
+        return default_ttl
+    now = time.time()
+    for name in _EXPIRES_PARAMS:
+        value = query.get(name)
+        if value and _UNIX_TS_RE.match(value):
+            expires_at = int(value)
+            if expires_at > now:
+                return max(0.0, min(default_ttl, expires_at - now - margin))
+    return default_ttl
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class VideoUrlCache(ABC):
+    """
+    解密结果缓存接口
+
+    get 未命中或已过期时返回 None；set 的 ttl 为 None 时使用缓存默认时长。
+    自定义共享后端（如 redis）需实现 get / set / clear，并通过 _record 维护 stats。
+    blocking 为 True 的后端（有磁盘或网络 IO）在 AsyncYhdmApi 中放到线程池里调用，不阻塞事件循环。
+    """
+    blocking = False
+
+    def __init__(self, default_ttl: float = 600):
+        self.default_ttl = default_ttl
+        self.stats = CacheStats()
+        self._stats_lock = threading.Lock()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def _record(self, hits: int = 0, misses: int = 0, evictions: int = 0):
+        with self._stats_lock:
+            self.stats.hits += hits
+            self.stats.misses += misses
+            self.stats.evictions += evictions
+
+
+class MemoryVideoUrlCache(VideoUrlCache):
+    """
+    进程内 LRU 缓存，每个条目单独设置过期时间
+    """
+    def __init__(self, max_entries: int = 10000, default_ttl: float = 600):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (过期时间, 值)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._record(misses=1)
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self._record(misses=1, evictions=1)
+                return None
+            self._entries.move_to_end(key)
+            self._record(hits=1)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            if evicted:
+                self._record(evictions=evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteVideoUrlCache(VideoUrlCache):
+    """
+    基于 SQLite 文件的缓存，可在同一台机器的多个进程间共享
+
+    值以 json 形式保存，超出 max_entries 时按最近访问时间淘汰。
+    统计条目数需要扫描整张表，因此每 evict_interval 次写入才检查一次，
+    条目数可能暂时超出 max_entries 至多 evict_interval（每个进程）
+    """
+    blocking = True
+
+    def __init__(self, path: str = "video_url_cache.sqlite3", max_entries: int = 100000, default_ttl: float = 600,
+                 evict_interval: int = 1000):
+        super().__init__(default_ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self.evict_interval = max(1, evict_interval)
+        self._writes = 0
+        self._writes_lock = threading.Lock()
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS video_url_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_video_url_cache_accessed ON video_url_cache(accessed_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        # sqlite3 连接不能跨线程使用，每个线程各自持有一个
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM video_url_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self._record(misses=1)
+            return None
+        value, expires_at = row
+        with conn:
+            if expires_at <= now:
+                conn.execute("DELETE FROM video_url_cache WHERE key = ?", (key,))
+                self._record(misses=1, evictions=1)
+                return None
+            conn.execute("UPDATE video_url_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self._record(hits=1)
+        value = json.loads(value)
+        return tuple(value) if isinstance(value, list) else value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        conn = self._connect()
+        now = time.time()
+        with self._writes_lock:
+            evict = self._writes % self.evict_interval == 0
+            self._writes += 1
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO video_url_cache (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), now + ttl, now),
+            )
+            if not evict:
+                return
+            overflow = conn.execute("SELECT COUNT(*) FROM video_url_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM video_url_cache WHERE key IN"
+                    " (SELECT key FROM video_url_cache ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self._record(evictions=overflow)
+
+    def clear(self) -> None:
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM video_url_cache")
+
+
+def decrypt_cache_key(encrypted_url: str) -> str:
+    return f"decrypt:{encrypted_url}"
+
+
+def video_cache_key(anime_id, episode, stream_id, resolve_next) -> str:
+    return f"video:{anime_id}:{stream_id}:{episode}:{int(bool(resolve_next))}"
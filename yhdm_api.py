@@ -1,18 +1,30 @@
 import requests
-from bs4 import BeautifulSoup
-from typing import Optional, List, Dict, Any, Tuple
-from dataclasses import dataclass
+from typing import Optional, List, Dict, Any, Tuple, Iterator, Iterable, Union, Callable
+from dataclasses import dataclass, fields as dataclass_fields, replace
 import time
 import json
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+import contextvars
+import os
 import re
+import sys
 import base64
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
 from urllib.parse import unquote
 
-from config import USER_AGENT, YHDM_API_BASE_URL, YHDM_PLAYER_BASE_URL
-from get_video_url_common import get_video_url
+from html_backend import make_soup, get_parser_backend
+from instrumentation import get_logger, CallMetrics, hooks_enabled, emit
+from config import ClientConfig, DEFAULT_CONFIG, YHDM_API_BASE_URL
+from get_video_url_common import get_video_url, resolve_episodes
+from http_session import create_session, create_adapter
+from video_url_cache import VideoUrlCache
+from http_cache import HttpCache, CachingHTTPAdapter, parse_with_cache
+from catalog_index import CatalogIndex, CatalogEntry
+
+
+logger = get_logger(__name__)
 
 
 @dataclass
@@ -42,16 +54,95 @@ class AnimeShell:
 
 @dataclass
 class Episode:
+    __slots__ = ('id', 'title')
     id: int  # 分集ID（数字）
     title: str  # 分集标题（显示文本）
 
+
+class EpisodeList(list):
+    """
+    分集列表：保存 Episode 对象的 list 子类，修改、比较和 dataclasses.asdict 都与 List[Episode] 相同
+
+    与普通列表的区别：
+      - from_titles 按标题构造，标题经 sys.intern 驻留（"第01集" 之类在所有动漫间共用同一个字符串）
+      - get 按分集ID查找，id 连续时为 O(1)
+      - pickle（如进程池返回结果）时只保存标题和不连续的 id，还原后重新驻留标题
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_titles(cls, titles: Iterable[str], start: int = 1, ids: Optional[Iterable[int]] = None) -> "EpisodeList":
+        """按标题构造，ids 为 None 时分集ID为从 start 开始的连续序号"""
+        titles = [sys.intern(title) for title in titles]
+        if ids is None:
+            ids = range(start, start + len(titles))
+        else:
+            ids = list(ids)
+            if len(ids) != len(titles):
+                raise ValueError("ids 与 titles 的长度不一致")
+        return cls(map(Episode, ids, titles))
+
+    @classmethod
+    def from_episodes(cls, episodes: Iterable[Episode]) -> "EpisodeList":
+        if isinstance(episodes, cls):
+            return episodes
+        return cls(episodes)
+
+    def compact(self) -> Tuple[int, List[str], Optional[List[int]]]:
+        """返回 (起始id, 标题列表, id 列表)，id 为从起始id开始的连续序号时 id 列表为 None"""
+        titles = [episode.title for episode in self]
+        ids = [episode.id for episode in self]
+        start = ids[0] if ids else 1
+        if ids == list(range(start, start + len(ids))):
+            return start, titles, None
+        return start, titles, ids
+
+    def get(self, episode_id: int) -> Optional[Episode]:
+        """按分集ID查找，id 连续时为 O(1)"""
+        if self:
+            index = episode_id - self[0].id
+            if 0 <= index < len(self) and self[index].id == episode_id:
+                return self[index]
+        for episode in self:
+            if episode.id == episode_id:
+                return episode
+        return None
+
+    def __reduce__(self):
+        return _episode_list_from_compact, self.compact()
+
+
+def _episode_list_from_compact(start: int, titles: List[str], ids: Optional[List[int]]) -> EpisodeList:
+    return EpisodeList.from_titles(titles, start, ids)
+
+
 @dataclass
 class StreamLine:
+    __slots__ = ('id', '_episodes')
     id: int  # 播放线路ID
-    episodes: List[Episode]  # 该线路的分集列表
+    episodes: EpisodeList  # 该线路的分集列表，赋值 List[Episode]（包括构造时传入）会复制为 EpisodeList
+
+
+def _get_stream_line_episodes(self) -> EpisodeList:
+    return self._episodes
+
+
+def _set_stream_line_episodes(self, episodes: Iterable[Episode]):
+    self._episodes = EpisodeList.from_episodes(episodes)
+
+
+# dataclass 会把类体中同名的属性当作字段默认值，所以在类创建之后再定义 property
+StreamLine.episodes = property(_get_stream_line_episodes, _set_stream_line_episodes)
+
+
+def _intern(text):
+    return sys.intern(text) if type(text) is str else text
+
 
 @dataclass
 class Anime:
+    __slots__ = ('id', 'name', 'image_url', 'status', 'latest_episode', 'tags', 'type', 'year',
+                 'description', 'stream_lines', 'last_update')
     id: int
     name: str
     image_url: str
@@ -64,252 +155,571 @@ class Anime:
     stream_lines: List[StreamLine]  # 改用stream_lines替代stream_ids
     last_update: datetime
 
+    def __post_init__(self):
+        # 状态、类型、年份和标签的取值很少，驻留后大量动漫共用同一批字符串
+        self.status = _intern(self.status)
+        self.type = _intern(self.type)
+        self.year = _intern(self.year)
+        self.tags = [_intern(tag) for tag in self.tags]
+
+    def __getstate__(self):
+        return tuple(getattr(self, f.name) for f in dataclass_fields(self))
+
+    def __setstate__(self, state):
+        for f, value in zip(dataclass_fields(self), state):
+            object.__setattr__(self, f.name, value)
+        self.__post_init__()
+
     def get_stream_ids(self) -> set:
         """获取所有播放线路ID的集合"""
         return {line.id for line in self.stream_lines}
 
-    def get_episodes(self, stream_id: int) -> Optional[List[Episode]]:
+    def get_episodes(self, stream_id: int) -> Optional[EpisodeList]:
         """获取指定播放线路的分集列表"""
         for line in self.stream_lines:
             if line.id == stream_id:
                 return line.episodes
         return None
 
+@dataclass
+class AnimeDetailResult:
+    """批量获取详情时单个ID的结果, 请求或解析失败时 anime 为 None 且 error 为对应异常"""
+    id: int
+    anime: Optional[Anime]
+    error: Optional[BaseException] = None
+
+
+def parse_homepage(html: str, backend: Optional[str] = None,
+                   base_url: str = YHDM_API_BASE_URL) -> List[Dict[str, Any]]:
+    """解析首页HTML，返回动漫条目列表，相对链接以 base_url 补全"""
+    soup = make_soup(html, backend)
+
+    # 获取所有动漫条目
+    items = soup.find_all('li', class_='vodlist_item')
+
+    results = []
+    for item in items:
+        # 获取标题和链接
+        title_link = item.find('a', class_='vodlist_thumb')
+        if not title_link:
+            continue
+
+        title = title_link.get('title', '')
+        link = title_link.get('href', '')
+        if link and not link.startswith('http'):
+            link = base_url + link
+
+        # 从链接中提取动漫ID
+        anime_id = 0
+        if link:
+            try:
+                anime_id = int(link.split('/')[-2])
+            except (ValueError, IndexError):
+                pass
+
+        # 获取图片 URL
+        image_url = title_link.get('data-original', '')
+
+        # 获取年份和类型
+        year_span = item.find('em', class_='voddate_year')
+        type_span = item.find('em', class_='voddate_type')
+        year = year_span.text if year_span else ''
+        type_text = type_span.text if type_span else ''
+
+        # 获取状态
+        status_span = item.find('span', class_='pic_text')
+        status = status_span.text if status_span else ''
+
+        # 获取描述
+        desc_div = item.find('div', class_='vodlist_titbox')
+        desc = ''
+        if desc_div:
+            desc_p = desc_div.find('p', class_='vodlist_sub')
+            if desc_p:
+                desc = desc_p.text.strip()
+
+        results.append({
+            'id': anime_id,
+            'title': title,
+            'link': link,
+            'image_url': image_url,
+            'year': year,
+            'type': type_text,
+            'status': status,
+            'description': desc
+        })
+
+    return results
+
+
+def parse_search_results(html: str, backend: Optional[str] = None) -> List[AnimeShell]:
+    """解析搜索结果页"""
+    soup = make_soup(html, backend)
+
+    results = []
+    for li in soup.select("li.searchlist_item"):
+        a = li.select_one(".searchlist_img > a")
+        if a:
+            results.append(AnimeShell(
+                id=int(a['href'].split('/')[-2]),
+                name=a['title'],
+                image_url=a.get('data-original'),
+                status=li.find('span', class_='pic_text').text if li.find('span', class_='pic_text') else ''
+            ))
+    return results
+
+
+def parse_search_suggestions(data: Dict[str, Any]) -> List[str]:
+    """从搜索建议接口返回的json中提取建议列表"""
+    suggests = []
+    if isinstance(data.get('list'), list):
+        for item in data['list']:
+            if isinstance(item, dict) and 'name' in item:
+                suggests.append(item['name'])
+    return suggests
+
+
+def index_detail_fields(data_items) -> Dict[str, Any]:
+    """
+    一次遍历详情页的 .content_detail li.data，建立 标签文字(去掉冒号) -> 标签 span 的索引，
+    字段值为 span 之后的兄弟节点；同名标签保留第一次出现的
+    """
+    index = {}
+    for li in data_items:
+        for span in li.find_all('span'):
+            label = span.get_text().strip().rstrip('：:').strip()
+            if label and label not in index:
+                index[label] = span
+    return index
+
+
+def detail_field(index: Dict[str, Any], label: str):
+    """按标签取出 span，标签文字中含有其他内容时(如 "上映年份")按包含关系匹配，找不到时返回 None"""
+    span = index.get(label)
+    if span is not None:
+        return span
+    for key, span in index.items():
+        if label in key:
+            return span
+    return None
+
+
+def parse_anime_detail(html: str, anime_id: int, backend: Optional[str] = None) -> Optional[Anime]:
+    """解析动漫详情页，不是详情页或缺少字段时返回 None"""
+    soup = make_soup(html, backend)
+
+    try:
+        return _parse_anime_detail(soup, anime_id)
+    except Exception as e:
+        logger.warning("解析动漫详情失败: %s", e)
+        return None
+
+
+def parse_anime_detail_or_raise(html: str, anime_id: int, backend: Optional[str] = None) -> Anime:
+    """
+    与 parse_anime_detail 相同，但解析失败时抛出异常而不是返回 None，
+    供 get_anime_details 把失败原因记录到 AnimeDetailResult.error（可在子进程中执行）
+    """
+    anime = _parse_anime_detail(make_soup(html, backend), anime_id)
+    if anime is None:
+        raise ValueError(f"动漫 {anime_id} 的详情页缺少标题或封面")
+    return anime
+
+
+def _parse_anime_detail(soup, anime_id: int) -> Optional[Anime]:
+    """parse_anime_detail 的实现，缺少标题或封面时返回 None，其余字段缺失时抛出异常"""
+    # 获取基本信息
+    content_thumb = soup.select_one(".content_thumb > a")
+    content_detail = soup.select_one(".content_detail h2")
+    if not content_thumb or not content_detail:
+        return None
+
+    image_url = content_thumb.get('data-original')
+    name = content_detail.text.strip()
+
+    # 获取详细信息
+    # 缺少任一字段时下面的属性访问会抛出异常
+    fields = index_detail_fields(soup.select(".content_detail li.data"))
+    year = detail_field(fields, '年份').next_sibling.text.strip()
+    tags = [tag.text.strip() for tag in detail_field(fields, '类型').next_siblings]
+    status = detail_field(fields, '状态').next_sibling.text.strip()
+    description = soup.select_one(".content .full_text > span").text.strip()
+    type = soup.select_one("ul.top_nav > li.active").text.strip()
+
+    # 获取播放列表
+    latest_episode = None
+    stream_lines = []
+    seen_stream_ids = set()  # 用于跟踪已经添加的线路ID
+
+    # 获取所有分集列表
+    episode_lists = soup.select("ul.content_playlist")
+    logger.debug("解析动漫 %s 的播放列表, 找到 %d 个分集列表", anime_id, len(episode_lists))
+
+    for episode_list in episode_lists:
+        # 获取该列表中的所有分集链接
+        episode_links = episode_list.select("a")
+        if not episode_links:
+            logger.debug("未找到分集链接，跳过此列表")
+            continue
+
+        # 从第一个分集链接的href中提取线路ID
+        first_link = episode_links[0]
+        href = first_link.get('href', '')
+        match = re.search(r'/sid/(\d+)/', href)
+        if not match:
+            logger.debug("无法从链接中提取线路ID: %s", href)
+            continue
+
+        stream_id = int(match.group(1))
+
+        # 检查是否已经添加过这个线路ID
+        if stream_id in seen_stream_ids:
+            logger.debug("线路ID %s 已存在，跳过", stream_id)
+            continue
+
+        seen_stream_ids.add(stream_id)
+
+        # 生成分集列表，同时统计实际集数（只计算以"第"开头的链接）
+        # 分集ID为从1开始的连续序号，由 EpisodeList 隐式表示
+        titles = []
+        regular_count = 0
+        for link in episode_links:
+            episode_title = link.text.strip()
+            if episode_title:  # 只要标题不为空就添加
+                titles.append(episode_title)
+                if episode_title.startswith("第"):
+                    regular_count += 1
+        episodes = EpisodeList.from_titles(titles)
+
+        # 更新最新集数（只考虑常规集数）
+        if type != "动漫电影":
+            latest_episode = max(regular_count, latest_episode or 0)
+
+        # 添加播放线路信息
+        stream_lines.append(StreamLine(id=stream_id, episodes=episodes))
+        logger.debug("线路 %s 添加了 %d 个分集 (常规: %d, 特别篇: %d)",
+                     stream_id, len(episodes), regular_count, len(episodes) - regular_count)
+
+
+    return Anime(
+        id=anime_id,
+        name=name,
+        image_url=image_url,
+        status=status,
+        latest_episode=latest_episode or 1 if type == "动漫电影" else latest_episode or 0,
+        tags=tags,
+        type=type if type else "未知",
+        year=year if year else "未知",
+        description=description,
+        stream_lines=stream_lines,
+        last_update=datetime.now()
+    )
+
+
+def parse_filter_results(html: str, backend: Optional[str] = None) -> List[AnimeShell]:
+    """解析筛选结果页"""
+    soup = make_soup(html, backend)
+
+    results = []
+    for li in soup.select(".vodlist_wi > .vodlist_item"):
+        a = li.find('a')
+        if a:
+            results.append(AnimeShell(
+                id=int(a['href'].split('/')[-2]),
+                name=a['title'],
+                image_url=a.get('data-original'),
+                status=a.find('span', class_='pic_text').text if a.find('span', class_='pic_text') else ''
+            ))
+    return results
+
+
+# 分页链接中的页码, 如 /page/5/ 或 ?page=5
+_PAGE_LINK_RE = re.compile(r'href\s*=\s*["\'][^"\']*?(?:/page/|[?&](?:amp;)?page=)(\d+)')
+
+
+def parse_page_count(html: str) -> int:
+    """从分页链接中解析总页数, 没有分页时返回1"""
+    pages = [int(page) for page in _PAGE_LINK_RE.findall(html)]
+    return max(pages, default=1) or 1
+
+
+def build_search_params(keyword: str, tag: str = "", actor: str = "", page: int = 1) -> Dict[str, Any]:
+    """构造搜索接口参数"""
+    return {
+        "wd": keyword,
+        "class": tag,
+        "actor": actor,
+        "page": page
+    }
+
+
+def build_suggest_params(keyword: str, limit: int = 10) -> Dict[str, Any]:
+    """构造搜索建议接口参数"""
+    return {
+        "mid": 1,
+        "wd": keyword,
+        "limit": limit,
+        "timestamp": int(time.time() * 1000)
+    }
+
+
+def build_filter_params(type: int = 1,
+                        order_by: str = "time",
+                        genre: str = "",
+                        year: str = "",
+                        letter: str = "",
+                        page: int = 1) -> Dict[str, Any]:
+    """构造筛选接口参数"""
+    return {
+        "id": type,
+        "by": order_by,
+        "class": genre,
+        "year": year,
+        "letter": letter,
+        "page": page
+    }
+
+
+SEARCH_PATH = "/index.php/vod/search/"
+SUGGEST_PATH = "/index.php/ajax/suggest"
+FILTER_PATH = "/index.php/vod/show/"
+FILTER_REFERER_PATH = "/index.php/vod/show/id/1/"
+
+# get_anime_details 未指定 processes 时，ID 数量达到该值才启动解析进程池（单页解析约 10ms，
+# 批次较小时进程启动和导入模块的开销大于多核解析节省的时间）
+DETAIL_PROCESS_MIN_BATCH = 64
+
+
+def detail_path(anime_id: int) -> str:
+    return f"/index.php/vod/detail/id/{anime_id}/"
+
+
 class YhdmApi:
     """
     樱花动漫-api
     """
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            "User-Agent": USER_AGENT,
-            "Referer": YHDM_API_BASE_URL
-        })
+    def __init__(self,
+                 pool_connections: Optional[int] = None,
+                 pool_maxsize: Optional[int] = None,
+                 keep_alive: Optional[bool] = None,
+                 video_cache: Optional[VideoUrlCache] = None,
+                 http_cache: Optional[HttpCache] = None,
+                 config: Optional[ClientConfig] = None,
+                 catalog: Optional[CatalogIndex] = None,
+                 catalog_fallback: bool = True):
+        """
+        Args:
+            pool_connections (int, optional): 缓存的连接池数量(按主机区分), 覆盖 config 中的值. 默认为4.
+            pool_maxsize (int, optional): 每个主机保留的最大连接数, 覆盖 config 中的值. 默认为32.
+            keep_alive (bool, optional): 是否复用连接, 覆盖 config 中的值. 默认为True.
+            video_cache (VideoUrlCache, optional): 视频地址解密结果缓存, 如 MemoryVideoUrlCache(). 默认不缓存.
+            http_cache (HttpCache, optional): 首页/详情/筛选/搜索页的HTTP响应缓存, 使用条件请求重新验证. 默认不缓存.
+            config (ClientConfig, optional): 站点地址、超时、连接池、重试策略和请求头. 默认为 DEFAULT_CONFIG.
+            catalog (CatalogIndex, optional): 本地目录索引, 设置后搜索和搜索建议优先在本地回答. 默认不使用.
+            catalog_fallback (bool, optional): 本地没有结果时是否请求线上接口, 线上结果会补充进目录. 默认为True.
+        """
+        overrides = {name: value for name, value in (("pool_connections", pool_connections),
+                                                     ("pool_maxsize", pool_maxsize),
+                                                     ("keep_alive", keep_alive)) if value is not None}
+        config = config or DEFAULT_CONFIG
+        self.config = replace(config, **overrides) if overrides else config
+        self.base_url = self.config.api_base_url
+        self.video_cache = video_cache
+        self.http_cache = http_cache
+        self.catalog = catalog
+        self.catalog_fallback = catalog_fallback
+        self.session = create_session(self.config)
+        if http_cache is not None:
+            # 只对主站挂载缓存，播放器站点(ec.php)不受影响
+            self.session.mount(self.base_url, create_adapter(self.config, CachingHTTPAdapter, cache=http_cache))
+        self.session.headers.update({"Referer": self.base_url})
+
+    def _fetch_and_parse(self,
+                         name: str,
+                         fetch: Callable[[], requests.Response],
+                         parse: Callable[[requests.Response], Any]) -> Any:
+        """请求并解析页面, 注册了统计 hook 时上报耗时、字节数和缓存结果"""
+        if not hooks_enabled():
+            return parse(fetch())
+        metrics = CallMetrics(name)
+        try:
+            with metrics.measure("fetch"):
+                response = fetch()
+                metrics.bytes = len(response.content)
+            if self.http_cache is not None:
+                metrics.cache = "hit" if getattr(response, "from_cache", False) else "miss"
+            with metrics.measure("parse"):
+                return parse(response)
+        except Exception:
+            metrics.ok = False
+            raise
+        finally:
+            emit(metrics)
 
     def get_homepage(self):
         """获取首页内容"""
         try:
-            response = requests.get(YHDM_API_BASE_URL, headers=self.session.headers)
-            response.encoding = 'utf-8'
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # 获取所有动漫条目
-            items = soup.find_all('li', class_='vodlist_item')
-            
-            results = []
-            for item in items:
-                # 获取标题和链接
-                title_link = item.find('a', class_='vodlist_thumb')
-                if not title_link:
-                    continue
-                    
-                title = title_link.get('title', '')
-                link = title_link.get('href', '')
-                if link and not link.startswith('http'):
-                    link = YHDM_API_BASE_URL + link
-                    
-                # 从链接中提取动漫ID
-                anime_id = 0
-                if link:
-                    try:
-                        anime_id = int(link.split('/')[-2])
-                    except (ValueError, IndexError):
-                        pass
-                    
-                # 获取图片 URL
-                image_url = title_link.get('data-original', '')
-                
-                # 获取年份和类型
-                year_span = item.find('em', class_='voddate_year')
-                type_span = item.find('em', class_='voddate_type')
-                year = year_span.text if year_span else ''
-                type_text = type_span.text if type_span else ''
-                
-                # 获取状态
-                status_span = item.find('span', class_='pic_text')
-                status = status_span.text if status_span else ''
-                
-                # 获取描述
-                desc_div = item.find('div', class_='vodlist_titbox')
-                desc = ''
-                if desc_div:
-                    desc_p = desc_div.find('p', class_='vodlist_sub')
-                    if desc_p:
-                        desc = desc_p.text.strip()
-                
-                results.append({
-                    'id': anime_id,
-                    'title': title,
-                    'link': link,
-                    'image_url': image_url,
-                    'year': year,
-                    'type': type_text,
-                    'status': status,
-                    'description': desc
-                })
-                
-            return results
-            
+            return self._fetch_and_parse("get_homepage", self._get_homepage_page,
+                                         lambda response: parse_with_cache(response, "homepage", parse_homepage,
+                                                                           response.text, None, self.base_url))
         except Exception as e:
-            print(f"获取首页内容失败: {str(e)}")
+            logger.warning("获取首页内容失败: %s", e)
             return []
 
+    def _get_homepage_page(self) -> requests.Response:
+        response = self.session.get(self.base_url, timeout=self.config.timeout)
+        response.encoding = 'utf-8'
+        return response
+
     def search_anime(self, keyword: str, tag: str = "", actor: str = "", page: int = 1) -> List[AnimeShell]:
-        """搜索动漫"""
-        params = {
-            "wd": keyword,
-            "class": tag,
-            "actor": actor,
-            "page": page
-        }
+        """搜索动漫, 设置了 catalog 时先在本地目录中查找(按演员搜索总是请求线上接口)"""
+        if self.catalog is not None and not actor:
+            results = [self._shell_from_entry(entry) for entry in self.catalog.search(keyword, tag, page)]
+            if results or not self.catalog_fallback:
+                return results
+        results = self._fetch_and_parse("search_anime",
+                                        lambda: self._get_search_page(keyword, tag, actor, page),
+                                        self._parse_search_page)
+        if self.catalog is not None:
+            for shell in results:
+                self.catalog.add_shell(shell)
+        return results
+
+    @staticmethod
+    def _shell_from_entry(entry: CatalogEntry) -> AnimeShell:
+        return AnimeShell(id=entry.id, name=entry.name, image_url=entry.image_url, status=entry.status)
+
+    def _get_search_page(self, keyword: str, tag: str, actor: str, page: int) -> requests.Response:
+        params = build_search_params(keyword, tag, actor, page)
         headers = {
-            "Referer": f"{YHDM_API_BASE_URL}/index.php/vod/search/"
+            "Referer": f"{self.base_url}{SEARCH_PATH}"
         }
-        response = self.session.get(f"{YHDM_API_BASE_URL}/index.php/vod/search/", params=params, headers=headers)
+        response = self.session.get(f"{self.base_url}{SEARCH_PATH}", params=params, headers=headers,
+                                    timeout=self.config.timeout)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        results = []
-        for li in soup.select("li.searchlist_item"):
-            a = li.select_one(".searchlist_img > a")
-            if a:
-                results.append(AnimeShell(
-                    id=int(a['href'].split('/')[-2]),
-                    name=a['title'],
-                    image_url=a.get('data-original'),
-                    status=li.find('span', class_='pic_text').text if li.find('span', class_='pic_text') else ''
-                ))
-        return results
+        return response
+
+    @staticmethod
+    def _parse_search_page(response: requests.Response) -> List[AnimeShell]:
+        return parse_with_cache(response, "search", parse_search_results, response.text)
 
     def get_search_suggestions(self, keyword: str, limit: int = 10) -> List[str]:
-        """获取搜索建议"""
-        params = {
-            "mid": 1,
-            "wd": keyword,
-            "limit": limit,
-            "timestamp": int(time.time() * 1000)
-        }
+        """获取搜索建议, 设置了 catalog 时先在本地目录中查找"""
+        if self.catalog is not None:
+            suggests = self.catalog.suggest(keyword, limit)
+            if suggests or not self.catalog_fallback:
+                return suggests
+        params = build_suggest_params(keyword, limit)
         headers = {
-            "Referer": f"{YHDM_API_BASE_URL}/index.php/vod/search/"
+            "Referer": f"{self.base_url}{SEARCH_PATH}"
         }
-        response = self.session.get(f"{YHDM_API_BASE_URL}/index.php/ajax/suggest", params=params, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        
-        # 直接从返回的数据中提取建议列表
-        suggests = []
-        if isinstance(data.get('list'), list):
-            for item in data['list']:
-                if isinstance(item, dict) and 'name' in item:
-                    suggests.append(item['name'])
-        return suggests
+
+        def fetch() -> requests.Response:
+            response = self.session.get(f"{self.base_url}{SUGGEST_PATH}", params=params, headers=headers,
+                                        timeout=self.config.timeout)
+            response.raise_for_status()
+            return response
+
+        def parse(response: requests.Response) -> List[str]:
+            data = response.json()
+            if self.catalog is not None and isinstance(data.get('list'), list):
+                # 建议接口带有拼音(en)，作为别名补充进目录
+                for item in data['list']:
+                    if isinstance(item, dict) and 'id' in item:
+                        self.catalog.add_suggest(item)
+            # 直接从返回的数据中提取建议列表
+            return parse_search_suggestions(data)
+
+        return self._fetch_and_parse("get_search_suggestions", fetch, parse)
 
     def get_anime_detail(self, anime_id: int) -> Optional[Anime]:
         """获取动漫详情"""
-        response = self.session.get(f"{YHDM_API_BASE_URL}/index.php/vod/detail/id/{anime_id}/")
+        return self._fetch_and_parse("get_anime_detail",
+                                     lambda: self._get_detail_page(anime_id),
+                                     lambda response: self._parse_detail_page(response, anime_id))
+
+    @staticmethod
+    def _parse_detail_page(response: requests.Response, anime_id: int) -> Optional[Anime]:
+        anime = parse_with_cache(response, "detail", parse_anime_detail, response.text, anime_id)
+        if anime is not None:
+            anime.last_update = datetime.now()
+        return anime
+
+    def _get_detail_page(self, anime_id: int) -> requests.Response:
+        response = self.session.get(f"{self.base_url}{detail_path(anime_id)}", timeout=self.config.timeout)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
+        return response
+
+    def get_anime_details(self,
+                          anime_ids: List[int],
+                          concurrency: int = 16,
+                          processes: Optional[int] = None) -> Iterator[AnimeDetailResult]:
+        """批量获取动漫详情
+
+        详情页通过本实例的连接池并发下载, 批量较大时页面解析放在进程池中执行以利用多核;
+        单个ID失败（包括页面无法解析）不会中断整个批次, 错误记录在对应结果的 error 中.
+
+        Args:
+            anime_ids (List[int]): 动漫ID列表
+            concurrency (int, optional): 最大并发请求数. 默认为16.
+            processes (int, optional): 解析进程数, 0 表示在当前线程中直接解析; None 时ID数量达到
+                DETAIL_PROCESS_MIN_BATCH（或数量未知）才使用CPU核数个进程, 否则为0. 默认为None.
+
+        Returns:
+            Iterator[AnimeDetailResult]: 按完成顺序产出每个ID的结果
+        """
+        if processes is None:
+            try:
+                large = len(anime_ids) >= DETAIL_PROCESS_MIN_BATCH
+            except TypeError:
+                large = True
+            processes = (os.cpu_count() or 1) if large else 0
+        # 子进程（spawn 方式启动时）不会继承 set_parser_backend 的设置, 显式传入当前后端
+        backend = get_parser_backend()
+        ids = iter(anime_ids)
+        fetch_pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="yhdm-detail")
+        parse_pool = ProcessPoolExecutor(max_workers=processes) if processes > 0 else None
+        pending = {}  # future -> (阶段, 动漫ID)
+
+        def submit_fetch() -> bool:
+            anime_id = next(ids, None)
+            if anime_id is None:
+                return False
+            # 在调用方的 contextvars 上下文中下载, request_scheduler.deadline() 设置的时限对其同样有效
+            future = fetch_pool.submit(contextvars.copy_context().run, self._get_detail_page, anime_id)
+            pending[future] = ("fetch", anime_id)
+            return True
+
         try:
-            # 获取基本信息
-            content_thumb = soup.select_one(".content_thumb > a")
-            content_detail = soup.select_one(".content_detail h2")
-            if not content_thumb or not content_detail:
-                return None
-                
-            image_url = content_thumb.get('data-original')
-            name = content_detail.text.strip()
-            
-            # 获取详细信息
-            data_items = soup.select(".content_detail li.data")
-            year = data_items[0].select_one("span:contains('年份')").next_sibling.text.strip()
-            tags = [tag.text.strip() for tag in data_items[0].select_one("span:contains('类型')").next_siblings]
-            status = data_items[1].select_one("span:contains('状态')").next_sibling.text.strip()
-            description = soup.select_one(".content .full_text > span").text.strip()
-            type = soup.select_one("ul.top_nav > li.active").text.strip()
-            
-            # 获取播放列表
-            latest_episode = None
-            stream_lines = []
-            seen_stream_ids = set()  # 用于跟踪已经添加的线路ID
-            
-            # 调试信息
-            print(f"\n解析动漫 {anime_id} 的播放列表:")
-            
-            # 获取所有分集列表
-            episode_lists = soup.select("ul.content_playlist")
-            print(f"找到 {len(episode_lists)} 个分集列表")
-            
-            for i, episode_list in enumerate(episode_lists):
-                print(f"\n处理第 {i+1} 个分集列表:")
-                
-                # 获取该列表中的所有分集链接
-                episode_links = episode_list.select("a")
-                if not episode_links:
-                    print("未找到分集链接，跳过此列表")
-                    continue
-                
-                # 从第一个分集链接的href中提取线路ID
-                first_link = episode_links[0]
-                href = first_link.get('href', '')
-                match = re.search(r'/sid/(\d+)/', href)
-                if not match:
-                    print(f"无法从链接中提取线路ID: {href}")
-                    continue
-                
-                stream_id = int(match.group(1))
-                
-                # 检查是否已经添加过这个线路ID
-                if stream_id in seen_stream_ids:
-                    print(f"线路ID {stream_id} 已存在，跳过")
-                    continue
-                
-                seen_stream_ids.add(stream_id)
-                print(f"从链接提取到线路ID: {stream_id}")
-                
-                # 生成分集列表
-                episodes = []
-                episode_id = 1
-                for link in episode_links:
-                    episode_title = link.text.strip()
-                    if episode_title:  # 只要标题不为空就添加
-                        episodes.append(Episode(id=episode_id, title=episode_title))
-                        episode_id += 1
-                
-                # 计算实际集数（只计算以"第"开头的链接）
-                regular_episodes = [ep for ep in episodes if ep.title.startswith("第")]
-                special_episodes = [ep for ep in episodes if not ep.title.startswith("第")]
-                
-                # 更新最新集数（只考虑常规集数）
-                if type != "动漫电影":
-                    latest_episode = max(len(regular_episodes), latest_episode or 0)
-                
-                # 添加播放线路信息
-                stream_lines.append(StreamLine(id=stream_id, episodes=episodes))
-                print(f"线路 {stream_id} 添加了 {len(episodes)} 个分集 (常规: {len(regular_episodes)}, 特别篇: {len(special_episodes)})")
-            
-            print(f"最终获取到的播放线路数量: {len(stream_lines)}")
-            for line in stream_lines:
-                regular_count = len([ep for ep in line.episodes if ep.title.startswith("第")])
-                special_count = len([ep for ep in line.episodes if not ep.title.startswith("第")])
-                print(f"线路 {line.id}: {len(line.episodes)} 个分集 (常规: {regular_count}, 特别篇: {special_count})")
-            
-            return Anime(
-                id=anime_id,
-                name=name,
-                image_url=image_url,
-                status=status,
-                latest_episode=latest_episode or 1 if type == "动漫电影" else latest_episode or 0,
-                tags=tags,
-                type=type if type else "未知",
-                year=year if year else "未知",
-                description=description,
-                stream_lines=stream_lines,
-                last_update=datetime.now()
-            )
-        except Exception as e:
-            print(f"解析动漫详情失败: {e}")
-            return None
+            # 控制同时在途的下载数量, 避免一次性为所有ID创建任务
+            for _ in range(concurrency * 2):
+                if not submit_fetch():
+                    break
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, anime_id = pending.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        yield AnimeDetailResult(anime_id, None, error)
+                    elif stage == "fetch":
+                        html = future.result().text
+                        if parse_pool is not None:
+                            future = parse_pool.submit(parse_anime_detail_or_raise, html, anime_id, backend)
+                            pending[future] = ("parse", anime_id)
+                        else:
+                            try:
+                                yield AnimeDetailResult(anime_id, parse_anime_detail_or_raise(html, anime_id, backend))
+                            except Exception as e:
+                                yield AnimeDetailResult(anime_id, None, e)
+                    else:
+                        yield AnimeDetailResult(anime_id, future.result())
+                    if stage == "fetch":
+                        submit_fetch()
+        finally:
+            fetch_pool.shutdown(wait=False, cancel_futures=True)
+            if parse_pool is not None:
+                parse_pool.shutdown(wait=False, cancel_futures=True)
 
     def filter_anime(self, 
                     type: int = 1,
@@ -331,32 +741,121 @@ class YhdmApi:
         Returns:
             List[AnimeShell]: 返回动漫列表,每个元素包含id,name,image_url和status信息
         """
-        params = {
-            "id": type,
-            "by": order_by,
-            "class": genre,
-            "year": year,
-            "letter": letter,
-            "page": page
-        }
+        return self._fetch_and_parse("filter_anime",
+                                     lambda: self._get_filter_page(type, order_by, genre, year, letter, page),
+                                     self._parse_filter_page)
+
+    def _get_filter_page(self, type: int, order_by: str, genre: str, year: str, letter: str, page: int) -> requests.Response:
+        params = build_filter_params(type, order_by, genre, year, letter, page)
         headers = {
-            "Referer": f"{YHDM_API_BASE_URL}/index.php/vod/show/id/1/"
+            "Referer": f"{self.base_url}{FILTER_REFERER_PATH}"
         }
-        response = self.session.get(f"{YHDM_API_BASE_URL}/index.php/vod/show/", params=params, headers=headers)
+        response = self.session.get(f"{self.base_url}{FILTER_PATH}", params=params, headers=headers,
+                                    timeout=self.config.timeout)
         response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        results = []
-        for li in soup.select(".vodlist_wi > .vodlist_item"):
-            a = li.find('a')
-            if a:
-                results.append(AnimeShell(
-                    id=int(a['href'].split('/')[-2]),
-                    name=a['title'],
-                    image_url=a.get('data-original'),
-                    status=a.find('span', class_='pic_text').text if a.find('span', class_='pic_text') else ''
-                ))
-        return results
+        return response
+
+    @staticmethod
+    def _parse_filter_page(response: requests.Response) -> List[AnimeShell]:
+        return parse_with_cache(response, "filter", parse_filter_results, response.text)
+
+    def _iter_pages(self,
+                    get_page: Callable[[int], requests.Response],
+                    parse_page: Callable[[requests.Response], List[AnimeShell]],
+                    max_workers: int,
+                    max_pages: Optional[int]) -> Iterator[AnimeShell]:
+        """从第一页解析总页数, 其余页并发请求, 按页码顺序产出去重后的结果"""
+        first = get_page(1)
+        page_count = parse_page_count(first.text)
+        if max_pages is not None:
+            page_count = min(page_count, max_pages)
+
+        seen_ids = set()
+
+        def unique(shells: List[AnimeShell]) -> Iterator[AnimeShell]:
+            for shell in shells:
+                if shell.id not in seen_ids:
+                    seen_ids.add(shell.id)
+                    yield shell
+
+        yield from unique(parse_page(first))
+        if page_count <= 1:
+            return
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="yhdm-pages") as executor:
+            # 每页在调用方 contextvars 上下文的副本中执行(deadline() 的时限同样有效), 按页码顺序取结果
+            futures = [executor.submit(contextvars.copy_context().run, lambda page: parse_page(get_page(page)), page)
+                       for page in range(2, page_count + 1)]
+            for future in futures:
+                yield from unique(future.result())
+
+    def iter_filter_anime(self,
+                          type: int = 1,
+                          order_by: str = "time",
+                          genre: str = "",
+                          year: str = "",
+                          letter: str = "",
+                          max_workers: int = 8,
+                          max_pages: Optional[int] = None) -> Iterator[AnimeShell]:
+        """遍历筛选结果的所有分页
+
+        筛选参数同 filter_anime, 第一页之后的分页并发请求, 结果按页码顺序产出并按动漫ID去重
+
+        Args:
+            max_workers (int, optional): 最大并发请求数. 默认为8.
+            max_pages (int, optional): 最多请求的页数, None 表示全部. 默认为None.
+        """
+        return self._iter_pages(
+            lambda page: self._get_filter_page(type, order_by, genre, year, letter, page),
+            self._parse_filter_page, max_workers, max_pages)
+
+    def iter_search(self,
+                    keyword: str,
+                    tag: str = "",
+                    actor: str = "",
+                    max_workers: int = 8,
+                    max_pages: Optional[int] = None) -> Iterator[AnimeShell]:
+        """遍历搜索结果的所有分页, 参数同 search_anime 与 iter_filter_anime"""
+        return self._iter_pages(
+            lambda page: self._get_search_page(keyword, tag, actor, page),
+            self._parse_search_page, max_workers, max_pages)
+
+    def get_video_url(self,
+                      anime_id: int,
+                      episode: int = 1,
+                      stream_id: int = 1,
+                      resolve_next: bool = True,
+                      concurrent: bool = True) -> Optional[Tuple[str, Optional[str]]]:
+        """获取视频地址, 复用本实例的连接池, 参数与返回值同 get_video_url_common.get_video_url"""
+        return get_video_url(anime_id, episode, stream_id, session=self.session,
+                             resolve_next=resolve_next, concurrent=concurrent, cache=self.video_cache, config=self.config)
+
+
+    def resolve_stream_line(self,
+                            anime: Union[Anime, int],
+                            stream_id: int,
+                            max_workers: int = 8) -> Iterator[Tuple[Episode, Optional[str]]]:
+        """批量解析某条播放线路下所有分集的视频地址
+
+        Args:
+            anime (Anime | int): get_anime_detail 返回的动漫对象, 或动漫ID
+            stream_id (int): 播放线路ID
+            max_workers (int, optional): 最大并发请求数. 默认为8.
+
+        Returns:
+            Iterator[Tuple[Episode, Optional[str]]]: 按完成顺序产出 (分集, 解密后的视频地址), 失败时地址为None
+        """
+        if not isinstance(anime, Anime):
+            anime = self.get_anime_detail(anime)
+            if anime is None:
+                return
+        episodes = anime.get_episodes(stream_id)
+        if not episodes:
+            return
+        by_id = {episode.id: episode for episode in episodes}
+        for episode_id, decrypted_url in resolve_episodes(anime.id, stream_id, by_id.keys(),
+                                                          session=self.session, max_workers=max_workers,
+                                                          cache=self.video_cache, config=self.config):
+            yield by_id[episode_id], decrypted_url
 
 
 def test_api():
@@ -0,0 +1,369 @@
+import asyncio
+import functools
+import time
+from contextlib import asynccontextmanager
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator, Callable
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp 为可选依赖，仅异步客户端需要
+    aiohttp = None
+
+from config import ClientConfig, DEFAULT_CONFIG
+from instrumentation import get_logger
+from request_scheduler import current_deadline, deadline_passed, parse_retry_after
+from get_video_url_common import (
+    PLAYER_CONFIG_PATH,
+    PLAY_PAGE_CHUNK_SIZE,
+    PlayerScriptScanner,
+    play_page_path,
+    build_player_referrer,
+    parse_encrypted_video_url,
+    decrypt_player_config,
+)
+from video_url_cache import VideoUrlCache, ttl_from_url, decrypt_cache_key, video_cache_key
+from yhdm_api import (
+    Anime,
+    AnimeShell,
+    parse_homepage,
+    parse_search_results,
+    parse_search_suggestions,
+    parse_anime_detail,
+    parse_filter_results,
+    build_search_params,
+    build_suggest_params,
+    build_filter_params,
+    detail_path,
+    SEARCH_PATH,
+    SUGGEST_PATH,
+    FILTER_PATH,
+    FILTER_REFERER_PATH,
+)
+
+
+logger = get_logger(__name__)
+
+
+class AsyncYhdmApi:
+    """
+    樱花动漫-异步api
+
+    与 YhdmApi 提供相同的接口，但所有网络请求均为 asyncio 协程。
+    每个站点（主站 / 播放器站点）各持有一个长连接池，
+    连接数由 limit / limit_per_host 控制。
+
+    用法:
+        async with AsyncYhdmApi(limit=200) as api:
+            results = await api.search_anime("异世界")
+    """
+    def __init__(self,
+                 limit: int = 100,
+                 limit_per_host: int = 0,
+                 keepalive_timeout: float = 30,
+                 timeout: Optional[float] = None,
+                 video_cache: Optional[VideoUrlCache] = None,
+                 config: Optional[ClientConfig] = None):
+        """
+        Args:
+            limit (int, optional): 每个连接池的最大并发连接数, 0 表示不限制. 默认为100.
+            limit_per_host (int, optional): 单个主机的最大并发连接数, 0 表示不限制. 默认为0.
+            keepalive_timeout (float, optional): 空闲连接保活时长(秒). 默认为30.
+            timeout (float, optional): 单次请求总超时(秒), 覆盖 config.timeout. 默认使用 config.timeout.
+            video_cache (VideoUrlCache, optional): 视频地址解密结果缓存. 默认不缓存.
+            config (ClientConfig, optional): 站点地址、超时和请求头; 未设置 config.scheduler 时重试策略只作用于同步客户端,
+                设置后请求经调度器限速并按 config 重试. 默认为 DEFAULT_CONFIG.
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncYhdmApi 需要安装 aiohttp: pip install aiohttp")
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.config = config or DEFAULT_CONFIG
+        self.base_url = self.config.api_base_url
+        self.player_base_url = self.config.player_base_url
+        self.timeout = timeout if timeout is not None else self.config.timeout
+        self.video_cache = video_cache
+        self.headers = {
+            "User-Agent": self.config.user_agent,
+            **self.config.headers,
+            "Referer": self.base_url
+        }
+        self._clients: Dict[str, "aiohttp.ClientSession"] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """关闭所有连接池"""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            await client.close()
+
+    def _get_client(self, base_url: str) -> "aiohttp.ClientSession":
+        """获取（必要时创建）指定站点的连接池"""
+        client = self._clients.get(base_url)
+        if client is None or client.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            client = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=self._client_timeout(),
+            )
+            self._clients[base_url] = client
+        return client
+
+    def _client_timeout(self, until: Optional[float] = None) -> "aiohttp.ClientTimeout":
+        # 与 requests 一致，元组表示 (连接超时, 读取超时)；until 为截止时间(time.monotonic())，总时长不超过它
+        total = None
+        if until is not None:
+            # aiohttp 把 0 视为不限制
+            total = max(0.001, until - time.monotonic())
+        if isinstance(self.timeout, tuple):
+            connect, read = self.timeout
+            return aiohttp.ClientTimeout(total=total, connect=connect, sock_read=read)
+        if self.timeout is not None:
+            total = self.timeout if total is None else min(total, self.timeout)
+        return aiohttp.ClientTimeout(total=total)
+
+    @asynccontextmanager
+    async def _get(self, base_url: str, url: str, **kwargs) -> AsyncIterator["aiohttp.ClientResponse"]:
+        """
+        发起GET请求；配置了 config.scheduler 时先按主机排队，
+        并对连接错误、超时以及可重试的状态码按 config 的重试策略退避重试
+        """
+        client = self._get_client(base_url)
+        scheduler = self.config.scheduler
+        if scheduler is None:
+            async with client.get(url, **kwargs) as response:
+                yield response
+            return
+
+        host = urlsplit(url).netloc
+        until = current_deadline(self.config.deadline)
+        attempt = 0
+        while True:
+            started = await scheduler.acquire_async(host, until)
+            try:
+                response = await client.get(url, timeout=self._client_timeout(until), **kwargs)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # 截止时间导致的超时不缩小共享的并发窗口，见 SchedulingHTTPAdapter.send
+                scheduler.release(host, started, error=e, neutral=deadline_passed(until))
+                delay = scheduler.retry_delay(self.config, attempt, until)
+                if delay is None:
+                    raise
+            except BaseException:
+                # 任务被取消等，既不算成功也不算失败
+                scheduler.release(host, started, neutral=True)
+                raise
+            else:
+                retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                scheduler.release(host, started, status=response.status, retry_after=retry_after)
+                delay = scheduler.retry_delay(self.config, attempt, until, response.status, retry_after)
+                if delay is None:
+                    try:
+                        yield response
+                    finally:
+                        response.release()
+                    return
+                response.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _get_text(self,
+                        base_url: str,
+                        path: str,
+                        params: Optional[Dict[str, Any]] = None,
+                        headers: Optional[Dict[str, str]] = None,
+                        raise_for_status: bool = True) -> Tuple[int, str]:
+        """发起GET请求，返回 (状态码, 文本内容)"""
+        async with self._get(base_url, f"{base_url}{path}", params=params, headers=headers) as response:
+            if raise_for_status:
+                response.raise_for_status()
+            text = await response.text(encoding='utf-8', errors='replace')
+            return response.status, text
+
+    @staticmethod
+    async def _parse(parser: Callable[..., Any], *args, **kwargs) -> Any:
+        # BeautifulSoup 解析页面是 CPU 密集的同步操作，与阻塞的缓存后端一样放到默认线程池中执行，不阻塞事件循环
+        return await asyncio.get_running_loop().run_in_executor(None, functools.partial(parser, *args, **kwargs))
+
+    async def get_homepage(self) -> List[Dict[str, Any]]:
+        """获取首页内容"""
+        try:
+            _, text = await self._get_text(self.base_url, "", raise_for_status=False)
+            return await self._parse(parse_homepage, text, base_url=self.base_url)
+        except Exception as e:
+            logger.warning("获取首页内容失败: %s", e)
+            return []
+
+    async def search_anime(self, keyword: str, tag: str = "", actor: str = "", page: int = 1) -> List[AnimeShell]:
+        """搜索动漫"""
+        params = build_search_params(keyword, tag, actor, page)
+        headers = {
+            "Referer": f"{self.base_url}{SEARCH_PATH}"
+        }
+        _, text = await self._get_text(self.base_url, SEARCH_PATH, params=params, headers=headers)
+        return await self._parse(parse_search_results, text)
+
+    async def get_search_suggestions(self, keyword: str, limit: int = 10) -> List[str]:
+        """获取搜索建议"""
+        params = build_suggest_params(keyword, limit)
+        headers = {
+            "Referer": f"{self.base_url}{SEARCH_PATH}"
+        }
+        async with self._get(self.base_url, f"{self.base_url}{SUGGEST_PATH}", params=params,
+                             headers=headers) as response:
+            response.raise_for_status()
+            data = await response.json(content_type=None)
+        return parse_search_suggestions(data)
+
+    async def get_anime_detail(self, anime_id: int) -> Optional[Anime]:
+        """获取动漫详情"""
+        _, text = await self._get_text(self.base_url, detail_path(anime_id))
+        return await self._parse(parse_anime_detail, text, anime_id)
+
+    async def filter_anime(self,
+                           type: int = 1,
+                           order_by: str = "time",
+                           genre: str = "",
+                           year: str = "",
+                           letter: str = "",
+                           page: int = 1) -> List[AnimeShell]:
+        """按条件筛选动漫, 参数同 YhdmApi.filter_anime"""
+        params = build_filter_params(type, order_by, genre, year, letter, page)
+        headers = {
+            "Referer": f"{self.base_url}{FILTER_REFERER_PATH}"
+        }
+        _, text = await self._get_text(self.base_url, FILTER_PATH, params=params, headers=headers)
+        return await self._parse(parse_filter_results, text)
+
+    async def _cache_get(self, key: str) -> Any:
+        # SQLite 等阻塞后端放到默认线程池中执行，避免阻塞事件循环
+        if getattr(self.video_cache, "blocking", False):
+            return await asyncio.get_running_loop().run_in_executor(None, self.video_cache.get, key)
+        return self.video_cache.get(key)
+
+    async def _cache_set(self, key: str, value: Any, ttl: Optional[float]) -> None:
+        if getattr(self.video_cache, "blocking", False):
+            await asyncio.get_running_loop().run_in_executor(None, self.video_cache.set, key, value, ttl)
+        else:
+            self.video_cache.set(key, value, ttl)
+
+    async def decrypt_url(self, encrypted_url: str) -> Optional[str]:
+        """解密视频 URL"""
+        cache = self.video_cache
+        if cache is not None:
+            cached = await self._cache_get(decrypt_cache_key(encrypted_url))
+            if cached is not None:
+                return cached
+        try:
+            headers = {
+                "Referer": build_player_referrer(encrypted_url, self.config)
+            }
+            _, text = await self._get_text(self.player_base_url, PLAYER_CONFIG_PATH,
+                                           params={"url": encrypted_url}, headers=headers,
+                                           raise_for_status=False)
+            decrypted = decrypt_player_config(text)
+        except Exception as e:
+            logger.warning("解密失败: %s", e)
+            return None
+        if cache is not None and decrypted:
+            await self._cache_set(decrypt_cache_key(encrypted_url), decrypted, ttl_from_url(decrypted, cache.default_ttl))
+        return decrypted
+
+    async def _get_play_page_text(self, anime_id: int, episode: int, stream_id: int) -> Tuple[int, str]:
+        """
+        流式读取播放页，收到 .player_video 脚本后即停止扫描，返回 (状态码, 已读取的内容)
+
+        剩余内容按 config.play_page_drain_limit 处理（见 get_video_url_common.read_play_page）：
+        读完丢弃以复用连接，或者直接关闭连接不再下载
+        """
+        drain_limit = self.config.play_page_drain_limit
+        url = f"{self.base_url}{play_page_path(anime_id, episode, stream_id)}"
+        async with self._get(self.base_url, url) as response:
+            if response.status != 200:
+                return response.status, ""
+            scanner = PlayerScriptScanner()
+            async for chunk in response.content.iter_chunked(PLAY_PAGE_CHUNK_SIZE):
+                if scanner.feed(chunk):
+                    if drain_limit is None or (response.content_length is not None
+                                               and response.content_length <= drain_limit):
+                        async for _ in response.content.iter_any():
+                            pass
+                    else:
+                        response.close()
+                    break
+            return response.status, scanner.text(response.charset)
+
+    async def get_video_url(self,
+                            anime_id: int = 24103,
+                            episode: int = 1,
+                            stream_id: int = 3,
+                            resolve_next: bool = True) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        根据动漫id和集数等信息获取视频 URL, 返回值同 get_video_url_common.get_video_url
+        当前集和下一集的 ec.php 请求并发执行; resolve_next 为 False 时只解密当前集
+        """
+        cache = self.video_cache
+        if cache is not None:
+            cached = await self._cache_get(video_cache_key(anime_id, episode, stream_id, resolve_next))
+            if cached is not None:
+                return cached
+
+        status, text = await self._get_play_page_text(anime_id, episode, stream_id)
+        if status != 200:
+            logger.warning("获取播放页失败，状态码: %s", status)
+            return None
+
+        # 解析播放页获取加密 URL（返回一个元组: (url, next_url)）
+        encrypted_urls = await self._parse(parse_encrypted_video_url, text)
+        if not encrypted_urls:
+            logger.warning("解析加密URL失败")
+            return None
+
+        url, next_url = encrypted_urls
+        if not resolve_next:
+            next_url = None
+
+        if next_url:
+            decrypted_url, decrypted_next_url = await asyncio.gather(
+                self.decrypt_url(url), self.decrypt_url(next_url))
+        else:
+            decrypted_url, decrypted_next_url = await self.decrypt_url(url), None
+        if not decrypted_url:
+            logger.warning("解密当前URL失败")
+            return None
+
+        if decrypted_next_url and "http" not in decrypted_next_url:
+            decrypted_next_url = None
+
+        if cache is not None:
+            ttl = ttl_from_url(decrypted_url, cache.default_ttl)
+            if decrypted_next_url:
+                ttl = min(ttl, ttl_from_url(decrypted_next_url, cache.default_ttl))
+            await self._cache_set(video_cache_key(anime_id, episode, stream_id, resolve_next),
+                                  (decrypted_url, decrypted_next_url), ttl)
+
+        return decrypted_url, decrypted_next_url
+
+async def _main():
+    async with AsyncYhdmApi() as api:
+        results = await asyncio.gather(
+            api.search_anime("异世界"),
+            api.filter_anime(year="2023"),
+        )
+        for shells in results:
+            print(f"获取到 {len(shells)} 个结果")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
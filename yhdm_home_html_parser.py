@@ -1,28 +1,261 @@
-import requests
-from bs4 import BeautifulSoup
+import hashlib
 import json
+import os
 import re
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DEFAULT_CONFIG
+from bs4 import Tag
+
+from homepage_diff import HomepageDiffer
+from html_backend import make_soup
+from http_session import get_default_session
+from instrumentation import get_logger
+
+logger = get_logger(__name__)
+
+# 写入首页快照的后台线程，所有 YhdmParser 实例共享
+_snapshot_executor = None
+_snapshot_executor_lock = threading.Lock()
+
+
+def _get_snapshot_executor():
+    global _snapshot_executor
+    if _snapshot_executor is None:
+        with _snapshot_executor_lock:
+            if _snapshot_executor is None:
+                _snapshot_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="yhdm-snapshot")
+    return _snapshot_executor
+
+
+def snapshot_path(snapshot_dir, html_content):
+    """按内容的 sha256 生成快照文件名，相同内容只保存一份"""
+    digest = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+    return os.path.join(snapshot_dir, f"homepage-{digest[:16]}.html")
+
+
+def _write_snapshot(path, html_content):
+    if os.path.exists(path):
+        return path
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # 先写临时文件再重命名，并发写入同一快照时不会读到半个文件
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return path
+
+
+# 最近更新取页面中前 12 个动漫条目
+RECENT_UPDATES_LIMIT = 12
+
+# 动漫条目中需要的元素 (标签名, class)
+_ANIME_ITEM_FIELDS = (('a', 'vodlist_thumb'), ('p', 'vodlist_sub'), ('span', 'pic_text'), ('span', 'vodlist_top'))
+_VODLIST_TOP_FIELDS = (('em', 'voddate_year'), ('em', 'voddate_type'))
+
+
+# 排行标题中需要去掉的字符：排名、点击数等数字，以及空白和标点（中日韩统一表意文字除外）
+_RANK_TITLE_STRIP_RE = re.compile(r'(?:\d|[^\w\u4e00-\u9fff])+')
+_DIGITS_RE = re.compile(r'\d+')
+_HEAT_CLASS = 'text_muted pull_right'
+_HEAT_RENQI_CLASS = 'text_muted pull_right renqi'
+
+
+def clean_rank_title(title):
+    """
+    清理排行标题中的排名和点击数，只保留文字
+
+    一次替换完成：去掉所有数字、空白和特殊字符
+    """
+    return _RANK_TITLE_STRIP_RE.sub('', title)
+
+
+def _heat_from(elem):
+    match = _DIGITS_RE.search(elem.text)
+    return int(match.group()) if match else None
+
+
+def extract_heat(item):
+    """
+    提取排行项的热度，没有时返回 0
+
+    一次遍历排行项中的 span：优先使用第一个 class 为 "text_muted pull_right" 的元素中的数字，
+    没有数字时再使用第一个 "text_muted pull_right renqi" 元素
+    """
+    heat_elem = None
+    renqi_elem = None
+    for el in item.descendants:
+        if not isinstance(el, Tag) or el.name != 'span':
+            continue
+        classes = el.get('class')
+        if not classes:
+            continue
+        class_text = ' '.join(classes)
+        if heat_elem is None and class_text == _HEAT_CLASS:
+            heat_elem = el
+            heat = _heat_from(el)
+            if heat is not None:
+                return heat
+            if renqi_elem is not None:
+                break
+        elif renqi_elem is None and class_text == _HEAT_RENQI_CLASS:
+            renqi_elem = el
+            if heat_elem is not None:
+                break
+    if renqi_elem is not None:
+        heat = _heat_from(renqi_elem)
+        if heat is not None:
+            return heat
+    return 0
+
+
+def _first_by_class(node, fields):
+    """
+    一次遍历 node 的子孙，返回 {(标签名, class): 第一个匹配的元素}，
+    与对每个字段分别调用 node.find(name, class_=cls) 的结果相同
+    """
+    found = {}
+    for el in node.descendants:
+        if not isinstance(el, Tag):
+            continue
+        classes = el.get('class')
+        if not classes:
+            continue
+        for field in fields:
+            if field not in found and el.name == field[0] and field[1] in classes:
+                found[field] = el
+        if len(found) == len(fields):
+            break
+    return found
+
+
+class _HomepageIndex:
+    """
+    一次深度优先遍历首页文档树，记录各区块及其包含的元素
+
+    遍历时维护当前所在的 pannel / ul.vodlist / list_info 栈，每个元素都登记到所有外层容器，
+    与在各容器上分别 find_all 的结果一致
+    """
+    def __init__(self, soup):
+        self.pannels = []  # div.pannel，文档顺序
+        self.pannel_title = {}  # id(pannel) -> 第一个 h2.title
+        self.pannel_more_link = {}  # id(pannel) -> 第一个 a.text_muted pull_left
+        self.pannel_lists = {}  # id(pannel) -> 其中的 ul.vodlist 列表
+        self.list_items = {}  # id(ul) -> 其中的 li.vodlist_item 列表
+        self.anime_items = []  # 所有 .vodlist_item，文档顺序
+        self.rank_sections = []  # div.list_info
+        self.rank_title = {}  # id(section) -> 第一个 h3.title
+        self.rank_items = {}  # id(section) -> 其中的 li 列表
+        self._walk(soup)
+
+    def _walk(self, root):
+        pannels, lists, rank_sections = [], [], []
+        # 用显式栈代替递归，嵌套很深的页面也不会超出递归深度；
+        # 栈元素为 (子节点迭代器, 进入该层时压入元素的容器栈)，离开该层时弹出
+        stack = [(iter(root.children), None)]
+        while stack:
+            children, entered = stack[-1]
+            el = next(children, None)
+            if el is None:
+                stack.pop()
+                if entered is not None:
+                    entered.pop()
+                continue
+            if not isinstance(el, Tag):
+                continue
+            name = el.name
+            classes = el.get('class') or ()
+            opened = None
+
+            if name == 'div' and 'pannel' in classes:
+                self.pannels.append(el)
+                self.pannel_lists[id(el)] = []
+                opened = pannels
+            elif name == 'div' and 'list_info' in classes:
+                self.rank_sections.append(el)
+                self.rank_items[id(el)] = []
+                opened = rank_sections
+            elif name == 'ul' and 'vodlist' in classes:
+                for pannel in pannels:
+                    self.pannel_lists[id(pannel)].append(el)
+                self.list_items[id(el)] = []
+                opened = lists
+            elif name == 'h2' and 'title' in classes:
+                for pannel in pannels:
+                    self.pannel_title.setdefault(id(pannel), el)
+            elif name == 'h3' and 'title' in classes:
+                for section in rank_sections:
+                    self.rank_title.setdefault(id(section), el)
+            elif name == 'a' and ' '.join(classes) == 'text_muted pull_left':
+                for pannel in pannels:
+                    self.pannel_more_link.setdefault(id(pannel), el)
+
+            if 'vodlist_item' in classes:
+                self.anime_items.append(el)
+                if name == 'li':
+                    for ul in lists:
+                        self.list_items[id(ul)].append(el)
+            if name == 'li':
+                for section in rank_sections:
+                    self.rank_items[id(section)].append(el)
+
+            if opened is not None:
+                opened.append(el)
+            stack.append((iter(el.children), opened))
 
 
 # 参考 FireShot.png的页面结构解析的结构化之后的首页json数据
 class YhdmParser:
-    def __init__(self):
-        self.base_url = "https://www.yhdm6.top"
-        self.headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-        }
+    def __init__(self, parser_backend=None, config=None, snapshot_dir=None):
+        # HTML 解析后端，None 表示使用 html_backend 的全局设置
+        self.parser_backend = parser_backend
+        # 调试用：设置后每次获取的首页会在后台以内容哈希命名保存到该目录，None 表示不保存
+        self.snapshot_dir = snapshot_dir
+        self.last_snapshot = None  # 最近一次快照写入的 Future，结果为文件路径
+        # 增量模式保存的上一次解析结果
+        self.differ = HomepageDiffer()
+        # config 为 ClientConfig 时使用其中的站点地址和请求头，否则保持原有的桌面端设置
+        self.config = config or DEFAULT_CONFIG
+        if config is not None:
+            self.base_url = config.api_base_url
+            self.headers = {"User-Agent": config.user_agent, **config.headers}
+        else:
+            self.base_url = "https://www.yhdm6.top"
+            self.headers = {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+            }
 
     def get_page_content(self):
         try:
-            response = requests.get(self.base_url, headers=self.headers)
+            session = get_default_session(self.config)
+            response = session.get(self.base_url, headers=self.headers, timeout=self.config.timeout)
             response.encoding = 'utf-8'
-            # 保存网页内容到本地文件
-            with open('page.html', 'w', encoding='utf-8') as f:
-                f.write(response.text)
-            return response.text
+            html_content = response.text
         except Exception as e:
-            print(f"Error fetching page: {e}")
+            logger.warning("Error fetching page: %s", e)
             return None
+        if self.snapshot_dir:
+            self.last_snapshot = self.save_snapshot(html_content)
+        return html_content
+
+    def save_snapshot(self, html_content):
+        """在后台线程中把首页内容保存到 snapshot_dir，返回结果为文件路径的 Future"""
+        path = snapshot_path(self.snapshot_dir, html_content)
+        future = _get_snapshot_executor().submit(_write_snapshot, path, html_content)
+        future.add_done_callback(self._log_snapshot_error)
+        return future
+
+    @staticmethod
+    def _log_snapshot_error(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning("保存首页快照失败: %s", future.exception())
 
     def _extract_id_from_url(self, url):
         # 从URL中提取ID
@@ -53,8 +286,8 @@ class YhdmParser:
         if not uls:
             return weekly_schedule
 
-        # 遍历每个 ul 标签
-        for ul in uls:
+        # 遍历每个 ul 标签，day 为其在番剧表中的序号（从 1 开始，没有动漫的天也计数），作为这一天的稳定标识
+        for day, ul in enumerate(uls, 1):
             # 获取所有动漫项
             all_items = ul.find_all('li', class_='vodlist_item')
             
@@ -76,6 +309,7 @@ class YhdmParser:
             # 如果这一天有动漫，添加到 weekly_schedule
             if anime_list:
                 weekly_schedule.append({
+                    "day": day,
                     "anime_list": anime_list
                 })
         
@@ -130,7 +364,7 @@ class YhdmParser:
 
     def parse_recent_updates(self, soup):
         recent_updates = []
-        recent_items = soup.select('.vodlist_item')[:12]
+        recent_items = soup.select('.vodlist_item')[:RECENT_UPDATES_LIMIT]
         for item in recent_items:
             anime = self._parse_anime_item(item)
             if anime:
@@ -140,125 +374,91 @@ class YhdmParser:
     def parse_rankings(self, soup):
         rankings = []
         rank_sections = soup.find_all('div', class_='list_info')
-        
-        def clean_title(title):
-            # 清理标题中的排名和点击数
-            # 移除开头的数字和空格
-            title = re.sub(r'^\d+\s+', '', title)
-            # 移除剩余的数字和空格
-            title = re.sub(r'\d+\s*', '', title)
-            # 移除前导和尾随空格
-            title = title.strip()
-            # 移除多余的空格
-            title = re.sub(r'\s+', ' ', title)
-            # 移除前导空格
-            title = title.lstrip()
-            # 移除尾随空格
-            title = title.rstrip()
-            # 移除所有空格
-            title = title.replace(' ', '')
-            # 移除特殊字符
-            title = re.sub(r'[^\w\u4e00-\u9fff]', '', title)
-            # 移除前导空格
-            title = title.lstrip()
-            return title
-        
-        def extract_heat(item):
-            # 尝试从不同结构中提取热度信息
-            heat = 0
-            
-            # 尝试从 text_muted pull_right 类中提取
-            heat_elem = item.find('span', class_='text_muted pull_right')
-            if heat_elem:
-                heat_text = heat_elem.text.strip()
-                # 提取数字
-                heat_match = re.search(r'(\d+)', heat_text)
-                if heat_match:
-                    return int(heat_match.group(1))
-            
-            # 尝试从 text_muted pull_right renqi 类中提取
-            heat_elem = item.find('span', class_='text_muted pull_right renqi')
-            if heat_elem:
-                heat_text = heat_elem.text.strip()
-                # 提取数字
-                heat_match = re.search(r'(\d+)', heat_text)
-                if heat_match:
-                    return int(heat_match.group(1))
-            
-            return heat
-        
+
         for section in rank_sections:
             # 获取排行榜名称
             title_elem = section.find('h3', class_='title')
             if not title_elem:
                 continue
-                
-            rank_name = title_elem.text.strip()
-            rank_items = []
-            items = section.find_all('li')
-            
-            for item in items:
-                if 'ranklist_item' in item.get('class', []):
-                    # 处理带图片的排行项
-                    title_elem = item.find('h4', class_='title')
-                    if title_elem:
-                        title = title_elem.text.strip()
-                        url = item.find('a').get('href', '')
-                        info = item.find('p', class_='vodlist_sub')
-                        info_text = info.text.strip() if info else ''
-                        info_text = info_text.replace(" "," ")
-                        
-                        # 获取热度信息
-                        heat = extract_heat(item)
-                        
-                        # 获取缩略图
-                        thumbnail = ''
-                        thumb_elem = item.find('div', class_='ranklist_thumb lazyload')
-                        if thumb_elem:
-                            thumbnail = thumb_elem.get('data-original', '')
-                            if not thumbnail:
-                                # 尝试从 style 属性中提取背景图片 URL
-                                style = thumb_elem.get('style', '')
-                                bg_match = re.search(r'url\(["\']?(.*?)["\']?\)', style)
-                                if bg_match:
-                                    thumbnail = bg_match.group(1)
-                        
-                        rank_items.append({
-                            "rank": len(rank_items) + 1,
-                            "title": title,
-                            "id": self._extract_id_from_url(url),
-                            "info": info_text,
-                            "heat": heat,
-                            "thumbnail": thumbnail
-                        })
-                else:
-                    # 处理普通排行项
-                    link = item.find('a')
-                    if link:
-                        title = clean_title(link.text.strip())
-                        url = link.get('href', '')
-                        
-                        # 获取热度信息
-                        heat = extract_heat(item)
-                        
-                        rank_items.append({
-                            "rank": len(rank_items) + 1,
-                            "title": title,
-                            "id": self._extract_id_from_url(url),
-                            "heat": heat
-                        })
-            
-            if rank_items:
-                rankings.append({
-                    "name": rank_name,
-                    "items": rank_items
-                })
-        
+
+            rank = self._parse_rank_section(title_elem.text.strip(), section.find_all('li'))
+            if rank:
+                rankings.append(rank)
+
         return rankings
 
+    def _parse_rank_section(self, rank_name, items):
+        rank_items = []
+        for item in items:
+            rank_item = self._parse_rank_item(item, len(rank_items) + 1)
+            if rank_item:
+                rank_items.append(rank_item)
+
+        if not rank_items:
+            return None
+        return {
+            "name": rank_name,
+            "items": rank_items
+        }
+
+    def _parse_rank_item(self, item, rank):
+        if 'ranklist_item' in item.get('class', []):
+            # 处理带图片的排行项
+            title_elem = item.find('h4', class_='title')
+            if not title_elem:
+                return None
+            title = title_elem.text.strip()
+            url = item.find('a').get('href', '')
+            info = item.find('p', class_='vodlist_sub')
+            info_text = info.text.strip() if info else ''
+            info_text = info_text.replace(" "," ")
+
+            # 获取热度信息
+            heat = extract_heat(item)
+
+            # 获取缩略图
+            thumbnail = ''
+            thumb_elem = item.find('div', class_='ranklist_thumb lazyload')
+            if thumb_elem:
+                thumbnail = thumb_elem.get('data-original', '')
+                if not thumbnail:
+                    # 尝试从 style 属性中提取背景图片 URL
+                    style = thumb_elem.get('style', '')
+                    bg_match = re.search(r'url\(["\']?(.*?)["\']?\)', style)
+                    if bg_match:
+                        thumbnail = bg_match.group(1)
+
+            return {
+                "rank": rank,
+                "title": title,
+                "id": self._extract_id_from_url(url),
+                "info": info_text,
+                "heat": heat,
+                "thumbnail": thumbnail
+            }
+
+        # 处理普通排行项
+        link = item.find('a')
+        if not link:
+            return None
+        title = clean_rank_title(link.text.strip())
+        url = link.get('href', '')
+
+        # 获取热度信息
+        heat = extract_heat(item)
+
+        return {
+            "rank": rank,
+            "title": title,
+            "id": self._extract_id_from_url(url),
+            "heat": heat
+        }
+
     def _parse_anime_item(self, item):
         try:
-            title_elem = item.find('a', class_='vodlist_thumb')
+            # 一次遍历条目子树取出所需元素
+            elems = _first_by_class(item, _ANIME_ITEM_FIELDS)
+            title_elem = elems.get(('a', 'vodlist_thumb'))
             if not title_elem:
                 return None
                 
@@ -269,7 +469,7 @@ class YhdmParser:
             if not thumb_url:
                 thumb_url = title_elem.get('src', '')
             
-            info = item.find('p', class_='vodlist_sub')
+            info = elems.get(('p', 'vodlist_sub'))
             info_text = info.text.strip() if info else ''
             info_text = info_text.replace(" "," ")
             
@@ -279,15 +479,16 @@ class YhdmParser:
             status = ''
             
             # 获取状态信息
-            status_elem = item.find('span', class_='pic_text')
+            status_elem = elems.get(('span', 'pic_text'))
             if status_elem:
                 status = status_elem.text.strip()
             
             # 从vodlist_top中获取年份和类型
-            vodlist_top = item.find('span', class_='vodlist_top')
+            vodlist_top = elems.get(('span', 'vodlist_top'))
             if vodlist_top:
-                year_elem = vodlist_top.find('em', class_='voddate_year')
-                type_elem = vodlist_top.find('em', class_='voddate_type')
+                top_elems = _first_by_class(vodlist_top, _VODLIST_TOP_FIELDS)
+                year_elem = top_elems.get(('em', 'voddate_year'))
+                type_elem = top_elems.get(('em', 'voddate_type'))
                 
                 if year_elem:
                     year = year_elem.text.strip()
@@ -304,30 +505,138 @@ class YhdmParser:
                 "info": info_text
             }
         except Exception as e:
-            print(f"Error parsing anime item: {e}")
+            logger.warning("Error parsing anime item: %s", e)
             return None
 
-    def generate_json(self):
-        # 首先获取并保存网页内容
-        html_content = self.get_page_content()
-        if not html_content:
-            return None
-            
-        # 使用保存的HTML文件进行解析
-        with open('page.html', 'r', encoding='utf-8') as f:
-            html_content = f.read()
-            
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        data = {
+    def parse_homepage(self, soup):
+        """
+        单次遍历解析整个首页，结果与分别调用 parse_weekly_schedule / parse_categories /
+        parse_recent_updates / parse_rankings 相同
+
+        文档树只遍历一次，出现在多个区块中的同一条目只解析一次
+        """
+        index = _HomepageIndex(soup)
+        parsed = {}  # id(元素) -> _parse_anime_item 的结果
+
+        def anime_item(el):
+            key = id(el)
+            if key not in parsed:
+                parsed[key] = self._parse_anime_item(el)
+            anime = parsed[key]
+            # 各区块得到各自的副本，避免 update_info 等字段相互影响
+            return dict(anime) if anime else None
+
+        def anime_list(ul):
+            return [anime for anime in map(anime_item, index.list_items[id(ul)]) if anime]
+
+        weekly_schedule = []
+        categories = []
+        schedule_found = False
+        for pannel in index.pannels:
+            title = index.pannel_title.get(id(pannel))
+            if title is None:
+                continue
+            name = title.text.strip()
+
+            if "番剧表" in name:
+                # 与 parse_weekly_schedule 一致，只取第一个番剧表
+                if schedule_found:
+                    continue
+                schedule_found = True
+                for day_number, ul in enumerate(index.pannel_lists[id(pannel)], 1):
+                    day = []
+                    for el in index.list_items[id(ul)]:
+                        anime = anime_item(el)
+                        if not anime:
+                            continue
+                        update_text = el.find('span', class_='pic_text text_right')
+                        if update_text:
+                            anime['update_info'] = update_text.text.strip()
+                            day.append(anime)
+                    if day:
+                        weekly_schedule.append({"day": day_number, "anime_list": day})
+                continue
+
+            if not any(keyword in name for keyword in ['动漫', '番剧', '排行榜']):
+                continue
+            category_id = None
+            more_link = index.pannel_more_link.get(id(pannel))
+            if more_link:
+                match = re.search(r'/type/id/(\d+)/?', more_link.get('href', ''))
+                if match:
+                    category_id = match.group(1)
+            lists = index.pannel_lists[id(pannel)]
+            items = anime_list(lists[0]) if lists else []
+            if items:
+                categories.append({
+                    "name": name,
+                    "category_id": category_id,
+                    "anime_list": items
+                })
+
+        recent_updates = [anime for anime in map(anime_item, index.anime_items[:RECENT_UPDATES_LIMIT]) if anime]
+
+        rankings = []
+        for section in index.rank_sections:
+            title = index.rank_title.get(id(section))
+            if title is None:
+                continue
+            rank = self._parse_rank_section(title.text.strip(), index.rank_items[id(section)])
+            if rank:
+                rankings.append(rank)
+
+        return {
+            "weekly_schedule": weekly_schedule,
+            "categories": categories,
+            "recent_updates": recent_updates,
+            "rankings": rankings
+        }
+
+    def parse_homepage_multi_pass(self, soup):
+        """
+        依次调用四个 parse_* 方法解析首页，每个区块各自扫描一遍文档树
+        """
+        return {
             "weekly_schedule": self.parse_weekly_schedule(soup),
             "categories": self.parse_categories(soup),
             "recent_updates": self.parse_recent_updates(soup),
             "rankings": self.parse_rankings(soup)
         }
-        
+
+    def generate_data(self, html_content=None, single_pass=True):
+        # 直接解析内存中的网页内容，html_content 为空时请求首页
+        if html_content is None:
+            html_content = self.get_page_content()
+        if not html_content:
+            return None
+
+        soup = make_soup(html_content, self.parser_backend)
+        if single_pass:
+            return self.parse_homepage(soup)
+        return self.parse_homepage_multi_pass(soup)
+
+    def generate_json(self, html_content=None, single_pass=True, compact=False):
+        # compact 为 True 时输出无缩进的紧凑 JSON，与 serialization.dumps_json 相同
+        data = self.generate_data(html_content, single_pass)
+        if data is None:
+            return None
+        # weekly_schedule 中的 day 只供 homepage_diff 按天比较使用，不写入 JSON，输出格式保持不变
+        data["weekly_schedule"] = [{key: value for key, value in entry.items() if key != "day"}
+                                   for entry in data["weekly_schedule"]]
+        if compact:
+            return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
         return json.dumps(data, ensure_ascii=False, indent=2)
 
+    def generate_diff(self, html_content=None):
+        """
+        增量模式：与上一次调用的解析结果比较，只返回变化的条目和新的内容哈希，
+        格式见 homepage_diff.HomepageDiffer.update；首次调用时所有条目均为新增，获取首页失败时返回 None
+        """
+        data = self.generate_data(html_content)
+        if data is None:
+            return None
+        return self.differ.update(data)
+
 def main():
     parser = YhdmParser()
     json_data = parser.generate_json()